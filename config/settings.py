@@ -163,3 +163,39 @@ CHROMA_DB_PATH = BASE_DIR / 'chroma_db'
 
 # 임베딩 모델 설정
 EMBEDDING_MODEL = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'  # 한국어 지원
+
+# 워커 기동 시 RAG 서비스(임베딩 모델/ChromaDB)를 미리 로딩할지 여부
+RAG_EAGER_LOAD = os.getenv('RAG_EAGER_LOAD', 'False').lower() in ('1', 'true', 'yes')
+
+# 하이브리드 검색: 벡터(Chroma) + 문자 bigram BM25(FTS5) 결과를 RRF 로 결합
+RAG_HYBRID = os.getenv('RAG_HYBRID', 'True').lower() in ('1', 'true', 'yes')
+RAG_CANDIDATE_DEPTH = int(os.getenv('RAG_CANDIDATE_DEPTH', '20'))  # 단계별 후보 수
+RAG_RRF_K = int(os.getenv('RAG_RRF_K', '60'))
+
+# 임베딩 단위: 'facility'(시설당 문서 1개) | 'section'(섹션별 청크, 검색 시 시설 단위로 집계)
+RAG_CHUNKING = os.getenv('RAG_CHUNKING', 'facility')
+
+# 임베딩 디스크 캐시: (모델명, sha256(텍스트)) -> 벡터, 최대 항목 수를 넘으면 LRU 삭제 (0 이면 사용 안 함)
+EMBEDDING_CACHE_PATH = Path(os.getenv('EMBEDDING_CACHE_PATH', str(BASE_DIR / 'embedding_cache.sqlite3')))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '200000'))
+
+# 챗봇 캐시 (워커 메모리): 같은 질문 -> 검색 결과 LRU, 비슷한 질문(코사인 유사도 임계값 이상) -> 답변
+RAG_QUERY_CACHE_SIZE = int(os.getenv('RAG_QUERY_CACHE_SIZE', '256'))  # 0 이면 사용 안 함
+RAG_ANSWER_CACHE_SIZE = int(os.getenv('RAG_ANSWER_CACHE_SIZE', '256'))  # 0 이면 사용 안 함
+RAG_ANSWER_CACHE_THRESHOLD = float(os.getenv('RAG_ANSWER_CACHE_THRESHOLD', '0.95'))
+RAG_CACHE_TTL = int(os.getenv('RAG_CACHE_TTL', '3600'))  # 초
+
+# 벡터 저장소 백엔드: 'chroma'(ChromaDB) | 'numpy'(프로세스 내 메모리 맵 행렬, core.vector_store)
+RAG_VECTOR_STORE = os.getenv('RAG_VECTOR_STORE', 'chroma')
+VECTOR_STORE_PATH = CHROMA_DB_PATH.parent / 'vector_index'
+# 검색 행렬 형식: float32 | float16 | int8 (양자화 모드는 압축 행렬로 후보를 고르고 float32 원본으로 재정렬)
+VECTOR_STORE_DTYPE = os.getenv('VECTOR_STORE_DTYPE', 'float32')
+VECTOR_STORE_RERANK = int(os.getenv('VECTOR_STORE_RERANK', '4'))  # 재정렬 후보 수 = top-k x 이 값
+
+# 임베딩 인코딩: 배치 크기(길이별로 묶어 패딩 최소화), torch 스레드 수(0 이면 기본값), 장치('' 이면 자동: cuda/mps/cpu)
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+EMBEDDING_THREADS = int(os.getenv('EMBEDDING_THREADS', '0'))
+EMBEDDING_DEVICE = os.getenv('EMBEDDING_DEVICE', '')
+
+# 다른 프로세스(크롤러 재색인 등)의 색인 변경을 확인하는 주기(초)
+RAG_INDEX_CHECK_INTERVAL = float(os.getenv('RAG_INDEX_CHECK_INTERVAL', '5'))
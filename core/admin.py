@@ -45,6 +45,12 @@ class FacilityNonCoveredInline(admin.StackedInline):
     readonly_fields = ('title', 'content')
     can_delete = False
 
+class FacilityAttributeInline(admin.TabularInline):
+    model = models.FacilityAttribute
+    extra = 0
+    readonly_fields = ('section', 'key', 'number', 'unit', 'text')
+    can_delete = False
+
 @admin.register(models.Facility)
 class FacilityAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'kind', 'grade', 'capacity', 'occupancy', 'waiting', 'availability', 'view_detail_link')
@@ -60,6 +66,7 @@ class FacilityAdmin(admin.ModelAdmin):
         FacilityLocationInline,
         FacilityHomepageInline,
         FacilityNonCoveredInline,
+        FacilityAttributeInline,
     ]
 
     def view_detail_link(self, obj):
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # 선택적 웜업: 첫 챗봇 요청이 모델 로딩을 기다리지 않도록 백그라운드에서 미리 로딩
+        if getattr(settings, 'RAG_EAGER_LOAD', False):
+            from .rag_service import warm_up_rag_service
+            warm_up_rag_service()
@@ -0,0 +1,133 @@
+"""섹션 행(title/content 텍스트)에서 정형 속성 추출 + 속성 조건 필터
+
+예) 인력현황 '간호사: 3명' -> (staff, 간호사, 3, 명), 비급여 '식재료비: 300,000원' -> (noncovered, 식재료비, 300000, 원)
+속성 조건 문법: '<섹션>:<항목><연산자><값>' (연산자: >=, <=, >, <, =)
+    staff:간호사>=10, noncovered:식재료비<=300000, evaluation:평가등급=A등급
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from .models import (
+    Facility, FacilityAttribute, FacilityBasic, FacilityEvaluation, FacilityStaff, FacilityNonCovered,
+)
+
+# 속성 섹션 -> 원본 섹션 모델
+ATTRIBUTE_SECTIONS = {
+    'basic': FacilityBasic,
+    'evaluation': FacilityEvaluation,
+    'staff': FacilityStaff,
+    'noncovered': FacilityNonCovered,
+}
+# 속성에 영향을 주는 파싱 결과(writer) 키
+ATTRIBUTE_ITEM_KEYS = frozenset({'basic_items', 'evaluation_items', 'staff_items', 'non_covered_items'})
+
+# 전화번호/날짜(02-1234-5678, 2010-01-01)처럼 '-' 로 이어진 숫자는 값으로 보지 않는다
+NUMBER_RE = re.compile(r'(?<![\d.\-])(\d[\d,]*(?:\.\d+)?)(?![\d\-])\s*(원|명|점|개|%|세|회|시간|일)?')
+FILTER_RE = re.compile(r'^(?P<section>\w+):(?P<key>.+?)\s*(?P<op>>=|<=|>|<|=)\s*(?P<value>.+)$')
+FILTER_LOOKUPS = {'>=': 'gte', '<=': 'lte', '>': 'gt', '<': 'lt', '=': 'exact'}
+TEXT_MAX_LENGTH = 64
+
+
+def normalize_key(title: str) -> str:
+    return re.sub(r'\s+', ' ', title or '').strip()[:100]
+
+
+def parse_value(content: str) -> Tuple[Optional[float], str, str]:
+    """content -> (숫자, 단위, 짧은 텍스트)
+
+    첫 숫자(천 단위 쉼표 허용)와 뒤따르는 단위를 숫자 값으로, 짧은 텍스트(등급 등)는 그대로 열거값으로 둔다.
+    """
+    content = re.sub(r'\s+', ' ', content or '').strip()
+    text = content if len(content) <= TEXT_MAX_LENGTH else ''
+    m = NUMBER_RE.search(content)
+    if not m:
+        return None, '', text
+    return float(m.group(1).replace(',', '')), m.group(2) or '', text
+
+
+def extract_attributes(facility_id: int, section: str, rows: Iterable[Tuple[str, str]]) -> List[FacilityAttribute]:
+    """(title, content) 목록 -> FacilityAttribute 목록 (같은 항목명은 첫 행만)"""
+    attrs = {}
+    for title, content in rows:
+        key = normalize_key(title)
+        if not key or key in attrs:
+            continue
+        number, unit, text = parse_value(content)
+        if number is None and not text:
+            continue
+        attrs[key] = FacilityAttribute(
+            facility_id=facility_id, section=section, key=key, number=number, unit=unit, text=text,
+        )
+    return list(attrs.values())
+
+
+def rebuild_attributes(facility_ids=None) -> int:
+    """저장된 섹션 행으로 속성 재생성 (facility_ids 가 None 이면 전체) -> 생성 수"""
+    attrs = []
+    for section, model in ATTRIBUTE_SECTIONS.items():
+        rows = model.objects.order_by('facility_id', 'id')
+        if facility_ids is not None:
+            rows = rows.filter(facility_id__in=list(facility_ids))
+        grouped = {}
+        for facility_id, title, content in rows.values_list('facility_id', 'title', 'content').iterator(chunk_size=2000):
+            grouped.setdefault(facility_id, []).append((title, content))
+        for facility_id, pairs in grouped.items():
+            attrs.extend(extract_attributes(facility_id, section, pairs))
+    with transaction.atomic():
+        stale = FacilityAttribute.objects.all()
+        if facility_ids is not None:
+            stale = stale.filter(facility_id__in=list(facility_ids))
+        stale.delete()
+        FacilityAttribute.objects.bulk_create(attrs, batch_size=2000)
+    return len(attrs)
+
+
+@dataclass(frozen=True)
+class AttributeFilter:
+    section: str
+    key: str
+    op: str
+    value: str
+
+    @classmethod
+    def parse(cls, expr: str) -> 'AttributeFilter':
+        """'staff:간호사>=10' -> AttributeFilter (형식이 잘못되면 ValueError)"""
+        m = FILTER_RE.match((expr or '').strip())
+        if not m:
+            raise ValueError(f"속성 조건 형식 오류: {expr!r} (예: staff:간호사>=10)")
+        section, key, op, value = m.group('section', 'key', 'op', 'value')
+        if section not in ATTRIBUTE_SECTIONS:
+            raise ValueError(f"알 수 없는 속성 섹션: {section} ({', '.join(ATTRIBUTE_SECTIONS)})")
+        number, _, _ = parse_value(value)
+        if op != '=' and number is None:
+            raise ValueError(f"비교 연산 {op} 에는 숫자 값이 필요합니다: {expr!r}")
+        return cls(section, normalize_key(key), op, value.strip())
+
+    def facility_ids(self):
+        """조건을 만족하는 facility_id 서브쿼리"""
+        attrs = FacilityAttribute.objects.filter(section=self.section, key=self.key)
+        number, _, _ = parse_value(self.value)
+        if self.op == '=' and (number is None or not NUMBER_RE.fullmatch(self.value)):
+            # 숫자만으로 된 값이 아니면 열거값(텍스트) 일치
+            attrs = attrs.filter(text=self.value)
+        else:
+            attrs = attrs.filter(**{f'number__{FILTER_LOOKUPS[self.op]}': number})
+        return attrs.values('facility_id')
+
+
+def parse_attribute_filters(exprs: Iterable[str]) -> List[AttributeFilter]:
+    return [AttributeFilter.parse(expr) for expr in exprs if expr and expr.strip()]
+
+
+def apply_attribute_filters(queryset, filters: Iterable[AttributeFilter]):
+    """모든 조건(AND)을 만족하는 시설만 남긴 queryset"""
+    for attr_filter in filters:
+        queryset = queryset.filter(id__in=attr_filter.facility_ids())
+    return queryset
+
+
+def filtered_facility_ids(filters: Iterable[AttributeFilter]) -> List[int]:
+    return list(apply_attribute_filters(Facility.objects.order_by(), filters).values_list('id', flat=True))
@@ -0,0 +1,109 @@
+"""챗봇 질의 캐시 (워커 프로세스 메모리)
+
+1단계 QueryCache: 정규화한 질문 텍스트(+조건) -> 질문 임베딩과 검색 결과 (정확히 같은 질문)
+2단계 SemanticAnswerCache: 질문 임베딩의 코사인 유사도가 임계값 이상인 이전 질문(같은 조건)의 답변
+둘 다 TTL 이 지나면 버리고, 재인덱싱(embed_facilities/reload) 시 RAGService 가 비운다.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """대소문자/공백/문장부호 차이를 무시한 캐시 키 ('서울  요양원 추천?' -> '서울 요양원 추천')"""
+    return ' '.join(re.findall(r'\w+', (query or '').lower()))
+
+
+class QueryCache:
+    """TTL 이 있는 LRU (max_entries 가 0 이면 저장하지 않음)"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if time.monotonic() - stored_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SemanticAnswerCache:
+    """질문 임베딩 근접 검색으로 답변 재사용
+
+    context(속성 조건, 질문에서 뽑은 지역/등급 등)가 같은 항목끼리만 비교하므로
+    '서울 요양원' 과 '부산 요양원' 처럼 임베딩은 가깝지만 조건이 다른 질문은 섞이지 않는다.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600, threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        # (저장 시각, context, 정규화된 임베딩, 응답)
+        self._entries: List[Tuple[float, Hashable, np.ndarray, Any]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding, context: Hashable) -> Optional[Tuple[Any, float]]:
+        """가장 비슷한 캐시 답변과 유사도 (임계값 미만/만료면 None)"""
+        if self.max_entries <= 0:
+            return None
+        vector = self._unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._entries = [entry for entry in self._entries if now - entry[0] <= self.ttl]
+            candidates = [entry for entry in self._entries if entry[1] == context]
+            if not candidates:
+                return None
+            similarities = np.stack([entry[2] for entry in candidates]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            return candidates[best][3], float(similarities[best])
+
+    def put(self, embedding, context: Hashable, response: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries.append((time.monotonic(), context, self._unit(embedding), response))
+            del self._entries[:-self.max_entries]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
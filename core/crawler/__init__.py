@@ -0,0 +1 @@
+"""crawl_nursinghomes 커맨드가 사용하는 크롤러 구성요소"""
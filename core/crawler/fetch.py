@@ -0,0 +1,135 @@
+import statistics
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+# 상세 파싱(parse_detail)에 필요한 정적 DOM 표식. 하나라도 없으면 JS 렌더링이 필요한 페이지로 본다.
+# 모든 상세 페이지에 있는 것만 요구한다 (비급여 블록 등 시설에 따라 없는 섹션은 제외).
+# 제목만 있는 뼈대/오류 페이지가 기존 데이터를 덮어쓰지 않도록 기본정보 섹션 본문까지 확인
+REQUIRED_DETAIL_SELECTORS = ('.section-view-title', '.section-view-content2')
+REQUIRED_DETAIL_HEADINGS = ('기본정보',)
+
+
+def has_detail_markup(soup) -> bool:
+    if not all(soup.select_one(sel) is not None for sel in REQUIRED_DETAIL_SELECTORS):
+        return False
+    headings = {h4.get_text(strip=True) for h4 in soup.select('h4')}
+    return all(heading in headings for heading in REQUIRED_DETAIL_HEADINGS)
+
+
+def response_text(resp) -> str:
+    """응답 본문 디코딩: Content-Type 에 charset 이 있으면 그대로, 없으면 UTF-8 -> 추정 인코딩 순
+
+    requests 는 charset 없는 text/* 응답을 ISO-8859-1 로 간주하므로 resp.text 를 그대로 쓰면
+    UTF-8 한글이 깨진다.
+    """
+    if 'charset' in resp.headers.get('Content-Type', '').lower():
+        return resp.text
+    try:
+        return resp.content.decode('utf-8')
+    except UnicodeDecodeError:
+        return resp.content.decode(resp.apparent_encoding or 'utf-8', errors='replace')
+
+
+class FetchStats:
+    """경로별(http/playwright) 상세 요청 횟수/지연 집계"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.fallbacks = 0
+
+    def record(self, path: str, seconds: float):
+        self.latencies[path].append(seconds)
+
+    def summary_lines(self) -> list:
+        lines = []
+        for path, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(
+                f"{path}: {len(values)}회, 평균 {statistics.mean(values)*1000:.0f}ms, "
+                f"p50 {statistics.median(values)*1000:.0f}ms, p95 {p95*1000:.0f}ms"
+            )
+        lines.append(f"playwright 폴백: {self.fallbacks}회")
+        return lines
+
+
+@dataclass
+class FetchResult:
+    """HTTP 상세 요청 결과 (not_modified 는 조건부 요청에 304 응답)"""
+    html: Optional[str] = None
+    not_modified: bool = False
+    etag: str = ''
+    last_modified: str = ''
+
+
+@dataclass
+class DetailPage:
+    """워커가 받은 상세 페이지 (not_modified 이면 soup 없음)"""
+    soup: object = None
+    not_modified: bool = False
+    etag: str = ''
+    last_modified: str = ''
+
+
+class HttpDetailFetcher:
+    """keep-alive 커넥션 풀 + 압축 전송을 쓰는 경량 상세 페이지 fetcher
+
+    requests.Session 은 스레드 간 공유해도 되는 커넥션 풀을 가지므로,
+    asyncio.to_thread 로 여러 워커가 동시에 호출한다.
+    """
+
+    def __init__(self, user_agent: str, pool_size: int = 10, timeout: float = 20.0):
+        import requests  # 지연 import
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Encoding": "gzip, deflate",
+            "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+            "Referer": "https://www.seniortalktalk.com/",
+            "Connection": "keep-alive",
+        })
+
+    def fetch(self, url: str, etag: str = '', last_modified: str = '') -> FetchResult:
+        """상세 HTML 요청, 검증자(etag/last_modified)가 있으면 조건부 요청
+
+        실패(비 200/304, 네트워크 오류) 시 html 이 None 인 결과를 반환한다.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            resp = self.session.get(url, timeout=self.timeout, headers=headers)
+        except Exception:
+            return FetchResult()
+        if resp.status_code == 304:
+            return FetchResult(not_modified=True, etag=etag, last_modified=last_modified)
+        if resp.status_code != 200:
+            return FetchResult()
+        return FetchResult(
+            html=response_text(resp),
+            etag=resp.headers.get("ETag", ''),
+            last_modified=resp.headers.get("Last-Modified", ''),
+        )
+
+    def close(self):
+        self.session.close()
+
+
+async def timed(stats: FetchStats, path: str, coro):
+    """코루틴 실행 시간을 path 로 기록하고 결과 반환"""
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        stats.record(path, time.perf_counter() - started)
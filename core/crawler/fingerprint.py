@@ -0,0 +1,90 @@
+import hashlib
+import re
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+from core.models import FacilityFingerprint
+
+# parse_detail 이 읽는 영역만 해시 (광고/조회수 등 무관한 DOM 변화는 무시)
+FINGERPRINT_SELECTORS = (
+    '.section-view-title',
+    '.section-view-content',
+    '.section-view-content2',
+    '.section-calc-content',
+)
+
+
+def detail_page_key(url: str) -> str:
+    """쿼리스트링(검색 조건/페이지)을 제외한 상세 URL 경로"""
+    return urlsplit(url).path
+
+
+def _homepage_href(soup) -> str:
+    """parse_detail 과 같은 규칙으로 <b>홈페이지</b> 이후 첫 링크 값"""
+    for b in soup.select('b'):
+        if b.get_text(strip=True) == '홈페이지':
+            a = b.find_next('a', href=True)
+            if not a:
+                return ''
+            return a.get('href', '').strip() or a.get_text(strip=True)
+    return ''
+
+
+def fingerprint_detail(soup) -> str:
+    """상세 페이지 정규화 HTML 지문: 관련 영역 텍스트의 공백 정규화 후 sha256"""
+    parts = []
+    for sel in FINGERPRINT_SELECTORS:
+        for el in soup.select(sel):
+            parts.append(re.sub(r'\s+', ' ', el.get_text(" ", strip=True)))
+    # 홈페이지 링크는 href 값이 저장되므로 영역 텍스트와 별도로 포함
+    parts.append(_homepage_href(soup))
+    return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """FacilityFingerprint 메모리 캐시 + DB 기록 (동기 API)"""
+
+    def __init__(self):
+        self._cache: Dict[str, FacilityFingerprint] = {}
+
+    def load(self):
+        self._cache = {fp.page_key: fp for fp in FacilityFingerprint.objects.all()}
+        return self
+
+    def get(self, page_key: str) -> Optional[FacilityFingerprint]:
+        return self._cache.get(page_key)
+
+    def record(self, page_key: str, code: str, content_hash: str,
+               etag: str = '', last_modified: str = '', richness: Optional[int] = None):
+        fp, _ = FacilityFingerprint.objects.update_or_create(
+            page_key=page_key,
+            defaults={
+                'code': code,
+                'content_hash': content_hash,
+                'etag': etag,
+                'last_modified': last_modified,
+                'richness': richness,
+            },
+        )
+        self._cache[page_key] = fp
+        return fp
+
+    def record_many(self, entries: Iterable[Tuple[str, str, str, str, str, Optional[int]]]):
+        """(page_key, code, content_hash, etag, last_modified, richness) 묶음을 upsert 1회로 기록"""
+        fps = [
+            FacilityFingerprint(
+                page_key=page_key, code=code or '', content_hash=content_hash,
+                etag=etag, last_modified=last_modified, richness=richness,
+            )
+            for page_key, code, content_hash, etag, last_modified, richness in entries
+        ]
+        if not fps:
+            return
+        FacilityFingerprint.objects.bulk_create(
+            fps,
+            update_conflicts=True,
+            unique_fields=['page_key'],
+            update_fields=['code', 'content_hash', 'etag', 'last_modified', 'richness', 'updated_at'],
+        )
+        for fp in fps:
+            self._cache[fp.page_key] = fp
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.utils import timezone
+
+from core.models import CrawlTask
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 30
+
+
+class CrawlFrontier:
+    """CrawlTask 테이블 기반 crawl frontier (동기 API, 커맨드에서 sync_to_async 로 호출)"""
+
+    def reset(self):
+        CrawlTask.objects.all().delete()
+
+    # 목록 페이지
+    def list_page_link_count(self, url: str) -> Optional[int]:
+        """완료된 목록 페이지면 당시 상세 링크 수, 아니면 None"""
+        task = CrawlTask.objects.filter(kind='list', url=url, status='done').only('link_count').first()
+        return task.link_count if task else None
+
+    def mark_list_page(self, url: str, region: str, page_no: int, link_count: int):
+        CrawlTask.objects.update_or_create(
+            url=url,
+            defaults={'kind': 'list', 'region': region, 'page_no': page_no,
+                      'status': 'done', 'link_count': link_count},
+        )
+
+    # 상세 페이지
+    def add_details(self, region: str, urls: List[str]):
+        CrawlTask.objects.bulk_create(
+            [CrawlTask(kind='detail', url=url, region=region) for url in urls],
+            ignore_conflicts=True,
+        )
+
+    def mark_detail_done(self, url: str, code: Optional[str] = None, richness: Optional[int] = None):
+        CrawlTask.objects.filter(url=url).update(
+            status='done', facility_code=code or '', richness=richness,
+            last_error='', updated_at=timezone.now(),
+        )
+
+    def mark_details_done(self, entries: List[Tuple[str, Optional[str], Optional[int]]]):
+        """(url, code, richness) 묶음을 쿼리 2회(조회 + bulk_update)로 완료 처리"""
+        by_url = {url: (code, richness) for url, code, richness in entries}
+        tasks = list(CrawlTask.objects.filter(url__in=by_url))
+        now = timezone.now()
+        for task in tasks:
+            code, richness = by_url[task.url]
+            task.status = 'done'
+            task.facility_code = code or ''
+            task.richness = richness
+            task.last_error = ''
+            task.updated_at = now
+        CrawlTask.objects.bulk_update(tasks, ['status', 'facility_code', 'richness', 'last_error', 'updated_at'])
+
+    def mark_detail_failed(self, url: str, error: str = ''):
+        """실패 기록 + 지수 백오프로 다음 시도 시각 설정"""
+        task = CrawlTask.objects.filter(url=url).first()
+        if task is None:
+            return
+        attempts = task.attempts + 1
+        CrawlTask.objects.filter(pk=task.pk).update(
+            status='failed',
+            attempts=attempts,
+            last_error=error[:2000],
+            next_attempt_at=timezone.now() + timedelta(seconds=BACKOFF_BASE_SECONDS * 2 ** (attempts - 1)),
+            updated_at=timezone.now(),
+        )
+
+    def pending_details(self) -> List[Tuple[str, str]]:
+        return list(
+            CrawlTask.objects.filter(kind='detail', status='pending').order_by('id').values_list('region', 'url')
+        )
+
+    def retryable_details(self) -> List[Tuple[str, str, object]]:
+        """재시도 대상 실패 상세: (region, url, next_attempt_at)"""
+        return list(
+            CrawlTask.objects.filter(kind='detail', status='failed', attempts__lt=MAX_ATTEMPTS)
+            .order_by('next_attempt_at').values_list('region', 'url', 'next_attempt_at')
+        )
+
+    # 재개 시 메모리 상태 복원
+    def seen_detail_urls(self) -> Set[str]:
+        return set(CrawlTask.objects.filter(kind='detail').values_list('url', flat=True))
+
+    def best_scores(self) -> Dict[str, int]:
+        scores = {}
+        rows = CrawlTask.objects.filter(kind='detail', status='done', richness__isnull=False).exclude(facility_code='')
+        for code, richness in rows.values_list('facility_code', 'richness'):
+            if richness > scores.get(code, -1):
+                scores[code] = richness
+        return scores
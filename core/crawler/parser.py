@@ -0,0 +1,492 @@
+"""시설 상세 페이지 파서
+
+parse_detail 은 DOM 을 한 번 순회해 섹션 색인(DetailIndex)을 만든 뒤 각 섹션의 dt/dd 를 추출한다.
+parse_detail_legacy 는 섹션마다 문서를 다시 훑던 기존 구현으로, 벤치마크(bench_parse_detail)와
+동등성 검증용으로 남겨둔다.
+"""
+import re
+
+from bs4 import BeautifulSoup
+
+
+# 헬퍼: 숫자 파싱 (콤마 제거, '명' 제거)
+def parse_int(text_val: str):
+    if not text_val:
+        return None
+    cleaned = re.sub(r'[^0-9]', '', text_val)
+    if not cleaned:
+        return None
+    try:
+        return int(cleaned)
+    except Exception:
+        return None
+
+# 헬퍼: 이용가능 상태 정규화
+def normalize_availability(val: str) -> str:
+    v = (val or '').strip()
+    if '가능' in v and ('불' not in v and '불가' not in v):
+        return '가능'
+    if '불가' in v or '불가능' in v or '마감' in v:
+        return '불가능'
+    return v
+
+
+
+# 상세 페이지에서 dt/dd 섹션으로 읽는 h4 제목
+SECTION_HEADINGS = ('기본정보', '평가정보', '인력현황', '프로그램운영', '위치')
+
+
+class DetailIndex:
+    """상세 페이지 DOM 을 한 번만 순회해 파싱에 필요한 요소 위치를 색인
+
+    - title_container: 첫 .section-view-title
+    - content2[제목] / content[제목]: 해당 h4 이후 처음 나오는 div.section-view-content2 / div.section-view-content
+    - homepage_link: 첫 <b>홈페이지</b> 이후 처음 나오는 a[href]
+    - noncov_label: 첫 div.section-calc-label[data-focus="non_benefit"]
+    - first_tags: 이름 fallback 용 첫 h1/h2/title
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        self.title_container = None
+        self.content2 = {}
+        self.content = {}
+        self.homepage_link = None
+        self.noncov_label = None
+        self.first_tags = {}
+
+        headings_seen = set()
+        waiting_content2 = []
+        waiting_content = []
+        homepage_pending = False
+        homepage_done = False
+        for el in soup.find_all(True):
+            name = el.name
+            classes = el.get('class') or ()
+            if self.title_container is None and 'section-view-title' in classes:
+                self.title_container = el
+            if name == 'h4':
+                text = el.get_text(strip=True)
+                if text in SECTION_HEADINGS and text not in headings_seen:
+                    headings_seen.add(text)
+                    waiting_content2.append(text)
+                    waiting_content.append(text)
+            elif name == 'div':
+                if waiting_content2 and 'section-view-content2' in classes:
+                    for text in waiting_content2:
+                        self.content2[text] = el
+                    waiting_content2.clear()
+                if waiting_content and 'section-view-content' in classes:
+                    for text in waiting_content:
+                        self.content[text] = el
+                    waiting_content.clear()
+                if (self.noncov_label is None and 'section-calc-label' in classes
+                        and el.get('data-focus') == 'non_benefit'):
+                    self.noncov_label = el
+            elif name == 'b':
+                if not homepage_done and not homepage_pending and el.get_text(strip=True) == '홈페이지':
+                    homepage_pending = True
+            elif name == 'a':
+                if homepage_pending and el.get('href') is not None:
+                    self.homepage_link = el
+                    homepage_pending = False
+                    homepage_done = True
+            elif name in ('h1', 'h2', 'title') and name not in self.first_tags:
+                self.first_tags[name] = el
+
+
+def _dl_pairs(section):
+    """섹션 div 내 첫 dl 의 (dt, dd) 쌍"""
+    if section is None:
+        return []
+    dl = section.find('dl')
+    if not dl:
+        return []
+    return zip(dl.find_all('dt'), dl.find_all('dd'))
+
+
+def _split_noncovered(text: str) -> dict:
+    # 항목명과 금액을 분리
+    if ':' in text:
+        title_part, content_part = text.split(':', 1)
+        return {'title': title_part.strip(), 'content': content_part.strip()}
+    # ':' 가 없는 경우 공백으로 분리 시도
+    parts = text.rsplit(' ', 1)
+    if len(parts) == 2 and '원' in parts[1]:
+        return {'title': parts[0].strip(), 'content': parts[1].strip()}
+    # 분리할 수 없는 경우 전체를 title로
+    return {'title': text, 'content': ''}
+
+
+def parse_detail(soup: BeautifulSoup, url: str) -> dict:
+    """상세 페이지 파싱 (DOM 1회 순회 색인 기반, parse_detail_legacy 와 동일한 결과)"""
+    index = DetailIndex(soup)
+    raw_text_all = soup.get_text(" ", strip=True)
+    data = {"raw_text": raw_text_all}
+
+    # 코드 추출 (view 경로에서 숫자)
+    m_code = re.search(r"/view/[^/]+/(\d+)", url)
+    if not m_code:
+        m_code = re.search(r"/(\d{6,})", url)
+    code = m_code.group(1) if m_code else url
+    overview = {"code": code}
+    container = index.title_container
+    if container:
+        kind = container.get('data-kind') or ''
+        if kind:
+            overview['kind'] = kind.strip()
+        grade_el = container.select_one('.section-view-grade')
+        if grade_el:
+            overview['grade'] = grade_el.get_text(strip=True)
+        name_el = container.select_one('h3 em') or container.select_one('h3')
+        if name_el:
+            name_text = name_el.get_text(strip=True)
+            if name_text and name_text != '시니어톡톡':
+                overview['name'] = name_text
+        addr_el = container.select_one('.section-view-address')
+        if addr_el:
+            overview['address'] = addr_el.get_text(strip=True)
+        dl = container.select_one('dl')
+        if dl:
+            for dt, dd in zip(dl.find_all('dt'), dl.find_all('dd')):
+                label = dt.get_text(strip=True)
+                value = dd.get_text(strip=True)
+                if not label:
+                    continue
+                if label == '정원':
+                    overview['capacity'] = parse_int(value)
+                elif label == '현원':
+                    overview['occupancy'] = parse_int(value)
+                elif label == '대기':
+                    overview['waiting'] = parse_int(value)
+                elif label in ('이용가능', '이용 가능'):
+                    overview['availability'] = normalize_availability(value)
+    # fallback: 이름이 비어있으면 title/h1/h2 검색
+    if 'name' not in overview:
+        for sel in ['h1', 'h2', 'title']:
+            el = index.first_tags.get(sel)
+            if el:
+                txt = el.get_text(strip=True)
+                if txt and txt != '시니니어톡톡':
+                    overview['name'] = txt
+                    break
+    data['overview'] = overview
+    data['evaluation'] = {}
+    data['staff'] = {}
+    data['programs'] = {}
+    data['location'] = {}
+    data['non_covered'] = []
+    data['overview']['raw_text'] = raw_text_all
+
+    # 기본정보: dd 내부 a 태그가 있으면 href 우선
+    basic_items = []
+    for dt, dd in _dl_pairs(index.content2.get('기본정보')):
+        title_txt = dt.get_text(strip=True)
+        link = dd.find('a')
+        if link and link.get('href'):
+            content_txt = link.get('href').strip()
+        else:
+            content_txt = dd.get_text(strip=True)
+        if title_txt:
+            basic_items.append({'title': title_txt, 'content': content_txt})
+    data['basic_items'] = basic_items
+
+    # 평가정보 / 인력현황 / 프로그램운영: 제목-내용 원문 보존
+    for heading, key in (('평가정보', 'evaluation_items'), ('인력현황', 'staff_items'), ('프로그램운영', 'program_items')):
+        items = []
+        for dt, dd in _dl_pairs(index.content2.get(heading)):
+            title_txt = dt.get_text(strip=True)
+            if title_txt:
+                items.append({'title': title_txt, 'content': dd.get_text(strip=True)})
+        data[key] = items
+
+    # 위치: 주소 p 묶음 + 교통/주차 dl 개별 항목
+    location_items = []
+    addr_block = index.content.get('위치')
+    if addr_block:
+        addr_texts = [t for t in (p.get_text(strip=True) for p in addr_block.find_all('p')) if t]
+        if addr_texts:
+            location_items.append({'title': '주소', 'content': ' | '.join(addr_texts)})
+    for dt, dd in _dl_pairs(index.content2.get('위치')):
+        label = dt.get_text(strip=True)
+        val = dd.get_text(strip=True)
+        if label and val:
+            location_items.append({'title': label, 'content': val})
+    data['location_items'] = location_items
+
+    # 홈페이지: href 우선, 없으면 텍스트
+    homepage_item = None
+    a = index.homepage_link
+    if a is not None:
+        href = a.get('href', '').strip()
+        if href:
+            homepage_item = {'title': '홈페이지', 'content': href}
+        else:
+            txt = a.get_text(strip=True)
+            if txt:
+                homepage_item = {'title': '홈페이지', 'content': txt}
+    data['homepage_item'] = homepage_item
+
+    # 비급여 항목: 월 합계는 제외하고 개별 항목만
+    noncov_items = []
+    label_div = index.noncov_label
+    if label_div and '비급여 항목' in label_div.get_text():
+        container_div = label_div.find_parent('div', class_='section-calc-content') or label_div.parent
+        if container_div:
+            for li in container_div.select('div.section-calc-item ul li'):
+                label = li.find('label')
+                if not label:
+                    continue
+                text = re.sub(r'\s+', ' ', label.get_text(" ", strip=True))
+                if text:
+                    noncov_items.append(_split_noncovered(text))
+    data['non_covered_items'] = noncov_items
+    return data
+
+
+def parse_detail_legacy(soup: BeautifulSoup, url: str) -> dict:
+    """섹션마다 h4 를 다시 훑는 기존 파서 (벤치마크/동등성 비교용)"""
+    # 기존 전역 텍스트 기반 로직 이전에 시설 영역을 우선 파싱
+    container = soup.select_one('.section-view-title')
+    raw_text_all = soup.get_text(" ", strip=True)
+    data = {"raw_text": raw_text_all}
+    # 코드 추출 (view 경로에서 숫자)
+    m_code = re.search(r"/view/[^/]+/(\d+)", url)
+    if not m_code:
+        m_code = re.search(r"/(\d{6,})", url)
+    code = m_code.group(1) if m_code else url
+    overview = {"code": code}
+    if container:
+        # kind (data-kind)
+        kind = container.get('data-kind') or ''
+        if kind:
+            overview['kind'] = kind.strip()
+        # grade
+        grade_el = container.select_one('.section-view-grade')
+        if grade_el:
+            overview['grade'] = grade_el.get_text(strip=True)
+        # name
+        name_el = container.select_one('h3 em') or container.select_one('h3')
+        if name_el:
+            name_text = name_el.get_text(strip=True)
+            # 사이트명(시니어톡톡) 오탐 방지: 시설명에 공백/한글 다수 포함 기대
+            if name_text and name_text != '시니어톡톡':
+                overview['name'] = name_text
+        # address (추후 위치 모델에 활용 가능)
+        addr_el = container.select_one('.section-view-address')
+        if addr_el:
+            overview['address'] = addr_el.get_text(strip=True)
+        # dl dt/dd 쌍 처리
+        dl = container.select_one('dl')
+        if dl:
+            dts = dl.find_all('dt')
+            dds = dl.find_all('dd')
+            for dt, dd in zip(dts, dds):
+                label = dt.get_text(strip=True)
+                value = dd.get_text(strip=True)
+                if not label:
+                    continue
+                if label == '정원':
+                    overview['capacity'] = parse_int(value)
+                elif label == '현원':
+                    overview['occupancy'] = parse_int(value)
+                elif label == '대기':
+                    overview['waiting'] = parse_int(value)
+                elif label in ('이용가능', '이용 가능'):
+                    overview['availability'] = normalize_availability(value)
+    # fallback: 이름이 비어있으면 title/h1/h2 검색 (기존 방식 유지)
+    if 'name' not in overview:
+        for sel in ['h1', 'h2', 'title']:
+            el = soup.find(sel)
+            if el:
+                txt = el.get_text(strip=True)
+                if txt and txt != '시니니어톡톡':
+                    overview['name'] = txt
+                    break
+    data['overview'] = overview
+    # 이하 기존 평가/인력 등 나머지 파싱은 일단 비활성(추후 섹션별 구현 예정)
+    data['evaluation'] = {}
+    data['staff'] = {}
+    data['programs'] = {}
+    data['location'] = {}
+    data['non_covered'] = []
+    data['overview']['raw_text'] = raw_text_all
+
+    # 기본정보 섹션 파싱 (h4 '기본정보' 이후 .section-view-content2 내 첫번째 dl)
+    basic_items = []
+    basic_header = None
+    for h4 in soup.select('h4'):
+        if h4.get_text(strip=True) == '기본정보':
+            basic_header = h4
+            break
+    if basic_header:
+        # 형제/다음 요소에서 dl 찾기
+        section = basic_header.find_next('div', class_='section-view-content2')
+        if section:
+            dl = section.find('dl')
+            if dl:
+                dts = dl.find_all('dt')
+                dds = dl.find_all('dd')
+                for dt, dd in zip(dts, dds):
+                    title_txt = dt.get_text(strip=True)
+                    # dd 내부 a 태그가 있으면 href 우선, 없으면 텍스트
+                    link = dd.find('a')
+                    if link and link.get('href'):
+                        content_txt = link.get('href').strip()
+                    else:
+                        content_txt = dd.get_text(strip=True)
+                    if title_txt:
+                        basic_items.append({'title': title_txt, 'content': content_txt})
+    data['basic_items'] = basic_items
+    # 평가정보 섹션 파싱 (h4 '평가정보')
+    evaluation_items = []
+    eval_header = None
+    for h4 in soup.select('h4'):
+        if h4.get_text(strip=True) == '평가정보':
+            eval_header = h4
+            break
+    if eval_header:
+        eval_section = eval_header.find_next('div', class_='section-view-content2')
+        if eval_section:
+            dl2 = eval_section.find('dl')
+            if dl2:
+                dts2 = dl2.find_all('dt')
+                dds2 = dl2.find_all('dd')
+                for dt, dd in zip(dts2, dds2):
+                    t = dt.get_text(strip=True)
+                    c = dd.get_text(strip=True)
+                    if t:
+                        evaluation_items.append({'title': t, 'content': c})
+    data['evaluation_items'] = evaluation_items
+    # 인력현황 섹션 파싱 (h4 '인력현황')
+    staff_items = []
+    staff_header = None
+    for h4 in soup.select('h4'):
+        if h4.get_text(strip=True) == '인력현황':
+            staff_header = h4
+            break
+    if staff_header:
+        staff_section = staff_header.find_next('div', class_='section-view-content2')
+        if staff_section:
+            dl3 = staff_section.find('dl')
+            if dl3:
+                dts3 = dl3.find_all('dt')
+                dds3 = dl3.find_all('dd')
+                for dt, dd in zip(dts3, dds3):
+                    tt = dt.get_text(strip=True)
+                    cc = dd.get_text(strip=True)
+                    if tt:
+                        staff_items.append({'title': tt, 'content': cc})
+    data['staff_items'] = staff_items
+    # 프로그램운영 섹션 파싱 (h4 '프로그램운영')
+    program_items = []
+    prog_header = None
+    for h4 in soup.select('h4'):
+        if h4.get_text(strip=True) == '프로그램운영':
+            prog_header = h4
+            break
+    if prog_header:
+        prog_section = prog_header.find_next('div', class_='section-view-content2')
+        if prog_section:
+            dlp = prog_section.find('dl')
+            if dlp:
+                dts_p = dlp.find_all('dt')
+                dds_p = dlp.find_all('dd')
+                for dt, dd in zip(dts_p, dds_p):
+                    pt = dt.get_text(strip=True)
+                    pc_raw = dd.get_text(strip=True)
+                    # 콤마 기준 분리 유지 대신 원문 보존
+                    if pt:
+                        program_items.append({'title': pt, 'content': pc_raw})
+    data['program_items'] = program_items
+    # 위치 섹션 파싱 (h4 '위치') - 개별 항목으로 분리
+    location_items = []
+    loc_header = None
+    for h4 in soup.select('h4'):
+        if h4.get_text(strip=True) == '위치':
+            loc_header = h4
+            break
+    if loc_header:
+        # 주소 p
+        addr_block = loc_header.find_next('div', class_='section-view-content')
+        if addr_block:
+            addr_texts = []
+            for p in addr_block.find_all('p'):
+                t = p.get_text(strip=True)
+                if t:
+                    addr_texts.append(t)
+            if addr_texts:
+                location_items.append({
+                    'title': '주소',
+                    'content': ' | '.join(addr_texts)
+                })
+
+        # 교통/주차 dl - 각각 개별 항목으로 저장
+        loc_section2 = loc_header.find_next('div', class_='section-view-content2')
+        if loc_section2:
+            dl_loc = loc_section2.find('dl')
+            if dl_loc:
+                dts_l = dl_loc.find_all('dt')
+                dds_l = dl_loc.find_all('dd')
+                for dt, dd in zip(dts_l, dds_l):
+                    label = dt.get_text(strip=True)
+                    val = dd.get_text(strip=True)
+                    if label and val:
+                        location_items.append({
+                            'title': label,
+                            'content': val
+                        })
+    data['location_items'] = location_items
+    # 홈페이지 섹션 파싱 (<b>홈페이지</b> 이후 첫 a href)
+    homepage_item = None
+    for b in soup.select('b'):
+        if b.get_text(strip=True) == '홈페이지':
+            a = b.find_next('a', href=True)
+            if a:
+                # href 우선, 없으면 텍스트 (href 존재 명시)
+                href = a.get('href', '').strip()
+                if href:
+                    homepage_item = {'title': '홈페이지', 'content': href}
+                else:
+                    txt = a.get_text(strip=True)
+                    if txt:
+                        homepage_item = {'title': '홈페이지', 'content': txt}
+            break
+    data['homepage_item'] = homepage_item
+    # 비급여 항목 섹션 파싱 (div.section-calc-label[data-focus="non_benefit"]) - 개별 항목으로 분리
+    noncov_items = []
+    label_div = soup.select_one('div.section-calc-label[data-focus="non_benefit"]')
+    if label_div and '비급여 항목' in label_div.get_text():
+        container_div = label_div.find_parent('div', class_='section-calc-content') or label_div.parent
+        # 월 합계는 제외하고 개별 항목만 저장
+        if container_div:
+            for li in container_div.select('div.section-calc-item ul li'):
+                label = li.find('label')
+                if not label:
+                    continue
+                text = label.get_text(" ", strip=True)
+                # 불필요한 다중 공백 정리
+                text = re.sub(r'\s+', ' ', text)
+                if text:
+                    # 항목명과 금액을 분리
+                    if ':' in text:
+                        title_part, content_part = text.split(':', 1)
+                        noncov_items.append({
+                            'title': title_part.strip(),
+                            'content': content_part.strip()
+                        })
+                    else:
+                        # ':' 가 없는 경우 공백으로 분리 시도
+                        parts = text.rsplit(' ', 1)
+                        if len(parts) == 2 and '원' in parts[1]:
+                            noncov_items.append({
+                                'title': parts[0].strip(),
+                                'content': parts[1].strip()
+                            })
+                        else:
+                            # 분리할 수 없는 경우 전체를 title로
+                            noncov_items.append({
+                                'title': text,
+                                'content': ''
+                            })
+    data['non_covered_items'] = noncov_items
+    return data
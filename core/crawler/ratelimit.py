@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """asyncio 용 토큰 버킷 레이트 리미터
+
+    rate: 초당 보충되는 토큰 수 (= 허용 요청 수), burst: 버킷 최대 크기.
+    여러 워커가 하나의 버킷을 공유하면 동시성과 무관하게 전체 요청 속도가 rate 이하로 유지된다.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # 락을 쥔 채 대기해 토큰을 선착순(FIFO)으로 배분
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
@@ -0,0 +1,23 @@
+import re
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+DETAIL_BASE_URL = "https://www.seniortalktalk.com/search/view"
+SNAPSHOT_NAME_RE = re.compile(r"^(?P<kind>[A-Za-z0-9]+)_(?P<code>\d+)\.html$")
+
+
+def snapshot_name(url: str) -> Optional[str]:
+    """상세 URL -> 스냅샷 파일명 ({유형}_{code}.html), 상세 URL 이 아니면 None"""
+    m = re.search(r"/view/([A-Za-z0-9]+)/(\d+)", urlsplit(url).path)
+    if not m:
+        return None
+    return f"{m.group(1)}_{m.group(2)}.html"
+
+
+def snapshot_url(path) -> Optional[str]:
+    """스냅샷 파일명 -> parse_detail 에 넘길 상세 URL, 규칙에 맞지 않으면 None"""
+    m = SNAPSHOT_NAME_RE.match(Path(path).name)
+    if not m:
+        return None
+    return f"{DETAIL_BASE_URL}/{m.group('kind')}/{m.group('code')}"
@@ -0,0 +1,202 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.attributes import ATTRIBUTE_ITEM_KEYS, rebuild_attributes
+from core.fulltext import sync_fulltext
+from core.models import (
+    Facility, FacilityBasic, FacilityEvaluation, FacilityStaff, FacilityProgram,
+    FacilityLocation, FacilityHomepage, FacilityNonCovered,
+)
+
+FACILITY_FIELDS = ('name', 'kind', 'grade', 'availability', 'capacity', 'occupancy', 'waiting')
+# 값이 없으면(None) 기존 값을 유지하는 필드
+KEEP_IF_MISSING = ('capacity', 'occupancy', 'waiting')
+
+# (모델, 파싱 결과 키, 비어 있어도 동기화 여부, 행 그대로 저장 여부)
+# 기본/평가/인력/프로그램은 새 항목이 있을 때만 동기화하고 제목 없는 행 제외 + 제목 100자 절단,
+# 위치/비급여는 항상 동기화하고 파싱 행을 그대로 저장 (기존 save_to_db 규칙)
+SECTION_TABLES = (
+    (FacilityBasic, 'basic_items', False, False),
+    (FacilityEvaluation, 'evaluation_items', False, False),
+    (FacilityStaff, 'staff_items', False, False),
+    (FacilityProgram, 'program_items', False, False),
+    (FacilityLocation, 'location_items', True, True),
+    (FacilityNonCovered, 'non_covered_items', True, True),
+)
+
+
+def facility_fields(data: dict) -> dict:
+    ov = data.get('overview') or {}
+    code = ov.get('code')
+    return {
+        'name': ov.get('name') or code,
+        'kind': ov.get('kind') or '',
+        'grade': ov.get('grade') or '',
+        'availability': ov.get('availability') or '',
+        'capacity': ov.get('capacity'),
+        'occupancy': ov.get('occupancy'),
+        'waiting': ov.get('waiting'),
+    }
+
+
+def section_rows(items, raw: bool = False) -> List[Tuple[str, str]]:
+    """파싱 항목 -> 저장될 (title, content) 목록
+
+    raw=False 면 제목 없는 항목을 빼고 제목을 100자로 자른다.
+    """
+    if raw:
+        return [(item['title'], item['content']) for item in items or []]
+    return [(item['title'][:100], item['content']) for item in items or [] if item.get('title')]
+
+
+def keyed_rows(rows):
+    """(title, content) 목록 -> {(title, 같은 제목 내 순번): content}
+
+    같은 제목이 여러 번 나오는 섹션(비급여 등)도 순서대로 짝지어 비교한다.
+    """
+    seen = Counter()
+    keyed = {}
+    for title, content in rows:
+        keyed[(title, seen[title])] = content
+        seen[title] += 1
+    return keyed
+
+
+@dataclass
+class FacilityChange:
+    """시설 1개의 저장 결과"""
+    facility_id: int
+    created: bool = False
+    fields_changed: bool = False
+    sections: set = field(default_factory=set)  # 내용이 바뀐 섹션 키 (basic_items, ..., homepage_item)
+
+    @property
+    def changed(self) -> bool:
+        return self.created or self.fields_changed or bool(self.sections)
+
+
+class FacilityBatchWriter:
+    """파싱 결과를 모아 배치 단위로 집합 기반 저장
+
+    배치당 Facility upsert 1회(새 시설/값이 바뀐 시설만) + 하위 테이블별 조회 1회 후
+    달라진 행만 insert/update/delete 한다. 같은 내용이면 행 id 와 updated_at 이 유지된다.
+    """
+
+    def __init__(self, batch_size: int = 100):
+        self.batch_size = max(1, batch_size)
+        self.buffer: Dict[str, dict] = {}
+
+    def add(self, data: dict) -> bool:
+        """버퍼에 추가 (같은 code 는 나중 것으로 교체), 배치가 찼으면 True"""
+        code = (data.get('overview') or {}).get('code')
+        if code:
+            self.buffer[code] = data
+        return len(self.buffer) >= self.batch_size
+
+    def take(self) -> Dict[str, dict]:
+        """버퍼를 비우고 내용을 반환 (이벤트 루프에서 호출 후 write 는 스레드에서)"""
+        items, self.buffer = self.buffer, {}
+        return items
+
+    def flush(self) -> Dict[str, FacilityChange]:
+        return self.write(self.take())
+
+    def write(self, items: Dict[str, dict]) -> Dict[str, FacilityChange]:
+        """code -> 파싱 결과 묶음을 저장하고 code -> FacilityChange 반환"""
+        if not items:
+            return {}
+        codes = list(items)
+        with transaction.atomic():
+            changes = self._sync_facilities(items)
+            for model, key, sync_when_empty, raw in SECTION_TABLES:
+                targets = {
+                    changes[code].facility_id: (code, section_rows(items[code].get(key), raw=raw))
+                    for code in codes if sync_when_empty or items[code].get(key)
+                }
+                for facility_id in self._sync_rows(model, targets):
+                    changes[targets[facility_id][0]].sections.add(key)
+            homepages = {
+                changes[code].facility_id: (code, [(items[code]['homepage_item']['title'], items[code]['homepage_item']['content'])])
+                for code in codes if items[code].get('homepage_item')
+            }
+            for facility_id in self._sync_rows(FacilityHomepage, homepages):
+                changes[homepages[facility_id][0]].sections.add('homepage_item')
+            # 정형 속성은 관련 섹션이 바뀐 시설만 재생성
+            stale = [change.facility_id for change in changes.values() if change.sections & ATTRIBUTE_ITEM_KEYS]
+            if stale:
+                rebuild_attributes(stale)
+            # 전문 검색 색인은 내용이 바뀐 시설만 갱신
+            sync_fulltext([change.facility_id for change in changes.values() if change.changed])
+        return changes
+
+    def _sync_facilities(self, items: Dict[str, dict]) -> Dict[str, FacilityChange]:
+        existing = {f.code: f for f in Facility.objects.filter(code__in=list(items)).order_by()}
+        changes = {}
+        upserts = []
+        for code, data in items.items():
+            fields = facility_fields(data)
+            current = existing.get(code)
+            if current is None:
+                upserts.append(Facility(code=code, **fields))
+                continue
+            for name in KEEP_IF_MISSING:
+                if fields[name] is None:
+                    fields[name] = getattr(current, name)
+            changed = any(getattr(current, name) != value for name, value in fields.items())
+            changes[code] = FacilityChange(facility_id=current.id, fields_changed=changed)
+            if changed:
+                upserts.append(Facility(code=code, **fields))
+        if upserts:
+            Facility.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=['code'],
+                update_fields=[*FACILITY_FIELDS, 'updated_at'],
+            )
+            missing_ids = [f.code for f in upserts if f.pk is None]
+            ids = dict(Facility.objects.filter(code__in=missing_ids).order_by().values_list('code', 'id')) if missing_ids else {}
+            for facility in upserts:
+                if facility.code not in existing:
+                    changes[facility.code] = FacilityChange(facility_id=facility.pk or ids[facility.code], created=True)
+        return changes
+
+    def _sync_rows(self, model, targets: Dict[int, Tuple[str, List[Tuple[str, str]]]]) -> set:
+        """facility_id -> (code, 새 (title, content) 목록) 기준으로 model 행을 동기화, 바뀐 facility_id 반환"""
+        if not targets:
+            return set()
+        stored = {}
+        for row in model.objects.filter(facility_id__in=list(targets)).order_by('id'):
+            stored.setdefault(row.facility_id, []).append(row)
+
+        now = timezone.now()
+        to_create, to_update, to_delete = [], [], []
+        changed = set()
+        for facility_id, (_, rows) in targets.items():
+            incoming = keyed_rows(rows)
+            current = keyed_rows((row.title, row) for row in stored.get(facility_id, []))
+            before = len(to_create) + len(to_update) + len(to_delete)
+            for key, row in current.items():
+                if key not in incoming:
+                    to_delete.append(row.id)
+                elif row.content != incoming[key]:
+                    row.content = incoming[key]
+                    row.updated_at = now
+                    to_update.append(row)
+            to_create.extend(
+                model(facility_id=facility_id, title=key[0], content=content)
+                for key, content in incoming.items() if key not in current
+            )
+            if len(to_create) + len(to_update) + len(to_delete) > before:
+                changed.add(facility_id)
+
+        if to_delete:
+            model.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            model.objects.bulk_update(to_update, ['content', 'updated_at'])
+        if to_create:
+            model.objects.bulk_create(to_create)
+        return changed
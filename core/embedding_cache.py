@@ -0,0 +1,154 @@
+"""임베딩 디스크 캐시 (SQLite, (모델명, sha256(텍스트)) 키, LRU 크기 제한)
+
+재인덱싱/재시작 때 바뀌지 않은 문서와 반복되는 질문을 다시 인코딩하지 않도록 벡터를 저장한다.
+키에 모델명이 들어가므로 EMBEDDING_MODEL 을 바꾸면 이전 모델의 벡터는 자동으로 쓰이지 않고
+(LRU 로 밀려나 삭제됨) 새 모델로 다시 계산된다.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+);
+CREATE INDEX IF NOT EXISTS embedding_cache_last_used_idx ON embedding_cache (last_used);
+"""
+# SQLite 변수 개수 제한 대비 IN 조회 묶음 크기
+LOOKUP_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """(model, sha256(text)) -> float32 벡터. max_entries 를 넘으면 가장 오래 안 쓴 항목부터 삭제"""
+
+    def __init__(self, path, model_name: str, max_entries: int = 200_000):
+        self.path = Path(path)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 여러 워커 프로세스가 같은 파일을 쓰므로 WAL + busy timeout
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # 행 수 추정치: put_many 마다 COUNT(*) 를 하지 않도록 메모리에서 추적.
+        # INSERT OR REPLACE 로 기존 키를 덮어쓴 경우도 더해 실제보다 크거나 같게 유지하고,
+        # 한도를 넘었을 때만 실제 COUNT 로 보정 (다른 프로세스가 쓴 행도 이때 반영)
+        self._approx_count = self._count()
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """캐시에 있는 해시만 {hash: 벡터} 로 반환하고 사용 시각을 갱신"""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(unique), LOOKUP_CHUNK):
+                chunk = unique[i:i + LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embedding_cache "
+                    f"WHERE model = ? AND text_hash IN ({', '.join('?' * len(chunk))})",
+                    [self.model_name, *chunk],
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE embedding_cache SET last_used = ? WHERE model = ? AND text_hash = ?",
+                        [(now, self.model_name, key) for key in found],
+                    )
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (self.model_name, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in items.items()
+                ],
+            )
+            self._approx_count += len(items)
+            if self._approx_count > self.max_entries:
+                self._evict()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+
+    def _evict(self) -> None:
+        count = self._count()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embedding_cache WHERE rowid IN "
+                "(SELECT rowid FROM embedding_cache ORDER BY last_used LIMIT ?)",
+                [overflow],
+            )
+            count -= overflow
+        self._approx_count = count
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM embedding_cache")
+            self._approx_count = 0
+
+
+class CachedEncoder:
+    """임베딩 모델 래퍼: encode() 가 캐시에 없는 텍스트만 모델로 인코딩 (입력 순서대로 벡터 반환)"""
+
+    def __init__(self, model, cache: EmbeddingCache):
+        self.model = model
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(hashes)
+        missing = {}
+        for text, key in zip(texts, hashes):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - sum(1 for key in hashes if key in missing)
+        self.misses += len(missing)
+        if missing:
+            encoded = np.asarray(self.model.encode(list(missing.values()), **kwargs), dtype=np.float32)
+            new_vectors = dict(zip(missing, encoded))
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in hashes])
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def cache_stats(encoder) -> Optional[Dict[str, float]]:
+    """CachedEncoder 이면 누적 적중 통계, 아니면 None"""
+    return encoder.stats() if isinstance(encoder, CachedEncoder) else None
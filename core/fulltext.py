@@ -0,0 +1,160 @@
+"""SQLite FTS5 시설 전문 검색 색인
+
+- core_facility_fts: rowid = Facility.id, 컬럼은 시설명(name)과 RAG 와 같은 시설 문서 전체(body).
+  unicode61 토크나이저 + 접두 색인(2/3글자)으로, 조사가 붙는 한국어도 '검색어*' 접두 질의로 찾는다.
+- core_facility_ngram: 같은 문서를 문자 bigram 으로 나눠 저장 (RAG 하이브리드 검색의 어휘 단계).
+  '강남요양원' 처럼 띄어쓰기 없는 복합어 안의 '요양원' 도 bigram 일치로 찾는다.
+SQLite 가 아닌 DB 에서는 색인을 만들지 않고 모든 함수가 아무것도 하지 않는다.
+"""
+import html
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+
+from .models import Facility
+from .rag_service import iter_facility_documents
+
+FTS_TABLE = 'core_facility_fts'
+NGRAM_TABLE = 'core_facility_ngram'
+# bm25 컬럼 가중치 (name, body): 시설명 일치를 우선
+BM25_WEIGHTS = (10.0, 1.0)
+SNIPPET_TOKENS = 16
+# highlight/snippet 표시용 임시 구분자 (HTML 이스케이프 후 <mark> 로 치환)
+_MARK_OPEN, _MARK_CLOSE = '\x02', '\x03'
+
+
+def fulltext_available() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query: str) -> str:
+    """사용자 입력 -> FTS5 MATCH 식 (단어마다 접두 질의, 모두 포함(AND))"""
+    terms = re.findall(r'\w+', query or '')
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """단어별 문자 n-gram (n 글자보다 짧은 단어는 그대로), 소문자화"""
+    grams = []
+    for word in re.findall(r'\w+', (text or '').lower()):
+        if len(word) <= n:
+            grams.append(word)
+        else:
+            grams.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return grams
+
+
+def _index_rows(facility_ids=None):
+    queryset = Facility.objects.filter(id__in=list(facility_ids)) if facility_ids is not None else None
+    for _, document, metadata in iter_facility_documents(queryset=queryset):
+        yield metadata['facility_id'], metadata['facility_name'], document
+
+
+def sync_fulltext(facility_ids: Iterable[int]) -> int:
+    """주어진 시설들의 색인 행을 현재 DB 내용으로 교체 -> 색인한 시설 수"""
+    facility_ids = list(facility_ids)
+    if not facility_ids or not fulltext_available():
+        return 0
+    rows = list(_index_rows(facility_ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        placeholders = ', '.join(['%s'] * len(facility_ids))
+        for table in (FTS_TABLE, NGRAM_TABLE):
+            cursor.execute(f'DELETE FROM {table} WHERE rowid IN ({placeholders})', facility_ids)
+        _insert_rows(cursor, rows)
+    return len(rows)
+
+
+def _insert_rows(cursor, rows):
+    cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, name, body) VALUES (%s, %s, %s)', rows)
+    cursor.executemany(
+        f'INSERT INTO {NGRAM_TABLE} (rowid, grams) VALUES (%s, %s)',
+        [(facility_id, ' '.join(char_ngrams(document))) for facility_id, _, document in rows],
+    )
+
+
+def rebuild_fulltext(batch_size: int = 1000) -> int:
+    """색인 전체 재생성 -> 색인한 시설 수"""
+    if not fulltext_available():
+        return 0
+    count = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'DELETE FROM {NGRAM_TABLE}')
+        batch = []
+        for row in _index_rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _insert_rows(cursor, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            _insert_rows(cursor, batch)
+            count += len(batch)
+        for table in (FTS_TABLE, NGRAM_TABLE):
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+    return count
+
+
+def _marked_html(text: str) -> str:
+    return html.escape(text).replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+
+def fulltext_search(query: str, limit: int = 20) -> List[Dict]:
+    """bm25 순위 검색 -> [{facility, score, name_highlight, snippet}] (점수는 작을수록 관련도 높음)"""
+    match = build_match_query(query)
+    if not match or not fulltext_available():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid,
+                   highlight({FTS_TABLE}, 0, %s, %s),
+                   snippet({FTS_TABLE}, 1, %s, %s, '…', %s),
+                   bm25({FTS_TABLE}, %s, %s) AS score
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY score
+            LIMIT %s
+            """,
+            [_MARK_OPEN, _MARK_CLOSE, _MARK_OPEN, _MARK_CLOSE, SNIPPET_TOKENS, *BM25_WEIGHTS, match, limit],
+        )
+        rows = cursor.fetchall()
+    facilities = Facility.objects.in_bulk([row[0] for row in rows])
+    return [
+        {
+            'facility': facilities[facility_id],
+            'score': score,
+            'name_highlight': _marked_html(name_highlight),
+            'snippet': _marked_html(snippet),
+        }
+        for facility_id, name_highlight, snippet, score in rows
+        if facility_id in facilities
+    ]
+
+
+def ngram_search(query: str, limit: int = 20, facility_ids: Optional[List[int]] = None) -> List[Tuple[int, float]]:
+    """문자 bigram OR 질의 bm25 순위 -> [(facility_id, score)] (facility_ids 가 주어지면 그 안에서만)"""
+    grams = list(dict.fromkeys(char_ngrams(query)))
+    if not grams or not fulltext_available():
+        return []
+    match = ' OR '.join('"{}"'.format(gram.replace('"', '""')) for gram in grams)
+    params = [match]
+    restrict = ''
+    if facility_ids is not None:
+        if not facility_ids:
+            return []
+        restrict = f"AND rowid IN ({', '.join(['%s'] * len(facility_ids))})"
+        params.extend(facility_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid, bm25({NGRAM_TABLE}) AS score
+            FROM {NGRAM_TABLE}
+            WHERE {NGRAM_TABLE} MATCH %s {restrict}
+            ORDER BY score
+            LIMIT %s
+            """,
+            [*params, limit],
+        )
+        return cursor.fetchall()
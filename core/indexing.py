@@ -0,0 +1,195 @@
+"""RAG 벡터 색인 백그라운드 작업 (외부 브로커 없이 스레드 + IndexingJob 테이블)
+
+POST /api/initialize-rag/ 는 작업을 만들고 바로 id 를 반환하며, 임베딩은 요청을 받은 워커의
+백그라운드 스레드에서 실행된다. 진행 상황은 DB 에 기록하므로 어느 워커에서든 조회할 수 있다.
+크롤러는 색인을 직접 쓰지 않고 변경 시설 재색인 작업을 대기열에 등록(enqueue_reindex)하며,
+웹 워커가 색인 확인(RAGService.refresh_if_reindexed) 때 대기 작업을 가져가 실행한다.
+(Chroma 는 여러 프로세스가 동시에 쓰면 안전하지 않으므로 색인 쓰기는 웹 워커의 작업 하나로만)
+마지막 완료 시각(latest_index_version)이 바뀌면 각 워커의 RAGService 가 색인을 다시 연다.
+"""
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import IndexingJob
+
+# 진행 상황 DB 기록 최소 간격(초)
+PROGRESS_INTERVAL = 1.0
+# 이 시간 동안 진행 기록이 없는 실행 중 작업은 워커 종료 등으로 중단된 것으로 본다
+STALE_AFTER = timedelta(minutes=10)
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """embed_facilities 결과 -> 안내 문구"""
+    message = (
+        f"RAG 시스템이 초기화되었습니다. 총 {stats['total']}개 시설 "
+        f"(추가 {stats['added']}, 변경 {stats['updated']}, "
+        f"유지 {stats['unchanged']}, 삭제 {stats['removed']})"
+    )
+    if 'cache' in stats:
+        message += f", 임베딩 캐시 적중률 {stats['cache']['hit_rate']:.0%}"
+    if stats.get('embedded'):
+        message += f", {stats['docs_per_sec']:.0f} docs/s"
+    return message
+
+
+class JobProgress:
+    """embed_facilities progress 콜백: 단계가 바뀌거나 PROGRESS_INTERVAL 이 지났을 때만 DB 갱신"""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self._phase = None
+        self._last_write = 0.0
+
+    def __call__(self, phase: str, processed: int, total: int):
+        now = time.monotonic()
+        if phase == self._phase and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._phase = phase
+        self._last_write = now
+        IndexingJob.objects.filter(pk=self.job_id).update(
+            phase=phase, processed=processed, total=total, updated_at=timezone.now(),
+        )
+
+
+class IndexingBusy(Exception):
+    """다른 색인 작업이 진행 중이라 새 작업을 만들 수 없음"""
+
+
+def expire_stale_jobs() -> int:
+    """STALE_AFTER 동안 진행 기록이 없는 실행 중 작업을 실패로 처리 (처리한 작업 수 반환)
+
+    대기(queued) 작업은 실행할 워커가 없어도 다음 워커가 가져가므로 만료하지 않는다.
+    """
+    now = timezone.now()
+    return IndexingJob.objects.filter(status='running', updated_at__lt=now - STALE_AFTER).update(
+        status='failed', error='진행 기록이 없어 중단된 것으로 처리했습니다', finished_at=now, updated_at=now,
+    )
+
+
+def _create_job(**fields) -> IndexingJob:
+    """진행 중 작업 생성. 진행 중 작업은 DB 제약(single_active_indexing_job)으로 하나만 존재할 수 있다"""
+    expire_stale_jobs()
+    try:
+        with transaction.atomic():
+            return IndexingJob.objects.create(**fields)
+    except IntegrityError:
+        raise IndexingBusy('다른 색인 작업이 진행 중입니다')
+
+
+def _start_thread(job_id: int) -> None:
+    threading.Thread(target=run_indexing_job, args=(job_id,), name=f'rag-index-{job_id}', daemon=True).start()
+
+
+def start_indexing_job(rebuild: bool = False) -> IndexingJob:
+    """색인 작업을 만들고 백그라운드 스레드로 시작 (이미 진행 중인 작업이 있으면 그 작업을 반환)"""
+    try:
+        job = _create_job(rebuild=rebuild)
+    except IndexingBusy:
+        # 동시에 들어온 다른 요청이 먼저 만든 작업 (그 사이 끝났으면 가장 최근 작업)
+        active = IndexingJob.objects.filter(status__in=IndexingJob.ACTIVE_STATUSES).first()
+        if active is not None and active.status == 'queued':
+            # 크롤러가 등록한 대기 작업이면 이 워커에서 실행
+            _start_thread(active.pk)
+        return active or IndexingJob.objects.first()
+    _start_thread(job.pk)
+    return job
+
+
+def enqueue_reindex(facility_ids: Iterable[int]) -> IndexingJob:
+    """주어진 시설들의 재색인 작업을 대기열에 등록 (크롤러용, 실행은 웹 워커)
+
+    대기 중인 작업이 있으면 그 작업에 합친다. 실행 중인 작업이 있으면 IndexingBusy.
+    """
+    facility_ids = sorted(set(facility_ids))
+    try:
+        return _create_job(facility_ids=facility_ids, total=len(facility_ids))
+    except IndexingBusy:
+        queued = IndexingJob.objects.filter(status='queued').first()
+        if queued is None:
+            raise
+        if queued.facility_ids is None:
+            # 전체 작업이 대기 중이면 바뀐 시설도 함께 반영된다
+            return queued
+        merged = sorted(set(queued.facility_ids) | set(facility_ids))
+        # 그 사이 워커가 가져갔으면(running) 합치지 않는다
+        if not IndexingJob.objects.filter(pk=queued.pk, status='queued').update(
+            facility_ids=merged, total=len(merged), updated_at=timezone.now(),
+        ):
+            raise
+        queued.facility_ids = merged
+        return queued
+
+
+def start_queued_job() -> Optional[IndexingJob]:
+    """대기 중인 작업이 있으면 이 워커의 백그라운드 스레드로 시작 (여러 워커가 시작해도 하나만 실행)"""
+    job = IndexingJob.objects.filter(status='queued').order_by('created_at').first()
+    if job is not None:
+        _start_thread(job.pk)
+    return job
+
+
+def latest_index_version():
+    """마지막으로 완료된 색인 작업의 완료 시각 (색인이 바뀌었는지 판단하는 버전 값)"""
+    return IndexingJob.objects.filter(status='done').aggregate(latest=Max('finished_at'))['latest']
+
+
+def _claim_job(job_id: int) -> bool:
+    """대기 작업을 실행 중으로 전환 (다른 워커가 먼저 가져갔으면 False)"""
+    now = timezone.now()
+    return bool(IndexingJob.objects.filter(pk=job_id, status='queued').update(
+        status='running', phase='loading', started_at=now, updated_at=now,
+    ))
+
+
+def _execute_job(job_id: int, rag_service) -> Dict[str, Any]:
+    """embed_facilities 실행 + 결과 기록 (오류는 기록 후 다시 발생)"""
+    job = IndexingJob.objects.get(pk=job_id)
+    IndexingJob.objects.filter(pk=job_id).update(
+        status='running', phase='embedding', started_at=job.started_at or timezone.now(), updated_at=timezone.now(),
+    )
+    try:
+        stats = rag_service.embed_facilities(
+            rebuild=job.rebuild, progress=JobProgress(job_id), facility_ids=job.facility_ids,
+        )
+    except Exception as e:
+        now = timezone.now()
+        IndexingJob.objects.filter(pk=job_id).update(
+            status='failed', error=str(e) or e.__class__.__name__, finished_at=now, updated_at=now,
+        )
+        raise
+    now = timezone.now()
+    IndexingJob.objects.filter(pk=job_id).update(
+        status='done', phase='done', processed=stats['total'], total=stats['total'],
+        stats=stats, finished_at=now, updated_at=now,
+    )
+    return stats
+
+
+def run_indexing_job(job_id: int) -> None:
+    """작업 1개 실행 (백그라운드 스레드). 결과/오류는 IndexingJob 에 기록"""
+    from .rag_service import get_rag_service, reload_rag_service
+
+    close_old_connections()
+    try:
+        if not _claim_job(job_id):
+            return
+        try:
+            _execute_job(job_id, get_rag_service())
+        except Exception as e:
+            # 모델 로딩 실패 등 _execute_job 이전 단계의 오류도 기록
+            now = timezone.now()
+            IndexingJob.objects.filter(pk=job_id).exclude(status='failed').update(
+                status='failed', error=str(e) or e.__class__.__name__, finished_at=now, updated_at=now,
+            )
+            return
+        # 같은 워커의 공유 서비스가 새 컬렉션을 보도록 갱신
+        reload_rag_service()
+    finally:
+        # 스레드 전용 DB 연결 정리
+        connection.close()
@@ -0,0 +1,54 @@
+import glob
+import time
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+
+from core.crawler.parser import parse_detail, parse_detail_legacy
+
+BENCH_URL = "https://www.seniortalktalk.com/search/view/A03/0"
+
+
+class Command(BaseCommand):
+    help = "저장된 HTML 스냅샷으로 parse_detail(단일 순회) vs 기존 파서의 페이지당 파싱 시간 비교"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--glob", default="crawl_debug/*.html", help="대상 HTML 파일 glob (기본: crawl_debug/*.html)")
+        parser.add_argument("--repeat", type=int, default=3, help="파일별 반복 횟수 (기본:3)")
+
+    def handle(self, *args, **options):
+        paths = sorted(glob.glob(options["glob"]))
+        if not paths:
+            self.stderr.write("대상 HTML 파일이 없습니다")
+            return
+        repeat = max(1, options["repeat"])
+
+        timings = {"legacy": 0.0, "indexed": 0.0}
+        mismatches = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+            for _ in range(repeat):
+                # BeautifulSoup 생성 비용은 두 파서가 같으므로 측정에서 제외
+                soup = BeautifulSoup(html, "lxml")
+                started = time.perf_counter()
+                legacy = parse_detail_legacy(soup, BENCH_URL)
+                timings["legacy"] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                indexed = parse_detail(soup, BENCH_URL)
+                timings["indexed"] += time.perf_counter() - started
+            if legacy != indexed:
+                mismatches.append(path)
+
+        runs = len(paths) * repeat
+        legacy_ms = timings["legacy"] / runs * 1000
+        indexed_ms = timings["indexed"] / runs * 1000
+        self.stdout.write(f"파일 {len(paths)}개 x {repeat}회")
+        self.stdout.write(f"기존 파서:   {legacy_ms:.2f} ms/page")
+        self.stdout.write(f"단일 순회:   {indexed_ms:.2f} ms/page")
+        self.stdout.write(f"속도 향상:   x{legacy_ms / indexed_ms:.2f}" if indexed_ms else "속도 향상: -")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"결과 불일치 {len(mismatches)}건: {', '.join(mismatches[:5])}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("모든 파일에서 결과 동일"))
@@ -0,0 +1,96 @@
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.query_parser import REGION_ALIASES
+from core.vector_store import STORE_DTYPES, NumpyVectorStore
+
+
+def _percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+class Command(BaseCommand):
+    help = "벡터 검색 비교: ChromaDB vs NumPy 색인(float32/float16/int8) 지연 시간 p50/p99, 메모리, recall@k"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=5000, help="색인 벡터 수 (기본:5000)")
+        parser.add_argument("--dim", type=int, default=384, help="벡터 차원 (기본:384)")
+        parser.add_argument("--queries", type=int, default=200, help="질의 수 (기본:200)")
+        parser.add_argument("--k", type=int, default=20, help="top-k (기본:20)")
+        parser.add_argument("--dtypes", nargs="+", choices=STORE_DTYPES, default=list(STORE_DTYPES),
+                            help="비교할 NumPy 색인 형식 (float32 는 recall 기준으로 항상 포함)")
+        parser.add_argument("--rerank", type=int, default=4, help="양자화 형식의 재정렬 후보 배수 (기본:4)")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        size, dim, k = options["size"], options["dim"], options["k"]
+        rng = np.random.default_rng(options["seed"])
+        vectors = rng.normal(size=(size, dim)).astype(np.float32)
+        queries = rng.normal(size=(options["queries"], dim)).astype(np.float32)
+        regions = list(REGION_ALIASES)
+        ids = [f"facility_{i}" for i in range(size)]
+        documents = [f"시설 {i}" for i in range(size)]
+        metadatas = [{"facility_id": i, "facility_region": regions[i % len(regions)]} for i in range(size)]
+        # 채팅 검색처럼 지역 조건이 붙은 질의도 함께 측정
+        cases = {"조건 없음": None, "지역 조건": {"facility_region": regions[0]}}
+
+        backends = {}
+        dtypes = ["float32"] + [dtype for dtype in options["dtypes"] if dtype != "float32"]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for dtype in dtypes:
+                path = f"{tmpdir}/numpy-{dtype}"
+                store = NumpyVectorStore(path, dtype=dtype, rerank=options["rerank"])
+                store.upsert(ids, vectors, documents, metadatas)
+                store.persist()
+                # 워커 기동 때처럼 디스크에서 메모리 맵으로 다시 연다
+                backends[f"numpy({dtype})"] = NumpyVectorStore(path, dtype=dtype, rerank=options["rerank"])
+            try:
+                import chromadb
+            except ImportError:
+                self.stderr.write("chromadb 가 설치되어 있지 않아 NumPy 색인만 측정합니다")
+            else:
+                client = chromadb.PersistentClient(path=f"{tmpdir}/chroma")
+                collection = client.create_collection("bench")
+                for i in range(0, size, 1000):
+                    collection.upsert(
+                        ids=ids[i:i + 1000], embeddings=vectors[i:i + 1000].tolist(),
+                        documents=documents[i:i + 1000], metadatas=metadatas[i:i + 1000],
+                    )
+                backends["chroma"] = collection
+
+            self.stdout.write(f"벡터 {size}개 x {dim}차원, 질의 {len(queries)}개, top-{k}")
+            for name, backend in backends.items():
+                if isinstance(backend, NumpyVectorStore):
+                    usage = backend.memory_usage()
+                    self.stdout.write(
+                        f"{name:16s} 검색 행렬 {usage['search_bytes'] / 2 ** 20:7.2f} MiB "
+                        f"(float32 대비 {usage['search_bytes'] / max(usage['full_bytes'], 1):.0%})"
+                    )
+            results = {}
+            for case, where in cases.items():
+                for name, backend in backends.items():
+                    samples, hits = [], []
+                    for query in queries:
+                        started = time.perf_counter()
+                        result = backend.query(
+                            query_embeddings=[query.tolist()], n_results=k, where=where,
+                            include=["documents", "metadatas", "distances"],
+                        )
+                        samples.append(time.perf_counter() - started)
+                        hits.append(result["ids"][0])
+                    results[case, name] = hits
+                    self.stdout.write(
+                        f"[{case}] {name:16s} p50 {_percentile_ms(samples, 50):7.2f} ms  "
+                        f"p99 {_percentile_ms(samples, 99):7.2f} ms  mean {np.mean(samples) * 1000:7.2f} ms"
+                    )
+                # 양자화/근사(HNSW) 결과가 float32 정확 top-k 를 얼마나 포함하는지
+                exact = results[case, "numpy(float32)"]
+                for name in backends:
+                    if name == "numpy(float32)":
+                        continue
+                    approx = results[case, name]
+                    recall = np.mean([len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(approx, exact)])
+                    self.stdout.write(f"[{case}] {name:16s} recall@{k} (float32 정확 결과 기준): {recall:.3f}")
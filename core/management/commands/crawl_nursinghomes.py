@@ -1,13 +1,21 @@
 import asyncio
-import random
 import os
+from collections import Counter
+from dataclasses import dataclass, field
 from pathlib import Path
 from urllib.parse import urlencode
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.utils import timezone
 from core import models as core_models
-import re
+from core.crawler.frontier import CrawlFrontier
+from core.crawler.fetch import DetailPage, FetchStats, HttpDetailFetcher, has_detail_markup, timed
+from core.crawler.fingerprint import FingerprintStore, detail_page_key, fingerprint_detail
+from core.crawler.parser import parse_detail
+from core.crawler.ratelimit import TokenBucket
+from core.crawler.snapshots import snapshot_name
+from core.crawler.writer import FacilityBatchWriter
 from asgiref.sync import sync_to_async
 
 from bs4 import BeautifulSoup
@@ -44,6 +52,12 @@ def _compute_richness(data: dict) -> int:
     score += len(noncov_items) * 2  # 비급여 항목 가중치
     return int(score * 100)  # 소수 방지
 
+
+def _detail_soup(html: str):
+    """HTTP 로 받은 상세 HTML 파싱 -> 필요한 DOM 이 있으면 soup, 없으면 None (asyncio.to_thread 로 실행)"""
+    soup = BeautifulSoup(html, "lxml")
+    return soup if has_detail_markup(soup) else None
+
 USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
     "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.1 Safari/537.36"
@@ -53,6 +67,28 @@ RETRY_COUNT = 3
 GOTO_TIMEOUT = 60000  # 60s
 SCREENSHOT_DIR = Path('crawl_debug')
 SCREENSHOT_DIR.mkdir(exist_ok=True)
+DETAIL_SNAPSHOT_DIR = SCREENSHOT_DIR / 'details'
+
+
+@dataclass
+class CrawlStats:
+    """크롤링 집계"""
+    saved_codes: set = field(default_factory=set)
+    dup_skipped: int = 0
+    dup_updated: int = 0
+    failed: int = 0
+    unchanged: int = 0
+    region_counts: Counter = field(default_factory=Counter)
+    regions_done: list = field(default_factory=list)
+
+    def merge(self, other: "CrawlStats"):
+        self.saved_codes |= other.saved_codes
+        self.dup_skipped += other.dup_skipped
+        self.dup_updated += other.dup_updated
+        self.failed += other.failed
+        self.unchanged += other.unchanged
+        self.region_counts.update(other.region_counts)
+        self.regions_done.extend(other.regions_done)
 
 
 class Command(BaseCommand):
@@ -63,6 +99,28 @@ class Command(BaseCommand):
         parser.add_argument("--max-pages", type=int, default=50, help="각 지역별 최대 크롤 페이지 수 (기본:50)")
         parser.add_argument("--delay", type=float, default=1.0, help="각 요청 사이 기본 지연(초)")
         parser.add_argument("--headful", action="store_true", help="브라우저 UI 표시")
+        parser.add_argument("--concurrency", type=int, default=1, help="동시에 상세 페이지를 여는 워커(페이지) 수 (기본:1)")
+        parser.add_argument("--rate", type=float, default=None, help="샤드별 초당 최대 요청 수, 샤드 내 워커 공유 (기본: 1/delay)")
+        parser.add_argument(
+            "--fetcher", choices=["playwright", "http"], default="playwright",
+            help="상세 페이지 수집 방식: http 는 경량 HTTP 클라이언트 우선, 필요한 DOM 이 없으면 Playwright 로 폴백 (기본: playwright)",
+        )
+        parser.add_argument("--resume", action="store_true", help="이전 실행의 crawl frontier 를 이어서 진행 (완료 작업 건너뜀, 실패 작업 재시도)")
+        parser.add_argument(
+            "--changed-only", action="store_true",
+            help="지문(정규화 HTML 해시/ETag/Last-Modified)이 같은 상세 페이지는 파싱/저장 생략",
+        )
+        parser.add_argument(
+            "--save-snapshots", action="store_true",
+            help="상세 HTML 을 crawl_debug/details/ 에 저장 (reparse_snapshots 로 오프라인 재파싱 가능)",
+        )
+        parser.add_argument("--shards", type=int, default=1, help="지역을 나눠 병렬 크롤링할 브라우저 컨텍스트 수 (기본:1)")
+        parser.add_argument("--write-batch", type=int, default=50, help="파싱 결과를 모아 한 번에 DB 에 반영할 시설 수 (기본:50)")
+        parser.add_argument("--no-reindex", action="store_true", help="크롤 후 내용이 바뀐 시설의 RAG 재색인 작업 등록 생략")
+        parser.add_argument(
+            "--reindex-every", type=int, default=0,
+            help="내용이 바뀐 시설이 N개 모일 때마다 RAG 재색인 작업 등록 (기본:0 - 크롤 종료 시 한 번)",
+        )
         # CSV / detail-url 옵션 제거 및 최소 옵션 유지
         parser._actions = [a for a in parser._actions if a.dest not in {"output","no_csv","detail_url"}]
         # 안전하게 남은 help 수정
@@ -70,6 +128,18 @@ class Command(BaseCommand):
             if a.dest == 'max_pages':
                 a.help = '각 지역별 최대 크롤 페이지 수'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.changed_codes = set()  # 저장 시 실제로 내용이 바뀐 시설 code
+        self.reindex_pending = set()  # 아직 RAG 에 반영하지 않은 변경 시설 code
+        self.reindex_enabled = False
+        self.reindex_every = 0
+        self.reindexed_count = 0
+        # 저장 버퍼에 있어 아직 DB 에 반영되지 않은 시설의 점수 (code -> richness)
+        self._buffered_scores = {}
+        # _pending_done 과 같은 순서의 (집계, 지역, code, richness, 갱신 여부): 저장 성공 후 집계에 반영
+        self._pending_saves = []
+
     def handle(self, *args, **options):
         try:
             asyncio.run(self._async_handle(options))
@@ -83,6 +153,8 @@ class Command(BaseCommand):
         max_pages = options["max_pages"]
         delay = options["delay"]
         headless = not options["headful"]
+        concurrency = max(1, options.get("concurrency") or 1)
+        rate = options.get("rate") or (1.0 / delay if delay > 0 else 10.0)
 
         # 전국 지역 리스트
         all_locations = [
@@ -99,213 +171,98 @@ class Command(BaseCommand):
         else:
             locations_to_crawl = all_locations
 
-        saved_facilities = []
-        detail_urls_seen = set()
-        best_scores = {}  # code -> richness score
-        dup_skipped = 0
-        dup_updated = 0
+        # 모든 샤드가 공유하는 중복 판정 뷰 (단일 이벤트 루프라 별도 락 불필요)
+        self.detail_urls_seen = set()
+        self.best_scores = {}  # code -> richness score
+        self.frontier = CrawlFrontier()
+        self.changed_only = options.get("changed_only", False)
+        self.save_snapshots = options.get("save_snapshots", False)
+        if self.save_snapshots:
+            DETAIL_SNAPSHOT_DIR.mkdir(exist_ok=True)
+        self.fingerprints = await sync_to_async(FingerprintStore().load)()
+        # 파싱 결과는 버퍼에 모았다가 배치 단위로 저장, frontier/지문 완료 기록도 저장과 함께 반영
+        self.writer = FacilityBatchWriter(batch_size=options.get("write_batch") or 50)
+        self._pending_done = []
+        self._pending_saves = []
+        self.changed_codes = set()
+        self.reindex_pending = set()
+        self.reindex_enabled = not options.get("no_reindex", False)
+        self.reindex_every = max(0, options.get("reindex_every") or 0)
+        backlog = []
+        if options.get("resume"):
+            # 이전 실행 상태 복원: 본 URL/점수, 미처리 상세 + 재시도 시각이 지난 실패 상세
+            self.detail_urls_seen = await sync_to_async(self.frontier.seen_detail_urls)()
+            self.best_scores = await sync_to_async(self.frontier.best_scores)()
+            backlog = await sync_to_async(self.frontier.pending_details)()
+            now = timezone.now()
+            backlog += [
+                (region, url) for region, url, due in await sync_to_async(self.frontier.retryable_details)()
+                if due is None or due <= now
+            ]
+            self.stdout.write(f"재개: 처리 완료 상세 {len(self.best_scores)}개 시설, 대기/재시도 {len(backlog)}건")
+        else:
+            await sync_to_async(self.frontier.reset)()
         total_regions = len(locations_to_crawl)
+        shards = max(1, min(options.get("shards") or 1, total_regions))
+        self.fetch_stats = FetchStats()
+        self.http_fetcher = None
+        if options.get("fetcher") == "http":
+            self.http_fetcher = HttpDetailFetcher(USER_AGENT, pool_size=shards * concurrency)
+
+        # 샤드들은 공유 큐에서 지역을 하나씩 가져간다 (큰 지역이 몰려도 유휴 샤드가 생기지 않음)
+        region_queue = asyncio.Queue()
+        for region_idx, current_location in enumerate(locations_to_crawl, 1):
+            region_queue.put_nowait((region_idx, current_location))
 
         self.stdout.write(f"크롤링 대상 지역: {total_regions}개")
         self.stdout.write(f"각 지역별 최대 페이지: {max_pages}")
+        self.stdout.write(f"샤드: {shards}개, 샤드별 상세 워커: {concurrency}개, 샤드별 요청 속도 상한: {rate:.2f}회/초")
 
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=headless, args=["--disable-blink-features=AutomationControlled"])
-            context = await browser.new_context(
-                user_agent=USER_AGENT,
-                locale="ko-KR",
-                java_script_enabled=True,
-                extra_http_headers={
-                    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
-                    "Referer": "https://www.seniortalktalk.com/",
-                },
-                viewport={"width":1280,"height":1600}
-            )
-            # 리소스 절약: 이미지/폰트 차단
-            async def route_intercept(route, request):
-                if request.resource_type in ['image','media','font']:
-                    await route.abort()
-                else:
-                    await route.continue_()
-            await context.route("**/*", route_intercept)
-            page = await context.new_page()
-
-            async def safe_goto(pg, url, expect_selector=None):
-                last_err = None
-                for attempt in range(1, RETRY_COUNT+1):
-                    try:
-                        await pg.goto(url, wait_until='domcontentloaded', timeout=GOTO_TIMEOUT)
-                        if expect_selector:
-                            try:
-                                await pg.wait_for_selector(expect_selector, timeout=8000)
-                            except Exception:
-                                pass
-                        return True
-                    except Exception as e:
-                        last_err = e
-                        self.stderr.write(f"[목록 이동 실패 {attempt}/{RETRY_COUNT}] {e}")
-                        await asyncio.sleep(2*attempt)
-                if last_err:
-                    fname = SCREENSHOT_DIR / f"fail_list_{int(asyncio.get_event_loop().time())}.png"
-                    try:
-                        await pg.screenshot(path=str(fname))
-                    except Exception:
-                        pass
-                return False
-
-            async def safe_detail(detail_ctx, durl):
-                dpage = await detail_ctx.new_page()
-                for attempt in range(1, RETRY_COUNT+1):
-                    try:
-                        await dpage.goto(durl, wait_until='domcontentloaded', timeout=GOTO_TIMEOUT)
-                        await dpage.wait_for_timeout(500)
-                        # 페이지 내 간단 anchor 수 기록
-                        try:
-                            await dpage.evaluate("() => window.scrollTo(0,0)")
-                        except Exception:
-                            pass
-                        return dpage
-                    except Exception as e:
-                        self.stderr.write(f"[상세 이동 실패 {attempt}/{RETRY_COUNT}] {durl} : {e}")
-                        if attempt == RETRY_COUNT:
-                            try:
-                                await dpage.screenshot(path=str(SCREENSHOT_DIR / f"fail_detail_{int(asyncio.get_event_loop().time())}.png"))
-                            except Exception:
-                                pass
-                        await asyncio.sleep(1.5*attempt)
-                await dpage.close()
-                return None
-
-            async def auto_scroll(pg, max_rounds=8, pause=600):
-                last_height = await pg.evaluate("() => document.body.scrollHeight")
-                for i in range(max_rounds):
-                    await pg.evaluate("() => window.scrollBy(0, document.body.scrollHeight)")
-                    await pg.wait_for_timeout(pause)
-                    new_height = await pg.evaluate("() => document.body.scrollHeight")
-                    if new_height == last_height:
-                        break
-                    last_height = new_height
-
-            # 지역별 순회
-            for region_idx, current_location in enumerate(locations_to_crawl, 1):
-                self.stdout.write(f"\n{'='*60}")
-                self.stdout.write(f"[{region_idx}/{total_regions}] {current_location} 크롤링 시작")
-                self.stdout.write(f"{'='*60}")
-
-                region_facilities = 0
-                empty_page_count = 0
-
-                # 해당 지역의 페이지별 순회
-                for page_no in range(1, max_pages + 1):
-                    query = DEFAULT_QUERY.copy()
-                    query["location"] = current_location
-                    query["page"] = page_no
-
-                    url = f"{SEARCH_BASE_URL}?{urlencode(query, doseq=True)}"
-                    self.stdout.write(f"[{current_location}] 페이지 {page_no} 이동: {url}")
-
-                    ok = await safe_goto(page, url, expect_selector='a')
-                    if not ok:
-                        continue
-
-                    # 자동 스크롤 수행 (동적 로딩 대비)
-                    await auto_scroll(page)
-                    html = await page.content()
-
-                    # 디버그 스냅샷 저장
-                    region_name = current_location.split('/')[0]
-                    debug_path = SCREENSHOT_DIR / f"{region_name}_page{page_no}.html"
-                    debug_path.write_text(html, encoding='utf-8')
-
-                    soup = BeautifulSoup(html, "lxml")
-
-                    # 후보: list, item, card 등 class 를 가진 a 태그 수집 (일반화)
-                    anchors = []
-                    for a in soup.find_all("a", href=True):
-                        href_lower = a["href"].lower()
-                        if "/search/view/" in href_lower:  # 우선 강제 패턴
-                            anchors.append(a)
-                        elif any(k in href_lower for k in DETAIL_KEYWORDS):
-                            anchors.append(a)
-
-                    # 중복 제거 & 절대 URL 보정
-                    detail_links = []
-                    for a in anchors:
-                        href = a["href"].strip()
-                        if href.startswith("javascript:"):
-                            continue
-                        if href.startswith("/"):
-                            href = "https://www.seniortalktalk.com" + href
-                        if href not in detail_urls_seen and href.startswith("http"):
-                            detail_urls_seen.add(href)
-                            detail_links.append(href)
-
-                    # 링크 디버그 저장
-                    link_debug_file = SCREENSHOT_DIR / f"{region_name}_links_page{page_no}.txt"
-                    link_debug_file.write_text("\n".join(detail_links), encoding='utf-8')
-
-                    if not detail_links:
-                        empty_page_count += 1
-                        self.stdout.write(f"[{current_location}] 페이지 {page_no} 상세 링크 0개")
-                        # 연속 3페이지 이상 비어있으면 해당 지역 크롤링 종료
-                        if empty_page_count >= 3:
-                            self.stdout.write(f"[{current_location}] 연속 {empty_page_count}페이지 비어있음 - 해당 지역 크롤링 종료")
-                            break
-                        continue
-                    else:
-                        empty_page_count = 0  # 링크가 있으면 카운터 리셋
-                        self.stdout.write(f"[{current_location}] 페이지 {page_no} 상세 링크 {len(detail_links)}개")
-
-                    page_facilities = 0
-                    for link in tqdm(detail_links, desc=f"{region_name} p{page_no}", unit="fac"):
-                        dpage = await safe_detail(context, link)
-                        if not dpage:
-                            continue
-                        try:
-                            dhtml = await dpage.content()
-                            dsoup = BeautifulSoup(dhtml, "lxml")
-                            data = self.parse_detail(dsoup, link)
-                            code = data.get('overview', {}).get('code')
-                            richness = _compute_richness(data)
-                            do_save = True
-                            updated = False
-                            if code in best_scores:
-                                if richness > best_scores[code]:
-                                    updated = True
-                                else:
-                                    do_save = False
-                            if do_save:
-                                facility = await sync_to_async(self.save_to_db, thread_sensitive=True)(data)
-                                best_scores[code] = richness
-                                if facility:
-                                    if updated:
-                                        dup_updated += 1
-                                        self.stdout.write(f"[갱신] {facility.code} (점수 {richness})")
-                                    else:
-                                        saved_facilities.append(facility)
-                                        page_facilities += 1
-                                        region_facilities += 1
-                                        self.stdout.write(f"[저장] {facility.code} (점수 {richness})")
-                            else:
-                                dup_skipped += 1
-                                self.stdout.write(f"[중복-스킵] {code} (기존 점수 {best_scores[code]}, 새 점수 {richness})")
-                        except Exception as e:
-                            self.stderr.write(f"[오류] {link}: {e}\n")
-                        finally:
-                            await dpage.close()
-                            await asyncio.sleep(delay + random.uniform(0, delay / 2))
-
-                    self.stdout.write(f"[{current_location}] 페이지 {page_no} 완료: {page_facilities}개 시설 저장")
-
-                self.stdout.write(f"[{current_location}] 지역 크롤링 완료: 총 {region_facilities}개 시설")
-
-            await context.close()
+            progress = tqdm(total=0, desc="상세", unit="fac")
+            try:
+                shard_stats = await asyncio.gather(*(
+                    self._crawl_shard(
+                        browser, region_queue, total_regions, max_pages, concurrency, rate, progress,
+                        backlog=backlog[shard_idx::shards],
+                    )
+                    for shard_idx in range(shards)
+                ))
+                shard_stats.append(await self._retry_failed(browser, concurrency, rate, progress))
+                await self._flush_writes()
+            finally:
+                progress.close()
+                if self.http_fetcher:
+                    self.http_fetcher.close()
             await browser.close()
+        # 남은 변경 시설을 한 번에 RAG 재색인 대기열에 등록
+        await self._reindex_changed()
+        if self.reindex_pending:
+            self.stderr.write(
+                f"[재색인] 등록하지 못한 변경 시설 {len(self.reindex_pending)}개는 "
+                "다음 크롤 또는 RAG 초기화(변경분 재임베딩) 때 반영됩니다"
+            )
 
+        stats = CrawlStats()
         self.stdout.write(f"\n{'='*60}")
         self.stdout.write(f"전체 크롤링 완료!")
-        self.stdout.write(f"총 {len({f.id for f in saved_facilities})}개 시설 DB 저장")
-        self.stdout.write(f"중복 스킵: {dup_skipped}, 정보 갱신: {dup_updated}")
+        for shard_idx, shard_stat in enumerate(shard_stats, 1):
+            self.stdout.write(
+                f"[샤드 {shard_idx}] 지역 {', '.join(shard_stat.regions_done) or '-'}, 신규 {len(shard_stat.saved_codes)}, "
+                f"갱신 {shard_stat.dup_updated}, 스킵 {shard_stat.dup_skipped}, "
+                f"변경없음 {shard_stat.unchanged}, 실패 {shard_stat.failed}"
+            )
+            stats.merge(shard_stat)
+        for region, count in stats.region_counts.items():
+            self.stdout.write(f"[{region}] 신규 저장 {count}개")
+        self.stdout.write(f"총 {len(stats.saved_codes)}개 시설 DB 저장")
+        self.stdout.write(f"중복 스킵: {stats.dup_skipped}, 정보 갱신: {stats.dup_updated}, 실패: {stats.failed}")
+        self.stdout.write(f"내용이 바뀐 시설: {len(self.changed_codes)}, RAG 재색인 등록: {self.reindexed_count}")
+        if self.changed_only:
+            self.stdout.write(f"변경 없음(파싱/저장 생략): {stats.unchanged}")
+        for line in self.fetch_stats.summary_lines():
+            self.stdout.write(f"[상세 수집] {line}")
         self.stdout.write(f"{'='*60}")
         try:
             eval_count = await sync_to_async(core_models.FacilityEvaluation.objects.count)()
@@ -313,366 +270,424 @@ class Command(BaseCommand):
         except Exception:
             pass
 
-    def parse_detail(self, soup: BeautifulSoup, url: str) -> dict:
-        # 기존 전역 텍스트 기반 로직 이전에 시설 영역을 우선 파싱
-        container = soup.select_one('.section-view-title')
-        raw_text_all = soup.get_text(" ", strip=True)
-        data = {"raw_text": raw_text_all}
-        # 코드 추출 (view 경로에서 숫자)
-        m_code = re.search(r"/view/[^/]+/(\d+)", url)
-        if not m_code:
-            m_code = re.search(r"/(\d{6,})", url)
-        code = m_code.group(1) if m_code else url
-        overview = {"code": code}
-        if container:
-            # kind (data-kind)
-            kind = container.get('data-kind') or ''
-            if kind:
-                overview['kind'] = kind.strip()
-            # grade
-            grade_el = container.select_one('.section-view-grade')
-            if grade_el:
-                overview['grade'] = grade_el.get_text(strip=True)
-            # name
-            name_el = container.select_one('h3 em') or container.select_one('h3')
-            if name_el:
-                name_text = name_el.get_text(strip=True)
-                # 사이트명(시니어톡톡) 오탐 방지: 시설명에 공백/한글 다��� 포함 기대
-                if name_text and name_text != '시니어톡톡':
-                    overview['name'] = name_text
-            # address (추��� 위치 모델에 활용 가능)
-            addr_el = container.select_one('.section-view-address')
-            if addr_el:
-                overview['address'] = addr_el.get_text(strip=True)
-            # dl dt/dd 쌍 처리
-            dl = container.select_one('dl')
-            if dl:
-                dts = dl.find_all('dt')
-                dds = dl.find_all('dd')
-                for dt, dd in zip(dts, dds):
-                    label = dt.get_text(strip=True)
-                    value = dd.get_text(strip=True)
-                    if not label:
-                        continue
-                    if label == '정원':
-                        overview['capacity'] = self._parse_int(value)
-                    elif label == '현원':
-                        overview['occupancy'] = self._parse_int(value)
-                    elif label == '대기':
-                        overview['waiting'] = self._parse_int(value)
-                    elif label in ('이용가능', '이용 가능'):
-                        overview['availability'] = self._normalize_availability(value)
-        # fallback: 이름이 비어있으면 title/h1/h2 검색 (기존 방식 유지)
-        if 'name' not in overview:
-            for sel in ['h1', 'h2', 'title']:
-                el = soup.find(sel)
-                if el:
-                    txt = el.get_text(strip=True)
-                    if txt and txt != '시니니어톡톡':
-                        overview['name'] = txt
-                        break
-        data['overview'] = overview
-        # 이하 기존 평가/인력 등 나머지 파싱은 일단 비활성(추후 섹션별 구현 예정)
-        data['evaluation'] = {}
-        data['staff'] = {}
-        data['programs'] = {}
-        data['location'] = {}
-        data['non_covered'] = []
-        data['overview']['raw_text'] = raw_text_all
-
-        # 기본정보 섹션 파싱 (h4 '기본정보' 이후 .section-view-content2 내 첫번째 dl)
-        basic_items = []
-        basic_header = None
-        for h4 in soup.select('h4'):
-            if h4.get_text(strip=True) == '기본���보':
-                basic_header = h4
+    async def _retry_failed(self, browser, concurrency, rate, progress):
+        """실패한 상세 URL 을 백오프 시각에 맞춰 최대 MAX_ATTEMPTS 회까지 재시도"""
+        stats = CrawlStats()
+        while True:
+            retryable = await sync_to_async(self.frontier.retryable_details)()
+            if not retryable:
                 break
-        if basic_header:
-            # 형제/다음 요소에서 dl 찾기
-            section = basic_header.find_next('div', class_='section-view-content2')
-            if section:
-                dl = section.find('dl')
-                if dl:
-                    dts = dl.find_all('dt')
-                    dds = dl.find_all('dd')
-                    for dt, dd in zip(dts, dds):
-                        title_txt = dt.get_text(strip=True)
-                        # dd 내부 a 태그가 있으면 href 우선, 없으면 텍스트
-                        link = dd.find('a')
-                        if link and link.get('href'):
-                            content_txt = link.get('href').strip()
-                        else:
-                            content_txt = dd.get_text(strip=True)
-                        if title_txt:
-                            basic_items.append({'title': title_txt, 'content': content_txt})
-        data['basic_items'] = basic_items
-        # 평가정보 섹션 파싱 (h4 '평가정보')
-        evaluation_items = []
-        eval_header = None
-        for h4 in soup.select('h4'):
-            if h4.get_text(strip=True) == '평가정보':
-                eval_header = h4
-                break
-        if eval_header:
-            eval_section = eval_header.find_next('div', class_='section-view-content2')
-            if eval_section:
-                dl2 = eval_section.find('dl')
-                if dl2:
-                    dts2 = dl2.find_all('dt')
-                    dds2 = dl2.find_all('dd')
-                    for dt, dd in zip(dts2, dds2):
-                        t = dt.get_text(strip=True)
-                        c = dd.get_text(strip=True)
-                        if t:
-                            evaluation_items.append({'title': t, 'content': c})
-        data['evaluation_items'] = evaluation_items
-        # 인력현황 섹션 파싱 (h4 '인력현���')
-        staff_items = []
-        staff_header = None
-        for h4 in soup.select('h4'):
-            if h4.get_text(strip=True) == '인력현황':
-                staff_header = h4
-                break
-        if staff_header:
-            staff_section = staff_header.find_next('div', class_='section-view-content2')
-            if staff_section:
-                dl3 = staff_section.find('dl')
-                if dl3:
-                    dts3 = dl3.find_all('dt')
-                    dds3 = dl3.find_all('dd')
-                    for dt, dd in zip(dts3, dds3):
-                        tt = dt.get_text(strip=True)
-                        cc = dd.get_text(strip=True)
-                        if tt:
-                            staff_items.append({'title': tt, 'content': cc})
-        data['staff_items'] = staff_items
-        # 프로그램운영 섹션 파싱 (h4 '프로그램운영')
-        program_items = []
-        prog_header = None
-        for h4 in soup.select('h4'):
-            if h4.get_text(strip=True) == '프로그램운영':
-                prog_header = h4
-                break
-        if prog_header:
-            prog_section = prog_header.find_next('div', class_='section-view-content2')
-            if prog_section:
-                dlp = prog_section.find('dl')
-                if dlp:
-                    dts_p = dlp.find_all('dt')
-                    dds_p = dlp.find_all('dd')
-                    for dt, dd in zip(dts_p, dds_p):
-                        pt = dt.get_text(strip=True)
-                        pc_raw = dd.get_text(strip=True)
-                        # 콤마 기준 분리 유지 대신 원문 보존
-                        if pt:
-                            program_items.append({'title': pt, 'content': pc_raw})
-        data['program_items'] = program_items
-        # 위치 섹션 파싱 (h4 '위치') - 개별 항목으로 분리
-        location_items = []
-        loc_header = None
-        for h4 in soup.select('h4'):
-            if h4.get_text(strip=True) == '위치':
-                loc_header = h4
-                break
-        if loc_header:
-            # 주소 p
-            addr_block = loc_header.find_next('div', class_='section-view-content')
-            if addr_block:
-                addr_texts = []
-                for p in addr_block.find_all('p'):
-                    t = p.get_text(strip=True)
-                    if t:
-                        addr_texts.append(t)
-                if addr_texts:
-                    location_items.append({
-                        'title': '주소',
-                        'content': ' | '.join(addr_texts)
-                    })
-
-            # 교통/주차 dl - 각각 개별 항목으로 저장
-            loc_section2 = loc_header.find_next('div', class_='section-view-content2')
-            if loc_section2:
-                dl_loc = loc_section2.find('dl')
-                if dl_loc:
-                    dts_l = dl_loc.find_all('dt')
-                    dds_l = dl_loc.find_all('dd')
-                    for dt, dd in zip(dts_l, dds_l):
-                        label = dt.get_text(strip=True)
-                        val = dd.get_text(strip=True)
-                        if label and val:
-                            location_items.append({
-                                'title': label,
-                                'content': val
-                            })
-        data['location_items'] = location_items
-        # 홈페이지 섹션 파싱 (<b>홈페이지</b> 이후 첫 a href)
-        homepage_item = None
-        for b in soup.select('b'):
-            if b.get_text(strip=True) == '홈페이지':
-                a = b.find_next('a', href=True)
-                if a:
-                    # href 우선, 없으면 텍스트 (href 존재 명시)
-                    href = a.get('href', '').strip()
-                    if href:
-                        homepage_item = {'title': '홈페이지', 'content': href}
-                    else:
-                        txt = a.get_text(strip=True)
-                        if txt:
-                            homepage_item = {'title': '홈페이지', 'content': txt}
+            due_at = min((due for _, _, due in retryable if due), default=None)
+            if due_at:
+                wait = (due_at - timezone.now()).total_seconds()
+                if wait > 0:
+                    self.stdout.write(f"[재시도] 실패 {len(retryable)}건, {wait:.0f}초 후 재시도")
+                    await asyncio.sleep(wait)
+            now = timezone.now()
+            due = [(region, url) for region, url, due in retryable if due is None or due <= now]
+            progress.total += len(due)
+            stats.merge(await self._crawl_shard(
+                browser, asyncio.Queue(), 0, 0, concurrency, rate, progress, backlog=due,
+            ))
+            # 버퍼에 남은 성공분을 반영해야 frontier 에서 failed 가 풀려 다시 조회되지 않는다
+            await self._flush_writes()
+        return stats
+
+    async def _crawl_shard(self, browser, region_queue, total_regions, max_pages, concurrency, rate, progress, backlog=()):
+        """샤드 1개: 독립 컨텍스트/레이트 리미터로 backlog 와 지역 큐가 빌 때까지 크롤링하고 집계 반환"""
+        stats = CrawlStats()
+        context = await self._new_context(browser)
+        limiter = TokenBucket(rate=rate, burst=concurrency)
+
+        # 목록(producer) -> 큐 -> 상세 워커(consumer): 목록 수집과 상세 수집이 겹쳐 진행된다
+        queue = asyncio.Queue(maxsize=concurrency * 4)
+        detail_pages = [await context.new_page() for _ in range(concurrency)]
+        workers = [
+            asyncio.create_task(self._detail_worker(dpage, queue, limiter, stats, progress))
+            for dpage in detail_pages
+        ]
+        list_page = await context.new_page()
+        try:
+            for item in backlog:
+                await queue.put(item)
+            while not region_queue.empty():
+                region_idx, current_location = region_queue.get_nowait()
+                await self._produce_detail_links(
+                    list_page, current_location, f"{region_idx}/{total_regions}", max_pages, queue, limiter, progress
+                )
+                stats.regions_done.append(current_location.split('/')[0])
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            await context.close()
+        return stats
+
+    async def _new_context(self, browser):
+        context = await browser.new_context(
+            user_agent=USER_AGENT,
+            locale="ko-KR",
+            java_script_enabled=True,
+            extra_http_headers={
+                "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+                "Referer": "https://www.seniortalktalk.com/",
+            },
+            viewport={"width":1280,"height":1600}
+        )
+        # 리소스 절약: 이미지/폰트 차단
+        async def route_intercept(route, request):
+            if request.resource_type in ['image','media','font']:
+                await route.abort()
+            else:
+                await route.continue_()
+        await context.route("**/*", route_intercept)
+        return context
+
+    async def _safe_goto(self, pg, url, expect_selector=None):
+        last_err = None
+        for attempt in range(1, RETRY_COUNT+1):
+            try:
+                await pg.goto(url, wait_until='domcontentloaded', timeout=GOTO_TIMEOUT)
+                if expect_selector:
+                    try:
+                        await pg.wait_for_selector(expect_selector, timeout=8000)
+                    except Exception:
+                        pass
+                return True
+            except Exception as e:
+                last_err = e
+                self.stderr.write(f"[목록 이동 실패 {attempt}/{RETRY_COUNT}] {e}")
+                await asyncio.sleep(2*attempt)
+        if last_err:
+            fname = SCREENSHOT_DIR / f"fail_list_{int(asyncio.get_event_loop().time())}.png"
+            try:
+                await pg.screenshot(path=str(fname))
+            except Exception:
+                pass
+        return False
+
+    async def _safe_detail(self, dpage, durl):
+        """워커가 재사용하는 페이지로 상세 이동 후 HTML 반환 (실패 시 None)"""
+        for attempt in range(1, RETRY_COUNT+1):
+            try:
+                await dpage.goto(durl, wait_until='domcontentloaded', timeout=GOTO_TIMEOUT)
+                await dpage.wait_for_timeout(500)
+                return await dpage.content()
+            except Exception as e:
+                self.stderr.write(f"[상세 이동 실패 {attempt}/{RETRY_COUNT}] {durl} : {e}")
+                if attempt == RETRY_COUNT:
+                    try:
+                        await dpage.screenshot(path=str(SCREENSHOT_DIR / f"fail_detail_{int(asyncio.get_event_loop().time())}.png"))
+                    except Exception:
+                        pass
+                await asyncio.sleep(1.5*attempt)
+        return None
+
+    async def _auto_scroll(self, pg, max_rounds=8, pause=600):
+        last_height = await pg.evaluate("() => document.body.scrollHeight")
+        for i in range(max_rounds):
+            await pg.evaluate("() => window.scrollBy(0, document.body.scrollHeight)")
+            await pg.wait_for_timeout(pause)
+            new_height = await pg.evaluate("() => document.body.scrollHeight")
+            if new_height == last_height:
                 break
-        data['homepage_item'] = homepage_item
-        # 비급여 항목 섹션 파싱 (div.section-calc-label[data-focus="non_benefit"]) - 개별 항목으로 분리
-        noncov_items = []
-        label_div = soup.select_one('div.section-calc-label[data-focus="non_benefit"]')
-        if label_div and '비급여 항목' in label_div.get_text():
-            container_div = label_div.find_parent('div', class_='section-calc-content') or label_div.parent
-            # 월 합계는 제외하고 개별 항목만 저장
-            if container_div:
-                for li in container_div.select('div.section-calc-item ul li'):
-                    label = li.find('label')
-                    if not label:
-                        continue
-                    text = label.get_text(" ", strip=True)
-                    # 불필��한 다중 공백 정리
-                    text = re.sub(r'\s+', ' ', text)
-                    if text:
-                        # 항목명과 금액을 분리
-                        if ':' in text:
-                            title_part, content_part = text.split(':', 1)
-                            noncov_items.append({
-                                'title': title_part.strip(),
-                                'content': content_part.strip()
-                            })
-                        else:
-                            # ':' 가 없는 경우 공백으로 분리 시도
-                            parts = text.rsplit(' ', 1)
-                            if len(parts) == 2 and '원' in parts[1]:
-                                noncov_items.append({
-                                    'title': parts[0].strip(),
-                                    'content': parts[1].strip()
-                                })
-                            else:
-                                # 분리할 수 없는 경우 전체를 title로
-                                noncov_items.append({
-                                    'title': text,
-                                    'content': ''
-                                })
-        data['non_covered_items'] = noncov_items
-        return data
-
-    # 헬퍼: 숫자 파싱 (콤마 제거, '명' 제거)
-    def _parse_int(self, text_val: str):
-        if not text_val:
-            return None
-        cleaned = re.sub(r'[^0-9]', '', text_val)
-        if not cleaned:
+            last_height = new_height
+
+    def extract_detail_links(self, html: str) -> list:
+        """목록 HTML 에서 아직 보지 않은 상세 링크(절대 URL) 추출"""
+        soup = BeautifulSoup(html, "lxml")
+
+        # 후보: list, item, card 등 class 를 가진 a 태그 수집 (일반화)
+        anchors = []
+        for a in soup.find_all("a", href=True):
+            href_lower = a["href"].lower()
+            if "/search/view/" in href_lower:  # 우선 강제 패턴
+                anchors.append(a)
+            elif any(k in href_lower for k in DETAIL_KEYWORDS):
+                anchors.append(a)
+
+        # 중복 제거 & 절대 URL 보정
+        detail_links = []
+        for a in anchors:
+            href = a["href"].strip()
+            if href.startswith("javascript:"):
+                continue
+            if href.startswith("/"):
+                href = "https://www.seniortalktalk.com" + href
+            if href not in self.detail_urls_seen and href.startswith("http"):
+                self.detail_urls_seen.add(href)
+                detail_links.append(href)
+        return detail_links
+
+    async def _produce_detail_links(self, page, current_location, region_label, max_pages, queue, limiter, progress):
+        """지역 1곳의 목록 페이지를 순회하며 상세 링크를 큐에 넣는다"""
+        self.stdout.write(f"\n{'='*60}")
+        self.stdout.write(f"[{region_label}] {current_location} 크롤링 시작")
+        self.stdout.write(f"{'='*60}")
+
+        empty_page_count = 0
+        region_name = current_location.split('/')[0]
+
+        # 해당 지역의 페이지별 순회
+        for page_no in range(1, max_pages + 1):
+            query = DEFAULT_QUERY.copy()
+            query["location"] = current_location
+            query["page"] = page_no
+
+            url = f"{SEARCH_BASE_URL}?{urlencode(query, doseq=True)}"
+
+            # 재개: 이미 처리한 목록 페이지는 당시 링크 수만 반영하고 건너뜀
+            done_link_count = await sync_to_async(self.frontier.list_page_link_count)(url)
+            if done_link_count is not None:
+                empty_page_count = 0 if done_link_count else empty_page_count + 1
+                if empty_page_count >= 3:
+                    break
+                continue
+
+            self.stdout.write(f"[{current_location}] 페이지 {page_no} 이동: {url}")
+            await limiter.acquire()
+            ok = await self._safe_goto(page, url, expect_selector='a')
+            if not ok:
+                continue
+
+            # 자동 스크롤 수행 (동적 로딩 대비)
+            await self._auto_scroll(page)
+            html = await page.content()
+
+            # 디버그 스냅샷 저장
+            debug_path = SCREENSHOT_DIR / f"{region_name}_page{page_no}.html"
+            debug_path.write_text(html, encoding='utf-8')
+
+            detail_links = self.extract_detail_links(html)
+
+            # 링크 디버그 저장
+            link_debug_file = SCREENSHOT_DIR / f"{region_name}_links_page{page_no}.txt"
+            link_debug_file.write_text("\n".join(detail_links), encoding='utf-8')
+
+            # 상세 링크를 frontier 에 먼저 기록한 뒤 목록 페이지를 완료 처리 (중단돼도 링크 유실 없음)
+            await sync_to_async(self.frontier.add_details)(region_name, detail_links)
+            await sync_to_async(self.frontier.mark_list_page)(url, region_name, page_no, len(detail_links))
+
+            if not detail_links:
+                empty_page_count += 1
+                self.stdout.write(f"[{current_location}] 페이지 {page_no} 상세 링크 0개")
+                # 연속 3페이지 이상 비어있으면 해당 지역 크롤링 종료
+                if empty_page_count >= 3:
+                    self.stdout.write(f"[{current_location}] 연속 {empty_page_count}페이지 비어있음 - 해당 지역 크롤링 종료")
+                    break
+                continue
+
+            empty_page_count = 0  # 링크가 있으면 카운터 리셋
+            self.stdout.write(f"[{current_location}] 페이지 {page_no} 상세 링크 {len(detail_links)}개")
+            progress.total += len(detail_links)
+            progress.refresh()
+            for link in detail_links:
+                await queue.put((region_name, link))
+
+    async def _detail_worker(self, dpage, queue, limiter, stats, progress):
+        """큐에서 상세 링크를 꺼내 자신의 페이지로 순차 처리 (None 수신 시 종료)"""
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                region_name, link = item
+                try:
+                    await self._process_detail(dpage, link, region_name, limiter, stats)
+                except Exception as e:
+                    stats.failed += 1
+                    self.stderr.write(f"[오류] {link}: {e}\n")
+                    await sync_to_async(self.frontier.mark_detail_failed)(link, str(e))
+                finally:
+                    progress.update(1)
+        finally:
+            await dpage.close()
+
+    async def _process_detail(self, dpage, link, region_name, limiter, stats):
+        page_key = detail_page_key(link)
+        known = self.fingerprints.get(page_key)
+        # 변경분 모드에서만 조건부 요청 (304 면 본문이 없어 파싱할 수 없으므로)
+        detail = await self._fetch_detail(dpage, link, limiter, known if self.changed_only else None)
+        if detail is None:
+            stats.failed += 1
+            await sync_to_async(self.frontier.mark_detail_failed)(link, '상세 페이지 수집 실패')
+            return
+        if detail.not_modified:
+            content_hash = known.content_hash
+        else:
+            content_hash = await asyncio.to_thread(fingerprint_detail, detail.soup)
+        if self.changed_only and known and known.content_hash == content_hash:
+            # 변경 없음: 파싱/저장 생략, 이전 점수로 중복 판정만 유지
+            if known.richness is not None and known.richness > self.best_scores.get(known.code, -1):
+                self.best_scores[known.code] = known.richness
+            await sync_to_async(self.frontier.mark_detail_done)(link, known.code, known.richness)
+            stats.unchanged += 1
+            return
+        await self._handle_detail_soup(
+            detail.soup, link, region_name, stats,
+            fingerprint=(page_key, content_hash, detail.etag, detail.last_modified),
+        )
+
+    async def _fetch_detail(self, dpage, link, limiter, known=None):
+        """상세 페이지 수집: HTTP 우선(설정 시), 필요한 DOM 이 없으면 Playwright 폴백
+
+        known(FacilityFingerprint) 이 주어지면 HTTP 요청을 서버 검증자로 조건부 요청한다.
+        """
+        if self.http_fetcher is not None:
+            await limiter.acquire()
+            result = await timed(self.fetch_stats, 'http', asyncio.to_thread(
+                self.http_fetcher.fetch, link,
+                known.etag if known else '', known.last_modified if known else '',
+            ))
+            if result.not_modified:
+                return DetailPage(not_modified=True, etag=result.etag, last_modified=result.last_modified)
+            if result.html:
+                # HTML 파싱은 CPU 작업이라 이벤트 루프 밖에서 (다른 워커의 요청/속도 제한이 멈추지 않도록)
+                dsoup = await asyncio.to_thread(_detail_soup, result.html)
+                if dsoup is not None:
+                    self._write_snapshot(link, result.html)
+                    return DetailPage(soup=dsoup, etag=result.etag, last_modified=result.last_modified)
+            self.fetch_stats.fallbacks += 1
+        await limiter.acquire()
+        html = await timed(self.fetch_stats, 'playwright', self._safe_detail(dpage, link))
+        if html is None:
             return None
+        self._write_snapshot(link, html)
+        return DetailPage(soup=await asyncio.to_thread(BeautifulSoup, html, "lxml"))
+
+    def _write_snapshot(self, link, html):
+        if not getattr(self, 'save_snapshots', False):
+            return
+        name = snapshot_name(link)
+        if name:
+            (DETAIL_SNAPSHOT_DIR / name).write_text(html, encoding='utf-8')
+
+    async def _handle_detail_soup(self, dsoup, link, region_name, stats, fingerprint=None):
+        """상세 페이지 파싱 후 풍부도 점수 기준 중복 판정 및 저장 버퍼 추가 -> (code, richness)
+
+        fingerprint 는 (page_key, content_hash, etag, last_modified) 로, 저장이 반영될 때 함께 기록된다.
+        """
+        data, richness = await asyncio.to_thread(self._parse_with_score, dsoup, link)
+        code = data.get('overview', {}).get('code')
+        done = (link, code, richness, fingerprint)
+        # 저장 완료 점수와 아직 버퍼에 있는 점수 중 높은 쪽과 비교 (여기부터 버퍼 추가까지 await 없음)
+        previous = max(self.best_scores.get(code, -1), self._buffered_scores.get(code, -1))
+        if code in self.best_scores or code in self._buffered_scores:
+            if richness <= previous:
+                await sync_to_async(self._record_done, thread_sensitive=True)([done])
+                stats.dup_skipped += 1
+                self.stdout.write(f"[중복-스킵] {code} (기존 점수 {previous}, 새 점수 {richness})")
+                return code, richness
+            updated = True
+        else:
+            updated = False
+        if not code:
+            await sync_to_async(self._record_done, thread_sensitive=True)([done])
+            return code, richness
+        # best_scores 는 배치 저장이 성공한 뒤 _flush_writes 에서 갱신
+        self._buffered_scores[code] = richness
+        full = self.writer.add(data)
+        self._pending_done.append(done)
+        self._pending_saves.append((stats, region_name, code, richness, updated))
+        if full:
+            await self._flush_writes()
+        return code, richness
+
+    async def _flush_writes(self):
+        """버퍼의 시설을 배치 저장하고, 해당 상세들의 frontier/지문 완료를 같은 트랜잭션에서 기록"""
+        items = self.writer.take()
+        done, self._pending_done = self._pending_done, []
+        saves, self._pending_saves = self._pending_saves, []
+        if items or done:
+            scores = {code: richness for _, code, richness, _ in done if code}
+            try:
+                changes = await sync_to_async(self._write_batch, thread_sensitive=True)(items, done)
+            except Exception as e:
+                # 배치 전체가 롤백됨: 각 상세를 실패로 기록해 재시도 대상으로 남긴다
+                self.stderr.write(f"[오류] 배치 저장 실패 ({len(done)}건): {e}\n")
+                for link, _, _, _ in done:
+                    await sync_to_async(self.frontier.mark_detail_failed)(link, f'저장 실패: {e}')
+                for stats, _, _, _, _ in saves:
+                    stats.failed += 1
+                changes = None
+            else:
+                for code, richness in scores.items():
+                    if richness > self.best_scores.get(code, -1):
+                        self.best_scores[code] = richness
+                for stats, region_name, code, richness, updated in saves:
+                    if updated:
+                        stats.dup_updated += 1
+                        self.stdout.write(f"[갱신] {code} (점수 {richness})")
+                    else:
+                        stats.saved_codes.add(code)
+                        stats.region_counts[region_name] += 1
+                        self.stdout.write(f"[저장] {code} (점수 {richness})")
+            finally:
+                # 저장 중 같은 code 가 더 높은 점수로 다시 버퍼에 들어왔으면 그 점수는 유지
+                for code, richness in scores.items():
+                    if self._buffered_scores.get(code) == richness:
+                        del self._buffered_scores[code]
+            if changes is None:
+                return
+            self._note_changes(changes)
+            if self.reindex_every and len(self.reindex_pending) >= self.reindex_every:
+                await self._reindex_changed()
+
+    def _note_changes(self, changes):
+        """writer 결과 중 내용이 바뀐 시설을 기록 (RAG 재색인 대상)"""
+        codes = {code for code, change in changes.items() if change.changed}
+        self.changed_codes |= codes
+        self.reindex_pending |= codes
+
+    async def _reindex_changed(self):
+        if not self.reindex_enabled or not self.reindex_pending:
+            return
+        codes, self.reindex_pending = self.reindex_pending, set()
+        # 작업 등록(INSERT 1~2회)만 하므로 공유 sync 스레드에서 실행해도 다른 DB 작업을 오래 막지 않는다
+        await sync_to_async(self._reindex, thread_sensitive=True)(codes)
+
+    def _reindex(self, codes):
+        """바뀐 시설의 재색인 작업을 대기열에 등록 (임베딩/색인 쓰기는 웹 워커가 실행, core.indexing 참고)"""
+        from core.indexing import IndexingBusy, enqueue_reindex
+
+        facility_ids = list(core_models.Facility.objects.filter(code__in=codes).values_list('id', flat=True))
         try:
-            return int(cleaned)
-        except Exception:
+            job = enqueue_reindex(facility_ids)
+        except IndexingBusy:
+            # 다음 등록 때 다시 시도
+            self.reindex_pending |= set(codes)
+            self.stderr.write(f"[재색인] 다른 색인 작업이 실행 중이라 {len(facility_ids)}개 시설을 보류합니다")
             return None
+        self.reindexed_count += len(facility_ids)
+        self.stdout.write(f"[재색인] 변경 시설 {len(facility_ids)}개 -> 색인 작업 #{job.pk} 대기 (웹 워커가 반영)")
+        return job
 
-    # 헬퍼: 이용가능 상태 정규화
-    def _normalize_availability(self, val: str) -> str:
-        v = (val or '').strip()
-        if '가능' in v and ('불' not in v and '불가' not in v):
-            return '가능'
-        if '불가' in v or '불가능' in v or '마감' in v:
-            return '불가능'
-        return v
+    def _write_batch(self, items, done):
+        with transaction.atomic():
+            changes = self.writer.write(items)
+            self._record_done(done)
+        return changes
+
+    def _record_done(self, done):
+        self.frontier.mark_details_done([(link, code, richness) for link, code, richness, _ in done])
+        self.fingerprints.record_many([
+            (fp[0], code, fp[1], fp[2], fp[3], richness)
+            for _, code, richness, fp in done if fp is not None
+        ])
+
+    def parse_detail(self, soup: BeautifulSoup, url: str) -> dict:
+        return parse_detail(soup, url)
+
+    def _parse_with_score(self, soup: BeautifulSoup, url: str):
+        """파싱 + 풍부도 점수 (asyncio.to_thread 로 실행)"""
+        data = self.parse_detail(soup, url)
+        return data, _compute_richness(data)
 
     def save_to_db(self, data: dict):
-        ov = data.get('overview') or {}
-        code = ov.get('code')
+        """시설 1개 즉시 저장 (배치 저장은 FacilityBatchWriter 사용)"""
+        code = (data.get('overview') or {}).get('code')
         if not code:
             return None
-        name = ov.get('name') or code
-        kind = ov.get('kind') or ''
-        grade = ov.get('grade') or ''
-        availability = ov.get('availability') or ''
-        capacity = ov.get('capacity')
-        occupancy = ov.get('occupancy')
-        waiting = ov.get('waiting')
-
-        from core.models import Facility, FacilityBasic  # 지연 import
-        with transaction.atomic():
-            facility, created = Facility.objects.get_or_create(code=code, defaults={
-                'name': name,
-                'kind': kind,
-                'grade': grade,
-                'availability': availability,
-                'capacity': capacity,
-                'occupancy': occupancy,
-                'waiting': waiting,
-            })
-            # 업데이트 필요 필드만 반영
-            changed = False
-            for field, value in {
-                'name': name,
-                'kind': kind,
-                'grade': grade,
-                'availability': availability,
-                'capacity': capacity,
-                'occupancy': occupancy,
-                'waiting': waiting,
-            }.items():
-                if value is not None and getattr(facility, field) != value:
-                    setattr(facility, field, value)
-                    changed = True
-            if changed:
-                facility.save()
-
-            # 기본정보 항목 저장 (재생성)
-            basic_items = data.get('basic_items') or []
-            if basic_items:
-                FacilityBasic.objects.filter(facility=facility).delete()
-                FacilityBasic.objects.bulk_create([
-                    FacilityBasic(facility=facility, title=item['title'][:100], content=item['content'])
-                    for item in basic_items if item.get('title')
-                ])
-            # 평가정보 항목 저장 (재생성)
-            from core.models import FacilityEvaluation
-            eval_items = data.get('evaluation_items') or []
-            if eval_items:
-                FacilityEvaluation.objects.filter(facility=facility).delete()
-                FacilityEvaluation.objects.bulk_create([
-                    FacilityEvaluation(facility=facility, title=item['title'][:100], content=item['content'])
-                    for item in eval_items if item.get('title')
-                ])
-            # 인력현황 항목 저장 (재생성)
-            from core.models import FacilityStaff
-            staff_items = data.get('staff_items') or []
-            if staff_items:
-                FacilityStaff.objects.filter(facility=facility).delete()
-                FacilityStaff.objects.bulk_create([
-                    FacilityStaff(facility=facility, title=item['title'][:100], content=item['content'])
-                    for item in staff_items if item.get('title')
-                ])
-            # 프로그램운영 항목 저장 (재생성)
-            from core.models import FacilityProgram
-            program_items = data.get('program_items') or []
-            if program_items:
-                FacilityProgram.objects.filter(facility=facility).delete()
-                FacilityProgram.objects.bulk_create([
-                    FacilityProgram(facility=facility, title=item['title'][:100], content=item['content'])
-                    for item in program_items if item.get('title')
-                ])
-            # 위치 항목 저장 (개별 항목으로 재생성)
-            from core.models import FacilityLocation
-            location_items = data.get('location_items') or []
-            FacilityLocation.objects.filter(facility=facility).delete()
-            for item in location_items:
-                FacilityLocation.objects.create(facility=facility, title=item['title'], content=item['content'])
-            # 홈페이지 항목 저장 (OneToOne 재생성)
-            from core.models import FacilityHomepage
-            homepage_item = data.get('homepage_item')
-            if homepage_item:
-                FacilityHomepage.objects.filter(facility=facility).delete()
-                FacilityHomepage.objects.create(facility=facility, title=homepage_item['title'], content=homepage_item['content'])
-            # 비급여 항목 ��장 (개별 항목으로 재생성)
-            from core.models import FacilityNonCovered
-            noncov_items = data.get('non_covered_items') or []
-            FacilityNonCovered.objects.filter(facility=facility).delete()
-            for item in noncov_items:
-                FacilityNonCovered.objects.create(facility=facility, title=item['title'], content=item['content'])
-        return facility
+        changes = FacilityBatchWriter().write({code: data})
+        self._note_changes(changes)
+        return core_models.Facility.objects.get(pk=changes[code].facility_id)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.attributes import rebuild_attributes
+
+
+class Command(BaseCommand):
+    help = "저장된 섹션 행(기본/평가/인력/비급여)에서 정형 속성 테이블 전체 재생성"
+
+    def handle(self, *args, **options):
+        count = rebuild_attributes()
+        self.stdout.write(self.style.SUCCESS(f"시설 속성 {count}개 생성"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.fulltext import fulltext_available, rebuild_fulltext
+
+
+class Command(BaseCommand):
+    help = "시설 전문 검색(FTS5) 색인 전체 재생성 (/api/facilities/search/)"
+
+    def handle(self, *args, **options):
+        if not fulltext_available():
+            self.stderr.write("전문 검색 색인은 SQLite 에서만 지원됩니다")
+            return
+        count = rebuild_fulltext()
+        self.stdout.write(self.style.SUCCESS(f"시설 {count}개 색인 완료"))
@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+from tqdm import tqdm
+
+from core.crawler.fetch import has_detail_markup
+from core.crawler.parser import parse_detail
+from core.crawler.snapshots import snapshot_url
+from core.crawler.writer import FacilityBatchWriter
+from core.management.commands.crawl_nursinghomes import _compute_richness
+
+
+def _parse_snapshot(path: str):
+    """워커 프로세스: 스냅샷 1개 파싱 -> (richness, data) / 상세 페이지가 아니면 (None, None)"""
+    url = snapshot_url(path)
+    if url is None:
+        return None, None
+    with open(path, encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), "lxml")
+    if not has_detail_markup(soup):
+        return None, None
+    data = parse_detail(soup, url)
+    richness = _compute_richness(data)
+    # 저장에 쓰이지 않는 전체 텍스트는 프로세스 간 전송/메모리 절약을 위해 제외
+    data.pop('raw_text', None)
+    data['overview'].pop('raw_text', None)
+    return richness, data
+
+
+class Command(BaseCommand):
+    help = "저장된 상세 HTML 스냅샷을 네트워크 없이 재파싱해 DB 에 반영 (파서 수정 배포용)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", nargs="?", default="crawl_debug/details", help="스냅샷 디렉터리 (기본: crawl_debug/details)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="파싱 프로세스 수 (기본: CPU 수)")
+        parser.add_argument("--batch-size", type=int, default=200, help="DB 반영 배치 크기 (기본:200)")
+
+    def handle(self, *args, **options):
+        directory = Path(options["directory"])
+        paths = sorted(str(p) for p in directory.glob("*.html"))
+        if not paths:
+            self.stderr.write(f"{directory} 에 HTML 스냅샷이 없습니다")
+            return
+        batch_size = max(1, options["batch_size"])
+        workers = max(1, options["workers"])
+
+        # 같은 code 의 스냅샷이 여러 개면 크롤러와 같이 풍부도 점수가 가장 높은 것만 반영
+        best = {}  # code -> (richness, data)
+        skipped = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_parse_snapshot, paths, chunksize=max(1, len(paths) // (workers * 8)))
+            for richness, data in tqdm(results, total=len(paths), desc="파싱", unit="file"):
+                if data is None:
+                    skipped += 1
+                    continue
+                code = data['overview']['code']
+                if code not in best or richness > best[code][0]:
+                    best[code] = (richness, data)
+
+        writer = FacilityBatchWriter(batch_size=batch_size)
+        codes = list(best)
+        saved = changed = 0
+        with tqdm(total=len(codes), desc="저장", unit="fac") as progress:
+            for i in range(0, len(codes), batch_size):
+                batch = {code: best[code][1] for code in codes[i:i+batch_size]}
+                changes = writer.write(batch)
+                saved += len(changes)
+                changed += sum(1 for change in changes.values() if change.changed)
+                progress.update(len(batch))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"스냅샷 {len(paths)}개 중 상세 {len(paths) - skipped}개 파싱, 시설 {saved}개 반영, 내용 변경 {changed}개 (건너뜀 {skipped}개)"
+        ))
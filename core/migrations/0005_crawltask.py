@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_chatmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('list', '목록 페이지'), ('detail', '상세 페이지')], max_length=10)),
+                ('url', models.CharField(max_length=1000, unique=True)),
+                ('region', models.CharField(blank=True, max_length=32)),
+                ('page_no', models.PositiveIntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', '대기'), ('done', '완료'), ('failed', '실패')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('link_count', models.PositiveIntegerField(blank=True, help_text='목록 페이지의 상세 링크 수', null=True)),
+                ('facility_code', models.CharField(blank=True, max_length=32)),
+                ('richness', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': '크롤링 작업',
+                'verbose_name_plural': '크롤링 작업',
+                'indexes': [models.Index(fields=['kind', 'status'], name='core_crawlt_kind_afbf8e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_crawltask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacilityFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('page_key', models.CharField(max_length=255, unique=True)),
+                ('code', models.CharField(db_index=True, max_length=32)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('richness', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': '상세 페이지 지문',
+                'verbose_name_plural': '상세 페이지 지문',
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:48
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# 기존 시설 속성 채우기: 작성 시점 core.attributes 의 추출 규칙을 그대로 둔다 (이후 코드 변경과 무관하도록)
+NUMBER_RE = re.compile(r'(?<![\d.\-])(\d[\d,]*(?:\.\d+)?)(?![\d\-])\s*(원|명|점|개|%|세|회|시간|일)?')
+TEXT_MAX_LENGTH = 64
+SECTION_MODELS = (
+    ('basic', 'FacilityBasic'),
+    ('evaluation', 'FacilityEvaluation'),
+    ('staff', 'FacilityStaff'),
+    ('noncovered', 'FacilityNonCovered'),
+)
+
+
+def _parse_value(content):
+    content = re.sub(r'\s+', ' ', content or '').strip()
+    text = content if len(content) <= TEXT_MAX_LENGTH else ''
+    m = NUMBER_RE.search(content)
+    if not m:
+        return None, '', text
+    return float(m.group(1).replace(',', '')), m.group(2) or '', text
+
+
+def backfill_attributes(apps, schema_editor):
+    FacilityAttribute = apps.get_model('core', 'FacilityAttribute')
+    attrs = []
+    for section, model_name in SECTION_MODELS:
+        rows = apps.get_model('core', model_name).objects.order_by('facility_id', 'id')
+        seen = set()
+        for facility_id, title, content in rows.values_list('facility_id', 'title', 'content').iterator(chunk_size=2000):
+            key = re.sub(r'\s+', ' ', title or '').strip()[:100]
+            if not key or (facility_id, key) in seen:
+                continue
+            number, unit, text = _parse_value(content)
+            if number is None and not text:
+                continue
+            seen.add((facility_id, key))
+            attrs.append(FacilityAttribute(
+                facility_id=facility_id, section=section, key=key, number=number, unit=unit, text=text,
+            ))
+    FacilityAttribute.objects.bulk_create(attrs, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_facility_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacilityAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('section', models.CharField(choices=[('basic', '기본정보'), ('evaluation', '평가정보'), ('staff', '인력현황'), ('noncovered', '비급여 항목')], max_length=16)),
+                ('key', models.CharField(help_text='항목명 (섹션 행 title)', max_length=100)),
+                ('number', models.FloatField(blank=True, help_text='content 의 첫 숫자 (예: 300,000원 -> 300000)', null=True)),
+                ('unit', models.CharField(blank=True, help_text='숫자 뒤 단위 (원/명/점 등)', max_length=8)),
+                ('text', models.CharField(blank=True, help_text='짧은 content 원문 (등급 등 열거값)', max_length=64)),
+                ('facility', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='core.facility')),
+            ],
+            options={
+                'verbose_name': '시설 속성',
+                'verbose_name_plural': '시설 속성',
+                'indexes': [models.Index(fields=['section', 'key', 'number'], name='facility_attr_number_idx'), models.Index(fields=['section', 'key', 'text'], name='facility_attr_text_idx')],
+                'constraints': [models.UniqueConstraint(fields=('facility', 'section', 'key'), name='facility_attribute_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_attributes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+FTS_TABLE = 'core_facility_fts'
+# 기존 시설 색인 채우기용 문서 구성 (작성 시점 RAG 시설 문서 형식, 이후 코드 변경과 무관하도록 고정)
+# 시/군/구 줄은 빠지지만 주소는 위치정보 섹션에 있고, 시설이 다시 저장되면 현재 형식으로 교체된다.
+DOCUMENT_SECTIONS = (
+    ('FacilityBasic', "기본정보:"),
+    ('FacilityEvaluation', "평가정보:"),
+    ('FacilityStaff', "인력현황:"),
+    ('FacilityProgram', "프로그램 운영:"),
+    ('FacilityLocation', "위치정보:"),
+    ('FacilityNonCovered', "비급여 항목:"),
+)
+BACKFILL_BATCH = 1000
+
+
+def create_fts(apps, schema_editor):
+    # FTS5 는 SQLite 전용 (다른 DB 에서는 전문 검색 색인 없이 동작)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(name, body, tokenize='unicode61', prefix='2 3')"
+    )
+
+
+def _documents(apps, facilities):
+    sections = {}
+    ids = [facility.id for facility in facilities]
+    for model_name, heading in DOCUMENT_SECTIONS:
+        rows = apps.get_model('core', model_name).objects.filter(facility_id__in=ids).order_by('id')
+        for facility_id, title, content in rows.values_list('facility_id', 'title', 'content'):
+            sections.setdefault((facility_id, heading), []).append(f"- {title}: {content}")
+    for facility in facilities:
+        parts = [
+            f"시설명: {facility.name}",
+            f"종류: {facility.kind}",
+            f"등급: {facility.grade}",
+            f"이용가능: {facility.availability}",
+        ]
+        if facility.capacity:
+            parts.append(f"정원: {facility.capacity}명")
+        if facility.occupancy:
+            parts.append(f"현원: {facility.occupancy}명")
+        if facility.waiting:
+            parts.append(f"대기: {facility.waiting}명")
+        for _, heading in DOCUMENT_SECTIONS:
+            lines = sections.get((facility.id, heading))
+            if lines:
+                parts.append(heading)
+                parts.extend(lines)
+        yield facility.id, facility.name, "\n".join(parts)
+
+
+def backfill_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Facility = apps.get_model('core', 'Facility')
+    facilities = list(Facility.objects.order_by('id'))
+    with schema_editor.connection.cursor() as cursor:
+        for i in range(0, len(facilities), BACKFILL_BATCH):
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, body) VALUES (%s, %s, %s)",
+                list(_documents(apps, facilities[i:i + BACKFILL_BATCH])),
+            )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_facilityattribute'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+        migrations.RunPython(backfill_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+import re
+
+from django.db import migrations
+
+# 마이그레이션은 이후 코드 변경에 영향받지 않도록 core.fulltext 를 import 하지 않고 작성 시점 값을 둔다
+FTS_TABLE = 'core_facility_fts'
+NGRAM_TABLE = 'core_facility_ngram'
+
+
+def char_bigrams(text):
+    """단어별 문자 bigram (2글자 이하 단어는 그대로), 소문자화 (작성 시점 core.fulltext.char_ngrams)"""
+    grams = []
+    for word in re.findall(r'\w+', (text or '').lower()):
+        if len(word) <= 2:
+            grams.append(word)
+        else:
+            grams.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def create_ngram(apps, schema_editor):
+    # FTS5 는 SQLite 전용 (다른 DB 에서는 하이브리드 검색의 어휘 단계 없이 동작)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {NGRAM_TABLE} USING fts5(grams, tokenize='unicode61')"
+    )
+    # 기존 전문 검색 색인의 문서로 bigram 색인 채우기
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT rowid, body FROM {FTS_TABLE}")
+        rows = [(rowid, ' '.join(char_bigrams(body))) for rowid, body in cursor.fetchall()]
+        cursor.executemany(f"INSERT INTO {NGRAM_TABLE} (rowid, grams) VALUES (%s, %s)", rows)
+
+
+def drop_ngram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {NGRAM_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_facility_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_ngram, drop_ngram),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_facility_ngram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('queued', '대기'), ('running', '실행 중'), ('done', '완료'), ('failed', '실패')], default='queued', max_length=10)),
+                ('phase', models.CharField(choices=[('queued', '대기'), ('loading', '모델/색인 로딩'), ('embedding', '임베딩'), ('finalizing', '정리'), ('done', '완료')], default='queued', max_length=12)),
+                ('rebuild', models.BooleanField(default=False)),
+                ('total', models.PositiveIntegerField(default=0, help_text='대상 시설 수')),
+                ('processed', models.PositiveIntegerField(default=0, help_text='처리한 시설 수')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('stats', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': '벡터 색인 작업',
+                'verbose_name_plural': '벡터 색인 작업',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
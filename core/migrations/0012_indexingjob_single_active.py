@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_indexingjob'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='indexingjob',
+            constraint=models.UniqueConstraint(models.Value(True), condition=models.Q(('status__in', ('queued', 'running'))), name='single_active_indexing_job'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_indexingjob_single_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexingjob',
+            name='facility_ids',
+            field=models.JSONField(blank=True, help_text='재색인 대상 시설 id 목록 (없으면 전체)', null=True),
+        ),
+    ]
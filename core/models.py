@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 
@@ -19,6 +20,13 @@ class Facility(TimestampedModel):
     waiting = models.PositiveIntegerField(null=True, blank=True, verbose_name='대기')
     class Meta:
         ordering = ["name"]
+        # 목록 API: 이름순 정렬 + 등급/유형/입소가능 여부 필터 (필터 후 정렬까지 인덱스로 처리)
+        indexes = [
+            models.Index(fields=["name"], name="facility_name_idx"),
+            models.Index(fields=["grade", "name"], name="facility_grade_name_idx"),
+            models.Index(fields=["kind", "name"], name="facility_kind_name_idx"),
+            models.Index(fields=["availability", "name"], name="facility_avail_name_idx"),
+        ]
         verbose_name = "시설"
         verbose_name_plural = "시설"
     def __str__(self):
@@ -95,6 +103,36 @@ class FacilityNonCovered(TimestampedModel):
         return f"{self.facility.code}-{self.title}"
 
 
+class FacilityAttribute(TimestampedModel):
+    """섹션 행(title/content)에서 추출한 정형 속성 (SQL 필터/RAG 사전 필터용, core.attributes 에서 생성)"""
+    SECTION_CHOICES = (
+        ('basic', '기본정보'),
+        ('evaluation', '평가정보'),
+        ('staff', '인력현황'),
+        ('noncovered', '비급여 항목'),
+    )
+    facility = models.ForeignKey(Facility, on_delete=models.CASCADE, related_name='attributes')
+    section = models.CharField(max_length=16, choices=SECTION_CHOICES)
+    key = models.CharField(max_length=100, help_text="항목명 (섹션 행 title)")
+    number = models.FloatField(null=True, blank=True, help_text="content 의 첫 숫자 (예: 300,000원 -> 300000)")
+    unit = models.CharField(max_length=8, blank=True, help_text="숫자 뒤 단위 (원/명/점 등)")
+    text = models.CharField(max_length=64, blank=True, help_text="짧은 content 원문 (등급 등 열거값)")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['facility', 'section', 'key'], name='facility_attribute_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['section', 'key', 'number'], name='facility_attr_number_idx'),
+            models.Index(fields=['section', 'key', 'text'], name='facility_attr_text_idx'),
+        ]
+        verbose_name = '시설 속성'
+        verbose_name_plural = '시설 속성'
+
+    def __str__(self):
+        return f"{self.facility_id}-{self.section}:{self.key}"
+
+
 class ChatMessage(TimestampedModel):
     """로그인된 사용자의 채팅 기록"""
     ROLE_CHOICES = (
@@ -110,8 +148,126 @@ class ChatMessage(TimestampedModel):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [models.Index(fields=['user', 'created_at'], name='chatmsg_user_created_idx')]
         verbose_name = '채팅 기록'
         verbose_name_plural = '채팅 기록'
 
     def __str__(self):
         return f"{self.user.username} - {self.role}: {self.content[:20]}"
+
+
+class CrawlTask(TimestampedModel):
+    """크롤링 frontier: 목록 페이지/상세 URL 단위 진행 상태 (--resume 재개용)"""
+    KIND_CHOICES = (
+        ('list', '목록 페이지'),
+        ('detail', '상세 페이지'),
+    )
+    STATUS_CHOICES = (
+        ('pending', '대기'),
+        ('done', '완료'),
+        ('failed', '실패'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    url = models.CharField(max_length=1000, unique=True)
+    region = models.CharField(max_length=32, blank=True)
+    page_no = models.PositiveIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    link_count = models.PositiveIntegerField(null=True, blank=True, help_text="목록 페이지의 상세 링크 수")
+    facility_code = models.CharField(max_length=32, blank=True)
+    richness = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['kind', 'status'])]
+        verbose_name = '크롤링 작업'
+        verbose_name_plural = '크롤링 작업'
+
+    def __str__(self):
+        return f"[{self.kind}/{self.status}] {self.url}"
+
+
+class FacilityFingerprint(TimestampedModel):
+    """상세 페이지별 변경 감지용 지문 (정규화 HTML 해시 + 서버 검증자)
+
+    같은 시설 code 가 서비스 유형별로 여러 상세 URL(/search/view/<유형>/<code>)을 가지므로
+    URL 경로(page_key) 단위로 저장한다.
+    """
+    page_key = models.CharField(max_length=255, unique=True)
+    code = models.CharField(max_length=32, db_index=True)
+    content_hash = models.CharField(max_length=64)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    richness = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = '상세 페이지 지문'
+        verbose_name_plural = '상세 페이지 지문'
+
+    def __str__(self):
+        return f"{self.page_key} ({self.content_hash[:8]})"
+
+
+class IndexingJob(TimestampedModel):
+    """RAG 임베딩(벡터 색인) 백그라운드 작업 진행 상태 (/api/initialize-rag/, 크롤러 재색인 대기열)"""
+    STATUS_CHOICES = (
+        ('queued', '대기'),
+        ('running', '실행 중'),
+        ('done', '완료'),
+        ('failed', '실패'),
+    )
+    PHASE_CHOICES = (
+        ('queued', '대기'),
+        ('loading', '모델/색인 로딩'),
+        ('embedding', '임베딩'),
+        ('finalizing', '정리'),
+        ('done', '완료'),
+    )
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    phase = models.CharField(max_length=12, choices=PHASE_CHOICES, default='queued')
+    rebuild = models.BooleanField(default=False)
+    facility_ids = models.JSONField(null=True, blank=True, help_text="재색인 대상 시설 id 목록 (없으면 전체)")
+    total = models.PositiveIntegerField(default=0, help_text="대상 시설 수")
+    processed = models.PositiveIntegerField(default=0, help_text="처리한 시설 수")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    stats = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = '벡터 색인 작업'
+        verbose_name_plural = '벡터 색인 작업'
+        constraints = [
+            # 진행 중(대기/실행) 작업은 동시에 하나만: 여러 워커가 같은 컬렉션에 전체 임베딩을 쓰지 않도록
+            models.UniqueConstraint(
+                models.Value(True), condition=models.Q(status__in=('queued', 'running')),
+                name='single_active_indexing_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"[{self.status}/{self.phase}] {self.processed}/{self.total}"
+
+    def elapsed_seconds(self):
+        if not self.started_at:
+            return None
+        end = self.finished_at or timezone.now()
+        return max((end - self.started_at).total_seconds(), 0.0)
+
+    def throughput(self):
+        """초당 처리 시설 수"""
+        elapsed = self.elapsed_seconds()
+        if not elapsed or not self.processed:
+            return None
+        return self.processed / elapsed
+
+    def eta_seconds(self):
+        rate = self.throughput()
+        if self.status != 'running' or not rate or not self.total:
+            return None
+        return max(self.total - self.processed, 0) / rate
@@ -0,0 +1,143 @@
+"""규칙 기반 질문 해석: 지역(시/도, 시/군/구)/등급/입소 가능 여부 -> Chroma 메타데이터 필터
+
+예) "서울 강남구 A등급 입소 가능한 곳"
+    -> region='서울', district='강남구', grade='A등급', availability='가능'
+시설 주소에서 같은 어휘로 region/district 를 뽑아 색인 메타데이터에 넣는다 (extract_region).
+시/군/구는 접미사 규칙이 아니라 실제 시설 주소에 나오는 이름(district_vocabulary)과 일치할 때만
+조건으로 쓴다 ('청구', '연구' 같은 낱말 제외). 여러 시/도에 있는 이름('중구', 경기 '광주시' 와
+광주광역시)은 시/도가 함께 주어져 하나로 정해질 때만 쓴다.
+"""
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+# 시/도 정식 약칭 -> 별칭 (긴 별칭부터 비교)
+REGION_ALIASES = {
+    '서울': ('서울특별시', '서울시', '서울'),
+    '부산': ('부산광역시', '부산시', '부산'),
+    '대구': ('대구광역시', '대구시', '대구'),
+    '인천': ('인천광역시', '인천시', '인천'),
+    '광주': ('광주광역시', '광주시', '광주'),
+    '대전': ('대전광역시', '대전시', '대전'),
+    '울산': ('울산광역시', '울산시', '울산'),
+    '세종': ('세종특별자치시', '세종시', '세종'),
+    '경기': ('경기도', '경기'),
+    '강원': ('강원특별자치도', '강원도', '강원'),
+    '충북': ('충청북도', '충북'),
+    '충남': ('충청남도', '충남'),
+    '전북': ('전북특별자치도', '전라북도', '전북'),
+    '전남': ('전라남도', '전남'),
+    '경북': ('경상북도', '경북'),
+    '경남': ('경상남도', '경남'),
+    '제주': ('제주특별자치도', '제주도', '제주'),
+}
+_ALIAS_TO_REGION = sorted(
+    ((alias, region) for region, aliases in REGION_ALIASES.items() for alias in aliases),
+    key=lambda pair: -len(pair[0]),
+)
+_ALL_ALIASES = {alias for alias, _ in _ALIAS_TO_REGION}
+
+# 지명 뒤에 붙는 조사 (긴 것부터 제거)
+PLACE_PARTICLES = ('에서', '근처', '인근', '에', '의', '쪽')
+GRADE_RE = re.compile(r'(?<![A-Za-z])([A-Ea-e])\s*등급')
+UNAVAILABLE_RE = re.compile(r'입소\s*(?:불가|마감)|자리\s*없')
+AVAILABLE_RE = re.compile(r'입소\s*가능|빈\s*자리|자리\s*있|바로\s*입소')
+
+
+def match_region(word: str) -> str:
+    """단어 앞부분이 시/도 별칭이면 정식 약칭 ('서울특별시' -> '서울'), 아니면 ''"""
+    for alias, region in _ALIAS_TO_REGION:
+        if word.startswith(alias):
+            return region
+    return ''
+
+
+def extract_region(address: str) -> Tuple[str, str]:
+    """주소 -> (시/도 약칭, 시/군/구) 예) '서울특별시 강남구 역삼로 1' -> ('서울', '강남구')"""
+    words = (address or '').split()
+    for i, word in enumerate(words):
+        region = match_region(word)
+        if not region:
+            continue
+        district = ''
+        if i + 1 < len(words) and re.fullmatch(r'[가-힣]+(?:시|군|구)', words[i + 1]):
+            district = words[i + 1]
+        return region, district
+    return '', ''
+
+
+def district_vocabulary(addresses: Iterable[str]) -> Dict[str, FrozenSet[str]]:
+    """주소 목록 -> {시/군/구: 그 이름이 있는 시/도 집합} 예) {'중구': {'서울', '부산'}, '광주시': {'경기'}}"""
+    vocabulary: Dict[str, set] = {}
+    for address in addresses:
+        region, district = extract_region(address)
+        if region and district:
+            vocabulary.setdefault(district, set()).add(region)
+    return {district: frozenset(regions) for district, regions in vocabulary.items()}
+
+
+def _strip_particle(word: str) -> str:
+    for particle in PLACE_PARTICLES:
+        if word.endswith(particle) and len(word) > len(particle) + 1:
+            return word[:-len(particle)]
+    return word
+
+
+@dataclass
+class ParsedQuery:
+    region: str = ''
+    district: str = ''
+    grade: str = ''
+    availability: str = ''
+
+    def as_dict(self) -> Dict[str, str]:
+        return {key: value for key, value in asdict(self).items() if value}
+
+    def where(self) -> Optional[Dict[str, Any]]:
+        """Chroma where 절 (조건이 없으면 None)"""
+        conditions: List[Dict[str, Any]] = [
+            {f'facility_{key}': value} for key, value in self.as_dict().items()
+        ]
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {'$and': conditions}
+
+
+def parse_query(query: str, districts: Optional[Mapping[str, FrozenSet[str]]] = None) -> ParsedQuery:
+    """districts: district_vocabulary() 결과 (없으면 시/군/구 조건을 뽑지 않음)"""
+    parsed = ParsedQuery()
+    districts = districts or {}
+    regions, district_words = [], []
+    for word in re.findall(r'[가-힣A-Za-z0-9]+', query or ''):
+        base = _strip_particle(word)
+        if base in districts:
+            # '광주시' 처럼 시/도 별칭이기도 한 이름은 아래에서 시/도 후보와 함께 판단
+            district_words.append(base)
+            continue
+        region = match_region(word)
+        # '서울', '서울시', '서울에' 등 (별칭 + 조사까지만)
+        if region and len(word) - max(len(a) for a in REGION_ALIASES[region] if word.startswith(a)) <= 2:
+            regions.append(region)
+    if regions:
+        parsed.region = regions[0]
+    for district in district_words:
+        candidates = set(districts[district])
+        if district in _ALL_ALIASES and not regions:
+            # 시/도가 따로 없으면 '광주시' 는 광주광역시일 수도 있다
+            candidates.add(match_region(district))
+        if parsed.region:
+            if parsed.region in districts[district]:
+                parsed.district = district
+                break
+        elif len(candidates) == 1:
+            # 한 시/도에만 있는 이름이면 시/도도 함께 정해진다
+            parsed.region, parsed.district = next(iter(candidates)), district
+            break
+    m = GRADE_RE.search(query or '')
+    if m:
+        parsed.grade = f"{m.group(1).upper()}등급"
+    if UNAVAILABLE_RE.search(query or ''):
+        parsed.availability = '불가능'
+    elif AVAILABLE_RE.search(query or ''):
+        parsed.availability = '가능'
+    return parsed
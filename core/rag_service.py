@@ -1,29 +1,386 @@
+import hashlib
 import os
-import chromadb
-from sentence_transformers import SentenceTransformer
+import threading
+import time
 from django.conf import settings
+from core.attributes import AttributeFilter, filtered_facility_ids
+from core.chat_cache import QueryCache, SemanticAnswerCache, normalize_query
+from core.embedding_cache import CachedEncoder, EmbeddingCache, cache_stats
+from core.indexing import latest_index_version, start_queued_job
+from core.query_parser import district_vocabulary, extract_region, parse_query
+from core.vector_store import NumpyVectorStore
 from core.models import Facility, FacilityBasic, FacilityEvaluation, FacilityStaff, FacilityProgram, FacilityLocation, FacilityNonCovered
-from typing import List, Dict, Any
-import openai
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+
+def _append_section(doc_parts: List[str], heading: str, items) -> None:
+    if items:
+        doc_parts.append(heading)
+        for item in items:
+            doc_parts.append(f"- {item.title}: {item.content}")
+
+
+def facility_region(facility: Facility) -> Tuple[str, str]:
+    """위치 항목의 주소에서 (시/도, 시/군/구) 추출 (prefetch 된 location_items 사용)"""
+    for item in facility.location_items.all():
+        region, district = extract_region(item.content)
+        if region:
+            return region, district
+    return '', ''
+
+
+# (섹션 키, 문서 제목, Facility 역참조 이름) - 문서/청크 공통 순서
+DOCUMENT_SECTIONS = (
+    ('basic', "기본정보:", 'basic_items'),
+    ('evaluation', "평가정보:", 'evaluation_items'),
+    ('staff', "인력현황:", 'staff_items'),
+    ('program', "프로그램 운영:", 'program_items'),
+    ('location', "위치정보:", 'location_items'),
+    ('noncovered', "비급여 항목:", 'noncovered_items'),
+)
+# 섹션 청크 최대 글자 수 (MiniLM 최대 입력 128 토큰 안에 들어가도록)
+CHUNK_MAX_CHARS = 300
+
+
+def _facility_overview(facility: Facility, region: str, district: str) -> List[str]:
+    doc_parts = [
+        f"시설명: {facility.name}",
+        f"종류: {facility.kind}",
+        f"등급: {facility.grade}",
+        f"이용가능: {facility.availability}",
+    ]
+    if region:
+        doc_parts.append(f"지역: {region} {district}".strip())
+
+    if facility.capacity:
+        doc_parts.append(f"정원: {facility.capacity}명")
+    if facility.occupancy:
+        doc_parts.append(f"현원: {facility.occupancy}명")
+    if facility.waiting:
+        doc_parts.append(f"대기: {facility.waiting}명")
+    return doc_parts
+
+
+def _facility_metadata(facility: Facility, region: str, district: str, text: str) -> Dict[str, Any]:
+    return {
+        "facility_id": facility.id,
+        "facility_code": facility.code,
+        "facility_name": facility.name,
+        "facility_kind": facility.kind,
+        "facility_grade": facility.grade,
+        "facility_availability": facility.availability,
+        "facility_region": region,
+        "facility_district": district,
+        "content_hash": hashlib.sha256(text.encode('utf-8')).hexdigest(),
+    }
+
+
+def build_facility_document(facility: Facility) -> Tuple[str, str, Dict[str, Any]]:
+    """시설 1곳의 임베딩 문서 생성 -> (문서 id, 문서 텍스트, 메타데이터)
+
+    메타데이터의 content_hash 는 문서 텍스트의 sha256 으로, 재임베딩 필요 여부 판단에 사용한다.
+    """
+    region, district = facility_region(facility)
+
+    # 시설 기본 정보 문서 생성
+    doc_parts = _facility_overview(facility, region, district)
+    for _, heading, relation in DOCUMENT_SECTIONS:
+        _append_section(doc_parts, heading, getattr(facility, relation).all())
+
+    document = "\n".join(doc_parts)
+    return f"facility_{facility.id}", document, _facility_metadata(facility, region, district, document)
+
+
+def build_facility_chunks(facility: Facility) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """시설 1곳을 개요 + 섹션별 청크로 분할 -> [(청크 id, 텍스트, 메타데이터)]
+
+    긴 문서 끝부분(위치/비급여)이 임베딩 모델 입력 길이에서 잘리지 않도록, 청크마다 시설 식별 줄을
+    앞에 붙이고 CHUNK_MAX_CHARS 를 넘는 섹션은 항목 단위로 나눈다. 모든 청크는 facility_id 를 공유한다.
+    """
+    region, district = facility_region(facility)
+    header = f"시설명: {facility.name} ({' '.join(filter(None, (region, district, facility.grade)))})"
+    chunks = [('overview', "\n".join(_facility_overview(facility, region, district)))]
+    for section, heading, relation in DOCUMENT_SECTIONS:
+        lines = [f"- {item.title}: {item.content}" for item in getattr(facility, relation).all()]
+        part = []
+        for line in lines:
+            if part and len(header) + len(heading) + sum(len(l) + 1 for l in part) + len(line) > CHUNK_MAX_CHARS:
+                chunks.append((section, "\n".join([header, heading, *part])))
+                part = []
+            part.append(line)
+        if part:
+            chunks.append((section, "\n".join([header, heading, *part])))
+
+    result = []
+    counts: Dict[str, int] = {}
+    for section, text in chunks:
+        index = counts.get(section, 0)
+        counts[section] = index + 1
+        metadata = _facility_metadata(facility, region, district, text)
+        metadata['section'] = section
+        result.append((f"facility_{facility.id}_{section}_{index}", text, metadata))
+    return result
+
+
+# 문서 생성에 필요한 하위 섹션 (청크마다 테이블별 1회 prefetch)
+FACILITY_SECTION_RELATIONS = (
+    'basic_items',
+    'evaluation_items',
+    'staff_items',
+    'program_items',
+    'location_items',
+    'noncovered_items',
+)
+
+
+def iter_facility_documents(chunk_size: int = 500, queryset=None):
+    """시설 문서를 chunk_size 단위로 스트리밍 생성
+
+    시설 조회 1회 + 청크마다 하위 테이블별 1회 조회로 쿼리 수가 시설 수가 아닌
+    청크 수에 비례하고, 메모리에는 한 청크만 올라간다.
+    """
+    if queryset is None:
+        queryset = Facility.objects.all()
+    queryset = queryset.order_by('id').prefetch_related(*FACILITY_SECTION_RELATIONS)
+    for facility in queryset.iterator(chunk_size=chunk_size):
+        yield build_facility_document(facility)
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """여러 순위 목록을 RRF 로 결합 -> [(id, score)] 점수 내림차순 (score = sum 1 / (k + rank))"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, 1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+COLLECTION_NAMES = {
+    'facility': "nursinghome_facilities",
+    'section': "nursinghome_facility_sections",
+}
+# LLM 호출 실패 시 답변 앞머리 (실패 답변은 캐시하지 않음)
+ANSWER_ERROR_PREFIX = "답변 생성 중 오류가 발생했습니다"
+# section 모드에서 시설 후보 depth 개를 모으기 위해 조회하는 청크 배수
+CHUNK_FANOUT = 4
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def iter_embedding_units(chunking: str = 'facility', chunk_size: int = 500, queryset=None):
+    """시설별 임베딩 단위 목록 스트리밍: facility 모드는 [문서 1개], section 모드는 섹션 청크들"""
+    if queryset is None:
+        queryset = Facility.objects.all()
+    queryset = queryset.order_by('id').prefetch_related(*FACILITY_SECTION_RELATIONS)
+    for facility in queryset.iterator(chunk_size=chunk_size):
+        if chunking == 'section':
+            yield build_facility_chunks(facility)
+        else:
+            yield [build_facility_document(facility)]
+
+
+def length_buckets(items: List[Tuple[str, str, Dict[str, Any]]], batch_size: int):
+    """(id, 문서, 메타데이터) 목록을 문서 길이순으로 정렬해 batch_size 씩 나눈다
+
+    배치 안 문서 길이가 비슷하면 토크나이저 패딩(가장 긴 문서 길이에 맞춤) 낭비가 줄어든다.
+    """
+    ordered = sorted(items, key=lambda item: len(item[1]))
+    for i in range(0, len(ordered), batch_size):
+        yield ordered[i:i + batch_size]
+
+
+class EmbeddingPipeline:
+    """임베딩 파이프라인: add() 한 문서를 길이별 배치로 인코딩 스레드에, 결과를 쓰기 스레드에 넘긴다
+
+    DB 문서 생성(호출 스레드), 인코딩(EMBEDDING_BATCH_SIZE, 모델은 GIL 을 놓고 계산), 벡터 저장소
+    upsert 가 서로 겹쳐 실행된다. 처리 중인 배치 수를 MAX_INFLIGHT 로 제한해 메모리를 묶어 둔다.
+    """
+    # 길이 정렬 창 = 인코딩 배치 x 이 값
+    BUCKET_WINDOW_BATCHES = 8
+    MAX_INFLIGHT = 4
+
+    def __init__(self, model, collection, batch_size: Optional[int] = None):
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.model = model
+        self.collection = collection
+        self.batch_size = max(1, batch_size or settings.EMBEDDING_BATCH_SIZE)
+        self._window: List[Tuple[str, str, Dict[str, Any]]] = []
+        self._inflight = deque()
+        self._encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rag-encode')
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rag-write')
+        self.embedded = 0
+        self._started = time.perf_counter()
+        self._elapsed = 0.0
+
+    def add(self, doc_id: str, document: str, metadata: Dict[str, Any]):
+        self._window.append((doc_id, document, metadata))
+        if len(self._window) >= self.batch_size * self.BUCKET_WINDOW_BATCHES:
+            self._submit_window()
+
+    def _submit_window(self):
+        for batch in length_buckets(self._window, self.batch_size):
+            encoded = self._encoder.submit(self._encode, [document for _, document, _ in batch])
+            self._inflight.append(self._writer.submit(self._write, batch, encoded))
+            while len(self._inflight) > self.MAX_INFLIGHT:
+                self._inflight.popleft().result()
+        self._window = []
+
+    def _encode(self, documents: List[str]):
+        return self.model.encode(documents, batch_size=self.batch_size).tolist()
+
+    def _write(self, batch, encoded):
+        embeddings = encoded.result()
+        self.collection.upsert(
+            documents=[document for _, document, _ in batch],
+            metadatas=[metadata for _, _, metadata in batch],
+            ids=[doc_id for doc_id, _, _ in batch],
+            embeddings=embeddings
+        )
+        self.embedded += len(batch)
+
+    def close(self, discard: bool = False):
+        """남은 문서를 처리하고 모든 배치가 저장될 때까지 기다린다 (작업 중 예외는 여기서 다시 발생)
+
+        discard=True 이면 아직 넘기지 않은 문서는 버리고 실행 중인 배치만 마무리한다 (호출 측 오류 시).
+        """
+        try:
+            if discard:
+                self._window = []
+            elif self._window:
+                self._submit_window()
+            while self._inflight:
+                future = self._inflight.popleft()
+                if discard:
+                    future.cancel()
+                else:
+                    future.result()
+        finally:
+            self._encoder.shutdown(wait=True, cancel_futures=True)
+            self._writer.shutdown(wait=True, cancel_futures=True)
+            self._elapsed = time.perf_counter() - self._started
+
+    def docs_per_sec(self) -> float:
+        return round(self.embedded / self._elapsed, 1) if self.embedded and self._elapsed else 0.0
+
+
+def open_chroma_client():
+    """ChromaDB PersistentClient 를 새로 연다
+
+    Chroma 는 경로별 System(메모리의 HNSW 세그먼트 포함)을 프로세스 안에 캐시하므로, 다른 프로세스가
+    쓴 벡터를 보려면 캐시를 비우고 클라이언트를 다시 만들어야 한다.
+    """
+    import chromadb  # 지연 import
+    try:
+        from chromadb.api.client import SharedSystemClient
+    except ImportError:
+        SharedSystemClient = None
+    if SharedSystemClient is not None and hasattr(SharedSystemClient, 'clear_system_cache'):
+        SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=str(settings.CHROMA_DB_PATH))
+
 
 class RAGService:
     def __init__(self):
-        # ChromaDB 클라이언트 초기화
-        self.chroma_client = chromadb.PersistentClient(path=str(settings.CHROMA_DB_PATH))
-        self.collection_name = "nursinghome_facilities"
+        # 무거운 의존성은 지연 import (모델/DB 로딩은 프로세스당 1회, get_rag_service 참고)
+        import openai
+        from sentence_transformers import SentenceTransformer
+
+        # 벡터 저장소: ChromaDB(기본) 또는 프로세스 내 NumPy 색인 (core.vector_store)
+        self.vector_store = settings.RAG_VECTOR_STORE
+        if self.vector_store == 'chroma':
+            self.chroma_client = open_chroma_client()
+        elif self.vector_store != 'numpy':
+            raise ValueError(f"알 수 없는 RAG_VECTOR_STORE: {self.vector_store} (chroma | numpy)")
+        # 청크 모드마다 컬렉션을 분리 (모드를 바꿔도 기존 색인과 섞이지 않음)
+        self.chunking = settings.RAG_CHUNKING
+        self.collection_name = COLLECTION_NAMES.get(self.chunking, COLLECTION_NAMES['facility'])
 
         # 임베딩 모델 초기화
-        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        if settings.EMBEDDING_THREADS:
+            import torch
+            torch.set_num_threads(settings.EMBEDDING_THREADS)
+        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL, device=settings.EMBEDDING_DEVICE or None)
+        if settings.EMBEDDING_CACHE_MAX_ENTRIES > 0:
+            # 같은 텍스트(문서/질문)는 디스크 캐시의 벡터를 재사용
+            self.embedding_model = CachedEncoder(self.embedding_model, EmbeddingCache(
+                settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_MODEL, settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            ))
 
         # OpenAI 클라이언트 초기화
         if settings.OPENAI_API_KEY:
             openai.api_key = settings.OPENAI_API_KEY
 
+        # 인덱스 변경(재구축/재로딩) 직렬화용 락
+        self._lock = threading.RLock()
+        self._init_caches()
+        self._init_index_version()
+
         # 컬렉션 초기화
         self._init_collection()
 
+    def reload(self):
+        """컬렉션 핸들을 다시 연다 (다른 프로세스에서 재인덱싱한 경우 반영용, 모델은 유지)"""
+        with self._lock:
+            # 컬렉션을 열기 전에 버전을 기록해야 그 사이 끝난 작업을 다음 확인에서 놓치지 않는다
+            self._init_index_version()
+            if self.vector_store == 'chroma':
+                # 같은 클라이언트로는 다른 프로세스가 쓴 벡터가 보이지 않는다 (open_chroma_client 참고)
+                self.chroma_client = open_chroma_client()
+            self._init_collection()
+            self.invalidate_caches()
+
+    def _init_caches(self):
+        """질문 -> 검색 결과 LRU, 질문 임베딩 근접 답변 캐시 (core.chat_cache)"""
+        self.query_cache = QueryCache(settings.RAG_QUERY_CACHE_SIZE, settings.RAG_CACHE_TTL)
+        self.answer_cache = SemanticAnswerCache(
+            settings.RAG_ANSWER_CACHE_SIZE, settings.RAG_CACHE_TTL, settings.RAG_ANSWER_CACHE_THRESHOLD,
+        )
+        self._districts = None
+
+    def _init_index_version(self):
+        self._index_version = latest_index_version()
+        self._index_checked_at = time.monotonic()
+
+    def refresh_if_reindexed(self):
+        """다른 워커가 색인을 바꿨으면 컬렉션/캐시를 다시 열고, 크롤러가 등록한 대기 작업이 있으면 실행
+
+        RAG_INDEX_CHECK_INTERVAL 초마다 한 번 대기 작업과 마지막 색인 작업 완료 시각만 조회한다.
+        """
+        now = time.monotonic()
+        if now - self._index_checked_at < settings.RAG_INDEX_CHECK_INTERVAL:
+            return
+        self._index_checked_at = now
+        start_queued_job()
+        if latest_index_version() != self._index_version:
+            self.reload()
+
+    def district_vocabulary(self):
+        """시설 주소에 실제로 나오는 시/군/구 이름 (질문 해석용, 색인이 바뀌면 다시 계산)"""
+        if self._districts is None:
+            self._districts = district_vocabulary(
+                FacilityLocation.objects.values_list('content', flat=True).iterator()
+            )
+        return self._districts
+
+    def invalidate_caches(self):
+        """색인이 바뀌면 캐시된 검색 결과/답변을 버린다"""
+        self.query_cache.clear()
+        self.answer_cache.clear()
+        self._districts = None
+
     def _init_collection(self):
         """ChromaDB 컬렉션 초기화"""
+        if self.vector_store == 'numpy':
+            # 디스크의 색인을 메모리 맵으로 다시 연다 (reload 시 다른 프로세스의 재인덱싱 반영)
+            self.collection = NumpyVectorStore(
+                settings.VECTOR_STORE_PATH / self.collection_name,
+                dtype=settings.VECTOR_STORE_DTYPE, rerank=settings.VECTOR_STORE_RERANK,
+            )
+            return
         try:
             # 기존 컬렉션이 있으면 가져오기
             self.collection = self.chroma_client.get_collection(self.collection_name)
@@ -34,127 +391,190 @@ class RAGService:
                 metadata={"description": "요양원 시설 정보"}
             )
 
-    def embed_facilities(self):
-        """모든 요양원 데이터를 벡터화하여 ChromaDB에 저장"""
-        facilities = Facility.objects.all()
-
-        documents = []
-        metadatas = []
-        ids = []
-
-        for facility in facilities:
-            # 시설 기본 정보 문서 생성
-            doc_parts = [
-                f"시설명: {facility.name}",
-                f"종류: {facility.kind}",
-                f"등급: {facility.grade}",
-                f"이용가능: {facility.availability}",
-            ]
-
-            if facility.capacity:
-                doc_parts.append(f"정원: {facility.capacity}명")
-            if facility.occupancy:
-                doc_parts.append(f"현원: {facility.occupancy}명")
-            if facility.waiting:
-                doc_parts.append(f"대기: {facility.waiting}명")
-
-            # 기본정보 추가
-            basic_items = facility.basic_items.all()
-            if basic_items:
-                doc_parts.append("기본정보:")
-                for item in basic_items:
-                    doc_parts.append(f"- {item.title}: {item.content}")
-
-            # 평가정보 추가
-            eval_items = facility.evaluation_items.all()
-            if eval_items:
-                doc_parts.append("평가정보:")
-                for item in eval_items:
-                    doc_parts.append(f"- {item.title}: {item.content}")
-
-            # 인력현황 추가
-            staff_items = facility.staff_items.all()
-            if staff_items:
-                doc_parts.append("인력현황:")
-                for item in staff_items:
-                    doc_parts.append(f"- {item.title}: {item.content}")
-
-            # 프로그램 운영 추가
-            program_items = facility.program_items.all()
-            if program_items:
-                doc_parts.append("프로그램 운영:")
-                for item in program_items:
-                    doc_parts.append(f"- {item.title}: {item.content}")
-
-            # 위치 정보 추가
-            location_items = facility.location_items.all()
-            if location_items:
-                doc_parts.append("위치정보:")
-                for item in location_items:
-                    doc_parts.append(f"- {item.title}: {item.content}")
-
-            # 비급여 항목 추가
-            noncov_items = facility.noncovered_items.all()
-            if noncov_items:
-                doc_parts.append("비급여 항목:")
-                for item in noncov_items:
-                    doc_parts.append(f"- {item.title}: {item.content}")
-
-            document = "\n".join(doc_parts)
-
-            documents.append(document)
-            metadatas.append({
-                "facility_id": facility.id,
-                "facility_code": facility.code,
-                "facility_name": facility.name,
-                "facility_kind": facility.kind,
-                "facility_grade": facility.grade,
-                "facility_availability": facility.availability,
-            })
-            ids.append(f"facility_{facility.id}")
-
-        # 기존 데이터 삭제 후 새로 추가
-        try:
-            self.collection.delete()
-            self.collection = self.chroma_client.create_collection(
-                name=self.collection_name,
-                metadata={"description": "요양원 시설 정보"}
+    def embed_facilities(self, rebuild: bool = False,
+                         progress: Optional[Callable[[str, int, int], None]] = None,
+                         facility_ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """요양원 데이터를 벡터화하여 ChromaDB에 반영 (변경분만 재임베딩)
+
+        rebuild=True 이면 저장된 해시를 무시하고 전체를 다시 임베딩한다.
+        facility_ids 가 주어지면 그 시설들만 반영한다 (크롤 후 바뀐 시설 재색인, 삭제된 시설의 문서도 제거).
+        progress(phase, processed, total) 는 단계('embedding'/'finalizing')와 처리한 시설 수를 받는다.
+        반환: {'added', 'updated', 'unchanged', 'removed', 'total', 'embedded', 'docs_per_sec'}
+        (임베딩 캐시 사용 시 'cache': 이번 실행의 {'hits', 'misses', 'hit_rate'})
+        """
+        with self._lock:
+            return self._embed_facilities(
+                rebuild=rebuild, progress=progress or (lambda *args: None), facility_ids=facility_ids,
             )
-        except:
-            pass
 
-        # 배치 단위로 추가 (ChromaDB 제한 때문에)
-        batch_size = 100
-        for i in range(0, len(documents), batch_size):
-            batch_docs = documents[i:i+batch_size]
-            batch_metas = metadatas[i:i+batch_size]
-            batch_ids = ids[i:i+batch_size]
-
-            # 임베딩 생성
-            embeddings = self.embedding_model.encode(batch_docs).tolist()
-
-            self.collection.add(
-                documents=batch_docs,
-                metadatas=batch_metas,
-                ids=batch_ids,
-                embeddings=embeddings
-            )
+    def _embed_facilities(self, rebuild: bool, progress: Callable[[str, int, int], None],
+                          facility_ids: Optional[List[int]] = None) -> Dict[str, int]:
+        queryset = None
+        if facility_ids is not None:
+            facility_ids = list(facility_ids)
+            queryset = Facility.objects.filter(id__in=facility_ids)
+        # 저장된 문서별 content_hash (id/해시만 메모리에 유지)
+        if facility_ids is None:
+            existing = self.collection.get(include=['metadatas'])
+        elif facility_ids:
+            existing = self.collection.get(where={'facility_id': {'$in': facility_ids}}, include=['metadatas'])
+        else:
+            existing = {'ids': [], 'metadatas': []}
+        stored_hashes = {
+            doc_id: (meta or {}).get('content_hash')
+            for doc_id, meta in zip(existing['ids'], existing['metadatas'])
+        }
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'total': 0}
+        seen_ids = set()
+        cache_before = cache_stats(self.embedding_model)
+        facility_count = (queryset if queryset is not None else Facility.objects).count()
+        progress('embedding', 0, facility_count)
+
+        # DB 문서 생성(현재 스레드) / 인코딩 / 벡터 저장소 쓰기를 겹쳐 실행
+        pipeline = EmbeddingPipeline(self.embedding_model, self.collection)
+        try:
+            # 문서(청크)를 스트리밍으로 만들면서 추가/변경분만 파이프라인에 넣는다
+            # total 은 시설 수, added/updated/unchanged/removed 는 임베딩 단위(문서 또는 청크) 수
+            for units in iter_embedding_units(self.chunking, queryset=queryset):
+                stats['total'] += 1
+                progress('embedding', stats['total'], facility_count)
+                for doc_id, document, metadata in units:
+                    seen_ids.add(doc_id)
+                    if doc_id not in stored_hashes:
+                        stats['added'] += 1
+                    elif rebuild or stored_hashes[doc_id] != metadata['content_hash']:
+                        stats['updated'] += 1
+                    else:
+                        stats['unchanged'] += 1
+                        continue
+                    pipeline.add(doc_id, document, metadata)
+        except BaseException:
+            pipeline.close(discard=True)
+            raise
+        progress('finalizing', stats['total'], facility_count)
+        pipeline.close()
+        stats['embedded'] = pipeline.embedded
+        stats['docs_per_sec'] = pipeline.docs_per_sec()
+
+        batch_size = 100  # ChromaDB 삭제 배치 제한
+        removed_ids = list(set(stored_hashes) - seen_ids)
+        stats['removed'] = len(removed_ids)
+        for i in range(0, len(removed_ids), batch_size):
+            self.collection.delete(ids=removed_ids[i:i+batch_size])
+
+        if isinstance(self.collection, NumpyVectorStore):
+            # Chroma 는 upsert 마다 기록하지만 NumPy 색인은 모아서 한 번에 기록
+            self.collection.persist()
+        if stats['added'] or stats['updated'] or stats['removed']:
+            self.invalidate_caches()
+        if cache_before is not None:
+            cache_after = cache_stats(self.embedding_model)
+            hits = cache_after['hits'] - cache_before['hits']
+            misses = cache_after['misses'] - cache_before['misses']
+            stats['cache'] = {
+                'hits': hits, 'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            }
+        return stats
 
-        return len(documents)
+    def search_facilities(self, query: str, n_results: int = 5, facility_ids: Optional[List[int]] = None,
+                          depth: Optional[int] = None, where: Optional[Dict[str, Any]] = None,
+                          query_embedding: Optional[List[List[float]]] = None) -> Dict[str, Any]:
+        """사용자 질문에 관련된 요양원들을 검색
 
-    def search_facilities(self, query: str, n_results: int = 5) -> List[Dict]:
-        """사용자 질문에 관련된 요양원들을 검색"""
-        # 쿼리 임베딩
-        query_embedding = self.embedding_model.encode([query]).tolist()
+        facility_ids(정형 속성 사전 필터)와 where(메타데이터 조건)가 주어지면 그 안에서만 찾는다.
+        query_embedding 을 넘기면 질문을 다시 인코딩하지 않는다.
 
-        # 유사한 문서 검색
+        RAG_HYBRID 이면 벡터 검색과 문자 bigram BM25 검색에서 각각 depth 개 시설 후보를 뽑아
+        RRF 로 결합한 상위 n_results 개 시설을 반환한다. section 청크 모드에서도 결과는 시설 단위
+        (청크 순위를 시설별로 합산, 문서는 전체 시설 문서). 결과의 'timings' 에 단계별 소요 시간(ms)을 담는다.
+        """
+        from core.fulltext import ngram_search  # 지연 import (fulltext 가 이 모듈을 사용)
+
+        self.refresh_if_reindexed()
+        hybrid = settings.RAG_HYBRID
+        depth = max(depth or settings.RAG_CANDIDATE_DEPTH, n_results) if hybrid else n_results
+        timings = {}
+
+        # 쿼리 임베딩
+        if query_embedding is None:
+            started = time.perf_counter()
+            query_embedding = self.embedding_model.encode([query]).tolist()
+            timings['embed_ms'] = _elapsed_ms(started)
+
+        # 유사한 문서 검색 (ANN 전에 메타데이터 조건으로 검색 공간을 줄인다)
+        conditions = [where] if where else []
+        if facility_ids is not None:
+            conditions.append({'facility_id': {'$in': facility_ids}})
+        combined_where = None
+        if conditions:
+            combined_where = conditions[0] if len(conditions) == 1 else {'$and': conditions}
+        chunked = self.chunking == 'section'
+        started = time.perf_counter()
         results = self.collection.query(
             query_embeddings=query_embedding,
-            n_results=n_results,
+            n_results=depth * CHUNK_FANOUT if chunked else depth,
+            where=combined_where,
             include=['documents', 'metadatas', 'distances']
         )
+        # 벡터 후보를 시설 단위로 집계 (청크 모드: 시설별 청크 순위의 1/(k+rank) 합)
+        dense_scores: Dict[int, float] = {}
+        dense_docs: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        for rank, (doc, meta) in enumerate(zip(results['documents'][0], results['metadatas'][0]), 1):
+            facility_id = meta['facility_id']
+            dense_scores[facility_id] = dense_scores.get(facility_id, 0.0) + 1.0 / (settings.RAG_RRF_K + rank)
+            dense_docs.setdefault(facility_id, (doc, meta))
+        dense_ranking = sorted(dense_scores, key=lambda facility_id: -dense_scores[facility_id])[:depth]
+        timings['dense_ms'] = _elapsed_ms(started)
+        candidates = {'dense': len(dense_ranking), 'depth': depth}
+        if chunked:
+            candidates['chunks'] = len(results['ids'][0])
+
+        if hybrid:
+            # 어휘 검색 (문자 bigram BM25)
+            started = time.perf_counter()
+            lexical = [facility_id for facility_id, _ in ngram_search(query, limit=depth, facility_ids=facility_ids)]
+            if where and lexical:
+                # 어휘 후보에도 같은 메타데이터 조건 적용
+                allowed = self.collection.get(
+                    where={'$and': [where, {'facility_id': {'$in': lexical}}]}, include=['metadatas'],
+                )
+                allowed_ids = {meta['facility_id'] for meta in allowed['metadatas']}
+                lexical = [facility_id for facility_id in lexical if facility_id in allowed_ids]
+            timings['lexical_ms'] = _elapsed_ms(started)
+            candidates['lexical'] = len(lexical)
+            started = time.perf_counter()
+            fused = reciprocal_rank_fusion([dense_ranking, lexical], k=settings.RAG_RRF_K)[:n_results]
+        else:
+            started = time.perf_counter()
+            fused = [(facility_id, dense_scores[facility_id]) for facility_id in dense_ranking[:n_results]]
+
+        # 상위 시설 문서 구성: 청크 모드는 LLM 에 넘길 전체 시설 문서를 DB 에서 만들고,
+        # 문서 모드는 어휘 검색에만 잡힌 시설의 문서를 컬렉션에서 가져온다
+        top_ids = [facility_id for facility_id, _ in fused]
+        if chunked:
+            docs = {
+                meta['facility_id']: (doc, meta)
+                for _, doc, meta in iter_facility_documents(queryset=Facility.objects.filter(id__in=top_ids))
+            }
+        else:
+            docs = dense_docs
+            missing = [f"facility_{facility_id}" for facility_id in top_ids if facility_id not in docs]
+            if missing:
+                fetched = self.collection.get(ids=missing, include=['documents', 'metadatas'])
+                for doc, meta in zip(fetched['documents'], fetched['metadatas']):
+                    docs[meta['facility_id']] = (doc, meta)
+        fused = [(facility_id, score) for facility_id, score in fused if facility_id in docs]
+        timings['fusion_ms'] = _elapsed_ms(started)
 
-        return results
+        return {
+            'ids': [[f"facility_{facility_id}" for facility_id, _ in fused]],
+            'documents': [[docs[facility_id][0] for facility_id, _ in fused]],
+            'metadatas': [[docs[facility_id][1] for facility_id, _ in fused]],
+            'scores': [[score for _, score in fused]],
+            'timings': timings,
+            'candidates': candidates,
+        }
 
     def generate_answer(self, query: str, context_docs: List[str]) -> str:
         """검색된 문서들을 바탕으로 답변 생성"""
@@ -185,6 +605,7 @@ class RAGService:
 """
 
         try:
+            import openai
             response = openai.ChatCompletion.create(
                 model="gpt-3.5-turbo",
                 messages=[
@@ -196,30 +617,100 @@ class RAGService:
             )
             return response.choices[0].message.content.strip()
         except Exception as e:
-            return f"답변 생성 중 오류가 발생했습니다: {str(e)}"
-
-    def chat(self, query: str) -> Dict[str, Any]:
-        """전체 RAG 프로세스 실행"""
-        # 1. 관련 문서 검색
-        search_results = self.search_facilities(query)
-
-        # 2. 검색 결과가 있는지 확인
+            return f"{ANSWER_ERROR_PREFIX}: {str(e)}"
+
+    def chat(self, query: str, filters: Optional[List[AttributeFilter]] = None) -> Dict[str, Any]:
+        """전체 RAG 프로세스 실행 (filters: 정형 속성 조건으로 검색 대상 사전 제한)
+
+        응답의 metadata 에 단계별 소요 시간(ms)과 검색 후보 수, 캐시 적중('query' | 'answer')을 담는다.
+        """
+        total_started = time.perf_counter()
+        timings = {}
+        self.refresh_if_reindexed()
+
+        # 1. 질문에서 지역/등급/입소 가능 여부 조건 추출 -> 메타데이터 필터
+        parsed = parse_query(query, self.district_vocabulary())
+        where = parsed.where()
+        metadata = {'timings': timings}
+        if where:
+            metadata['query_filters'] = parsed.as_dict()
+        # 같은 조건끼리만 캐시를 공유
+        context = (tuple(filters or ()), tuple(sorted(parsed.as_dict().items())))
+        query_key = (normalize_query(query), context)
+
+        # 2. 정확히 같은 질문이면 임베딩/검색 결과 재사용, 아니면 질문 인코딩
+        cached_search = self.query_cache.get(query_key)
+        if cached_search is not None:
+            query_embedding, search_results, relaxed = cached_search
+            metadata['cache'] = 'query'
+        else:
+            started = time.perf_counter()
+            query_embedding = self.embedding_model.encode([query]).tolist()
+            timings['embed_ms'] = _elapsed_ms(started)
+
+        # 3. 비슷한 질문의 답변이 캐시에 있으면 검색/LLM 생략
+        cached_answer = self.answer_cache.get(query_embedding, context)
+        if cached_answer is not None:
+            response, similarity = cached_answer
+            timings['total_ms'] = _elapsed_ms(total_started)
+            metadata.update({'cache': 'answer', 'cache_similarity': round(similarity, 4)})
+            return {**response, 'query': query, 'metadata': metadata}
+
+        if cached_search is None:
+            facility_ids = None
+            if filters:
+                started = time.perf_counter()
+                facility_ids = filtered_facility_ids(filters)
+                timings['filter_ms'] = _elapsed_ms(started)
+                if not facility_ids:
+                    return {
+                        "answer": "죄송합니다. 조건에 맞는 요양원이 없습니다.",
+                        "sources": [],
+                        "query": query
+                    }
+
+            # 관련 문서 검색 (조건에 맞는 시설이 없으면 조건 없이 재검색)
+            search_results = self.search_facilities(
+                query, facility_ids=facility_ids, where=where, query_embedding=query_embedding,
+            )
+            relaxed = False
+            if where and not search_results['documents'][0]:
+                search_results = self.search_facilities(
+                    query, facility_ids=facility_ids, query_embedding=query_embedding,
+                )
+                relaxed = True
+            timings.update(search_results.get('timings', {}))
+            self.query_cache.put(query_key, (query_embedding, search_results, relaxed))
+        if relaxed:
+            metadata['query_filters_relaxed'] = True
+        if 'candidates' in search_results:
+            metadata['candidates'] = search_results['candidates']
+        embedding_cache = cache_stats(self.embedding_model)
+        if embedding_cache is not None:
+            metadata['embedding_cache'] = embedding_cache
+
+        # 4. 검색 결과가 있는지 확인
         if not search_results['documents'][0]:
+            timings['total_ms'] = _elapsed_ms(total_started)
             return {
                 "answer": "죄송합니다. 질문과 관련된 요양원 정보를 찾을 수 없습니다.",
                 "sources": [],
-                "query": query
+                "query": query,
+                "metadata": metadata
             }
 
-        # 3. 컨텍스트 문서 준비
+        # 5. 컨텍스트 문서 준비
         context_docs = search_results['documents'][0]
         metadatas = search_results['metadatas'][0]
 
-        # 4. LLM으로 답변 생성
+        # 6. LLM으로 답변 생성
+        started = time.perf_counter()
         answer = self.generate_answer(query, context_docs)
+        timings['generate_ms'] = _elapsed_ms(started)
+        timings['total_ms'] = _elapsed_ms(total_started)
 
-        # 5. 결과 반환
-        return {
+        # 7. 결과 반환 (답변은 비슷한 질문에 재사용하도록 캐시)
+        response = {
             "answer": answer,
             "sources": [
                 {
@@ -228,5 +719,52 @@ class RAGService:
                     "facility_id": meta['facility_id']
                 } for meta in metadatas
             ],
-            "query": query
         }
+        if not answer.startswith(ANSWER_ERROR_PREFIX):
+            self.answer_cache.put(query_embedding, context, response)
+        return {**response, "query": query, "metadata": metadata}
+
+
+# 프로세스(워커)당 하나의 RAGService 를 공유한다.
+# 임베딩 모델 로딩과 ChromaDB 클라이언트 생성은 수 초가 걸리므로 요청마다 만들지 않는다.
+_rag_service: Optional[RAGService] = None
+_rag_service_lock = threading.Lock()
+
+
+def get_rag_service() -> RAGService:
+    """공유 RAGService 반환 (최초 호출 시 1회 로딩, thread-safe)"""
+    global _rag_service
+    if _rag_service is None:
+        with _rag_service_lock:
+            if _rag_service is None:
+                _rag_service = RAGService()
+    return _rag_service
+
+
+def reload_rag_service(reload_model: bool = False) -> RAGService:
+    """재인덱싱 후 워커 재시작 없이 공유 서비스를 갱신
+
+    reload_model=False 이면 로딩된 임베딩 모델을 유지하고 컬렉션만 다시 연다.
+    """
+    global _rag_service
+    with _rag_service_lock:
+        if _rag_service is None or reload_model:
+            _rag_service = RAGService()
+        else:
+            _rag_service.reload()
+        return _rag_service
+
+
+def warm_up_rag_service(background: bool = True):
+    """임베딩 모델/컬렉션을 미리 로딩 (CoreConfig.ready 에서 RAG_EAGER_LOAD 시 호출)"""
+    def _load():
+        try:
+            get_rag_service()
+        except Exception:
+            # 의존성/모델 문제는 첫 요청에서 다시 드러나므로 기동은 막지 않는다
+            pass
+
+    if background:
+        threading.Thread(target=_load, name='rag-warmup', daemon=True).start()
+    else:
+        _load()
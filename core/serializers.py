@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Facility, FacilityBasic, FacilityEvaluation, FacilityStaff, FacilityProgram, FacilityLocation, FacilityNonCovered
+from .attributes import AttributeFilter
+from .indexing import format_stats
+from .models import IndexingJob, Facility, FacilityBasic, FacilityEvaluation, FacilityStaff, FacilityProgram, FacilityLocation, FacilityNonCovered
 
 class FacilityBasicSerializer(serializers.ModelSerializer):
     class Meta:
@@ -58,8 +60,46 @@ class FacilityListSerializer(serializers.ModelSerializer):
 
 class ChatRequestSerializer(serializers.Serializer):
     query = serializers.CharField(max_length=1000, help_text="사용자 질문")
+    filters = serializers.ListField(
+        child=serializers.CharField(max_length=200), required=False,
+        help_text="정형 속성 조건 (예: ['staff:간호사>=10', 'noncovered:식재료비<=300000'])",
+    )
+
+    def validate_filters(self, value):
+        try:
+            return [AttributeFilter.parse(expr) for expr in value]
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
 
 class ChatResponseSerializer(serializers.Serializer):
     answer = serializers.CharField(help_text="생성된 답변")
     sources = serializers.ListField(help_text="참조된 요양원 정보")
     query = serializers.CharField(help_text="원본 질문")
+    metadata = serializers.DictField(required=False, help_text="검색 단계별 소요 시간(ms) 등 부가 정보")
+
+class IndexingJobSerializer(serializers.ModelSerializer):
+    throughput = serializers.SerializerMethodField(help_text="초당 처리 시설 수")
+    eta_seconds = serializers.SerializerMethodField(help_text="남은 예상 시간(초)")
+    message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = IndexingJob
+        fields = [
+            'id', 'status', 'phase', 'rebuild', 'processed', 'total', 'throughput', 'eta_seconds',
+            'started_at', 'finished_at', 'stats', 'error', 'message',
+        ]
+
+    def get_throughput(self, obj):
+        rate = obj.throughput()
+        return round(rate, 1) if rate is not None else None
+
+    def get_eta_seconds(self, obj):
+        eta = obj.eta_seconds()
+        return round(eta) if eta is not None else None
+
+    def get_message(self, obj):
+        if obj.status == 'done':
+            return format_stats(obj.stats)
+        if obj.status == 'failed':
+            return f'RAG 초기화 중 오류가 발생했습니다: {obj.error}'
+        return f"{obj.get_phase_display()} 중 ({obj.processed}/{obj.total})"
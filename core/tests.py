@@ -1,10 +1,37 @@
+import asyncio
+import glob
+import io
 import json
-from django.test import TestCase
+import tempfile
+import threading
+import time
+from pathlib import Path
+import requests
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.urls import reverse
-from unittest.mock import patch
+from django.utils import timezone
+from bs4 import BeautifulSoup
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from .models import ChatMessage
+from .models import ChatMessage, CrawlTask, Facility, FacilityAttribute, FacilityBasic, FacilityLocation, IndexingJob
+from . import rag_service
+from .attributes import AttributeFilter
+from .indexing import STALE_AFTER, IndexingBusy, enqueue_reindex, start_indexing_job
+from .embedding_cache import CachedEncoder, EmbeddingCache, text_hash
+from .vector_store import NumpyVectorStore
+from .query_parser import district_vocabulary, extract_region, parse_query
+from .crawler.parser import parse_detail, parse_detail_legacy
+from .crawler.ratelimit import TokenBucket
+from .crawler.fetch import FetchResult, FetchStats, HttpDetailFetcher, has_detail_markup
+from .crawler.fingerprint import FingerprintStore, fingerprint_detail
+from .crawler.frontier import CrawlFrontier
+from .crawler.writer import FacilityBatchWriter
+from .management.commands.crawl_nursinghomes import Command as CrawlCommand, CrawlStats
 
 
 class AuthChatTests(TestCase):
@@ -22,9 +49,9 @@ class AuthChatTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertNotIn("_auth_user_id", self.client.session)
 
-    @patch("core.views.RAGService")
+    @patch("core.views.get_rag_service")
     def test_chat_history_saved_only_for_authenticated_users(self, mock_rag):
-        mock_rag.return_value.chat.return_value = {"answer": "hi", "sources": []}
+        mock_rag.return_value.chat.return_value = {"answer": "hi", "sources": [], "query": "hello"}
         chat_url = reverse("core:chatbot_api")
 
         # Authenticated
@@ -38,3 +65,1219 @@ class AuthChatTests(TestCase):
         response = self.client.post(chat_url, data=json.dumps({"query": "hi"}), content_type="application/json")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(ChatMessage.objects.filter(user=self.user).count(), 2)
+
+
+class RAGServiceSingletonTests(TestCase):
+    def setUp(self):
+        rag_service._rag_service = None
+
+    def tearDown(self):
+        rag_service._rag_service = None
+
+    @patch("core.rag_service.RAGService")
+    def test_shared_instance_is_created_once(self, mock_cls):
+        first = rag_service.get_rag_service()
+        second = rag_service.get_rag_service()
+        self.assertIs(first, second)
+        self.assertEqual(mock_cls.call_count, 1)
+
+    @patch("core.rag_service.RAGService")
+    def test_reload_keeps_model_unless_requested(self, mock_cls):
+        mock_cls.side_effect = lambda: MagicMock()
+        service = rag_service.get_rag_service()
+        self.assertIs(rag_service.reload_rag_service(), service)
+        self.assertIsNot(rag_service.reload_rag_service(reload_model=True), service)
+        self.assertEqual(mock_cls.call_count, 2)
+
+
+class FakeCollection:
+    """ChromaDB 컬렉션의 get/upsert/delete/query 최소 구현"""
+
+    def __init__(self):
+        self.items = {}
+
+    def get(self, ids=None, where=None, include=None):
+        keys = [
+            k for k in self.items
+            if (ids is None or k in ids) and self.matches(self.items[k]["metadata"], where)
+        ]
+        return {
+            'ids': keys,
+            'metadatas': [self.items[k]['metadata'] for k in keys],
+            'documents': [self.items[k]['document'] for k in keys],
+        }
+
+    def upsert(self, documents, metadatas, ids, embeddings):
+        for doc_id, doc, meta, emb in zip(ids, documents, metadatas, embeddings):
+            self.items[doc_id] = {'document': doc, 'metadata': meta, 'embedding': emb}
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.items.pop(doc_id, None)
+
+    @staticmethod
+    def matches(meta, where):
+        if not where:
+            return True
+        if "$and" in where:
+            return all(FakeCollection.matches(meta, cond) for cond in where["$and"])
+        return all(
+            meta.get(key) in cond["$in"] if isinstance(cond, dict) else meta.get(key) == cond
+            for key, cond in where.items()
+        )
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        import numpy as np
+        query = np.array(query_embeddings[0])
+        hits = sorted(
+            (float(np.linalg.norm(np.array(item["embedding"]) - query)), doc_id)
+            for doc_id, item in self.items.items() if self.matches(item["metadata"], where)
+        )[:n_results]
+        return {
+            "ids": [[doc_id for _, doc_id in hits]],
+            "documents": [[self.items[doc_id]["document"] for _, doc_id in hits]],
+            "metadatas": [[self.items[doc_id]["metadata"] for _, doc_id in hits]],
+            "distances": [[distance for distance, _ in hits]],
+        }
+
+
+class FakeEmbeddingModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        import numpy as np
+        self.encoded.extend(texts)
+        return np.array([[float(len(t)), 1.0] for t in texts])
+
+
+def make_fake_rag_service(chunking="facility"):
+    service = rag_service.RAGService.__new__(rag_service.RAGService)
+    service._lock = threading.RLock()
+    service.chunking = chunking
+    service.vector_store = "fake"
+    service._init_caches()
+    service._init_index_version()
+    service.collection = FakeCollection()
+    service.embedding_model = FakeEmbeddingModel()
+    return service
+
+
+class IncrementalEmbeddingTests(TestCase):
+    def setUp(self):
+        self.a = Facility.objects.create(code="1001", name="가나요양원", grade="A등급")
+        self.b = Facility.objects.create(code="1002", name="다라요양원", grade="B등급")
+        FacilityBasic.objects.create(facility=self.a, title="설립일", content="2010-01-01")
+        self.service = make_fake_rag_service()
+
+    def test_only_changed_facilities_are_reembedded(self):
+        stats = self.service.embed_facilities()
+        self.assertGreater(stats.pop('docs_per_sec'), 0)
+        self.assertEqual(stats, {'added': 2, 'updated': 0, 'unchanged': 0, 'removed': 0, 'total': 2, 'embedded': 2})
+
+        self.service.embedding_model.encoded.clear()
+        self.b.grade = "A등급"
+        self.b.save()
+        self.a.delete()
+        Facility.objects.create(code="1003", name="마바요양원")
+        stats = self.service.embed_facilities()
+        stats.pop('docs_per_sec')
+        self.assertEqual(stats, {'added': 1, 'updated': 1, 'unchanged': 0, 'removed': 1, 'total': 2, 'embedded': 2})
+        self.assertEqual(len(self.service.embedding_model.encoded), 2)
+        self.assertNotIn(f"facility_{self.a.id}", self.service.collection.items)
+
+        self.service.embedding_model.encoded.clear()
+        stats = self.service.embed_facilities()
+        self.assertEqual(stats['unchanged'], 2)
+        self.assertEqual(self.service.embedding_model.encoded, [])
+
+
+class EmbeddingPipelineTests(TestCase):
+    def test_length_bucketed_batches_are_all_written(self):
+        model, collection = FakeEmbeddingModel(), FakeCollection()
+        pipeline = rag_service.EmbeddingPipeline(model, collection, batch_size=2)
+        docs = ["x" * n for n in (9, 1, 7, 3, 5, 2, 8)]
+        for i, doc in enumerate(docs):
+            pipeline.add(f"doc_{i}", doc, {"facility_id": i})
+        pipeline.close()
+        self.assertEqual(pipeline.embedded, 7)
+        self.assertEqual(len(collection.items), 7)
+        # 길이순 정렬 후 2개씩 인코딩 -> 비슷한 길이끼리 같은 배치
+        self.assertEqual([len(doc) for doc in model.encoded], [1, 2, 3, 5, 7, 8, 9])
+        self.assertEqual(collection.items["doc_0"]["embedding"][0], 9.0)
+
+    def test_encoder_errors_propagate(self):
+        model = MagicMock()
+        model.encode.side_effect = RuntimeError("encode failed")
+        pipeline = rag_service.EmbeddingPipeline(model, FakeCollection(), batch_size=1)
+        pipeline.add("doc_0", "문서", {"facility_id": 0})
+        with self.assertRaises(RuntimeError):
+            pipeline.close()
+
+
+class FacilityDocumentQueryTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            facility = Facility.objects.create(code=f"20{i}", name=f"시설{i}")
+            FacilityBasic.objects.create(facility=facility, title="설립일", content="2010-01-01")
+
+    def test_query_count_is_constant_per_chunk(self):
+        # 시설 조회 1회 + 청크마다 하위 섹션 6개 테이블 -> 1 + 6*3 (시설 수와 무관)
+        with self.assertNumQueries(19):
+            docs = list(rag_service.iter_facility_documents(chunk_size=2))
+        self.assertEqual(len(docs), 5)
+        self.assertIn("- 설립일: 2010-01-01", docs[0][1])
+
+
+class QueryPlanIndexTests(TestCase):
+    def setUp(self):
+        for i in range(30):
+            Facility.objects.create(code=f"30{i}", name=f"시설{i}", grade="A등급" if i % 2 else "B등급", kind="요양원")
+
+    def plans(self, url):
+        """url 요청 중 필터/정렬이 있는 시설 SELECT 의 EXPLAIN QUERY PLAN 목록 (필터 없는 COUNT 제외)"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        selects = [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and 'FROM "core_facility"' in q["sql"]
+            and ("WHERE" in q["sql"] or "ORDER BY" in q["sql"])
+        ]
+        self.assertTrue(selects)
+        with connection.cursor() as cursor:
+            return [
+                " / ".join(row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall())
+                for sql in selects
+            ]
+
+    def assertUsesIndex(self, url, index):
+        for plan in self.plans(url):
+            self.assertIn(index, plan)
+            self.assertNotIn("TEMP B-TREE", plan)  # 정렬도 인덱스 순서로 처리
+
+    def test_list_and_filters_use_indexes(self):
+        self.assertUsesIndex("/api/facilities/", "facility_name_idx")
+        self.assertUsesIndex("/api/facilities/?grade=A등급", "facility_grade_name_idx")
+        self.assertUsesIndex("/api/facilities/?kind=요양원", "facility_kind_name_idx")
+        self.assertUsesIndex("/api/facilities/?availability=가능", "facility_avail_name_idx")
+
+    def test_chat_history_uses_user_created_index(self):
+        user = User.objects.create_user("tester", password="pw")
+        explained = ChatMessage.objects.filter(user=user).explain()
+        self.assertIn("chatmsg_user_created_idx", explained)
+        self.assertNotIn("TEMP B-TREE", explained)
+
+
+class TokenBucketTests(TestCase):
+    def test_shared_bucket_caps_total_rate(self):
+        async def run():
+            bucket = TokenBucket(rate=50, burst=2)
+            start = time.monotonic()
+            # 워커 4개가 합쳐서 7회 요청: burst 2개 이후 5개는 1/50초 간격
+            await asyncio.gather(*(self._acquire_n(bucket, n) for n in (2, 2, 2, 1)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        self.assertGreaterEqual(elapsed, 0.09)
+
+    @staticmethod
+    async def _acquire_n(bucket, n):
+        for _ in range(n):
+            await bucket.acquire()
+
+
+class CrawlStatsTests(TestCase):
+    def test_merge_aggregates_shards(self):
+        first = CrawlStats(saved_codes={"1", "2"}, dup_skipped=1, regions_done=["서울시"])
+        first.region_counts["서울시"] += 2
+        second = CrawlStats(saved_codes={"2", "3"}, dup_updated=2, failed=1, regions_done=["부산시"])
+        second.region_counts["부산시"] += 1
+        first.merge(second)
+        self.assertEqual(first.saved_codes, {"1", "2", "3"})
+        self.assertEqual((first.dup_skipped, first.dup_updated, first.failed), (1, 2, 1))
+        self.assertEqual(first.region_counts, {"서울시": 2, "부산시": 1})
+        self.assertEqual(first.regions_done, ["서울시", "부산시"])
+
+
+DETAIL_HTML = (
+    '<div class="section-view-title" data-kind="요양원"><span class="section-view-grade">A등급</span>'
+    '<h3><em>가나요양원</em></h3><dl><dt>정원</dt><dd>30명</dd></dl></div>'
+    '<h4>기본정보</h4><div class="section-view-content2"><dl><dt>전화</dt><dd>02-1234-5678</dd></dl></div>'
+    '<div class="section-calc-content"><div class="section-calc-label" data-focus="non_benefit">비급여 항목</div></div>'
+)
+
+
+class DetailFetchFallbackTests(TestCase):
+    def setUp(self):
+        self.command = CrawlCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        self.command.fetch_stats = FetchStats()
+        self.command.http_fetcher = MagicMock()
+        self.limiter = TokenBucket(rate=1000, burst=10)
+
+    def fetch(self):
+        return asyncio.run(self.command._fetch_detail(MagicMock(), "https://example.com/view/A/1", self.limiter))
+
+    def test_http_result_used_when_markup_present(self):
+        self.command.http_fetcher.fetch.return_value = FetchResult(html=DETAIL_HTML, etag='"v1"')
+        with patch.object(CrawlCommand, "_safe_detail", new=AsyncMock()) as browser_fetch:
+            detail = self.fetch()
+        self.assertIsNotNone(detail.soup.select_one(".section-view-title"))
+        self.assertEqual(detail.etag, '"v1"')
+        browser_fetch.assert_not_called()
+        self.assertEqual(self.command.fetch_stats.fallbacks, 0)
+
+    def test_falls_back_to_playwright_without_markup(self):
+        self.command.http_fetcher.fetch.return_value = FetchResult(html="<html><body>loading...</body></html>")
+        with patch.object(CrawlCommand, "_safe_detail", new=AsyncMock(return_value=DETAIL_HTML)):
+            detail = self.fetch()
+        self.assertIsNotNone(detail.soup.select_one(".section-view-title"))
+        self.assertEqual(self.command.fetch_stats.fallbacks, 1)
+        self.assertEqual(set(self.command.fetch_stats.latencies), {"http", "playwright"})
+
+    def test_title_only_page_falls_back(self):
+        skeleton = '<div class="section-view-title"><h3><em>가나요양원</em></h3></div>'
+        self.command.http_fetcher.fetch.return_value = FetchResult(html=skeleton)
+        with patch.object(CrawlCommand, "_safe_detail", new=AsyncMock(return_value=DETAIL_HTML)) as browser_fetch:
+            detail = self.fetch()
+        browser_fetch.assert_awaited_once()
+        self.assertIsNotNone(detail.soup.select_one(".section-calc-label"))
+
+    def test_page_without_non_covered_section_uses_http(self):
+        html = DETAIL_HTML.split('<div class="section-calc-content">')[0]
+        self.command.http_fetcher.fetch.return_value = FetchResult(html=html)
+        with patch.object(CrawlCommand, "_safe_detail", new=AsyncMock()) as browser_fetch:
+            detail = self.fetch()
+        browser_fetch.assert_not_called()
+        self.assertEqual(parse_detail(detail.soup, "https://example.com/view/A/1")["non_covered_items"], [])
+
+    def test_http_fetcher_decodes_utf8_without_charset(self):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/html"
+        response._content = DETAIL_HTML.encode("utf-8")
+        # HTTPAdapter 와 같은 방식으로 설정 (charset 없는 text/* -> ISO-8859-1)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        fetcher = HttpDetailFetcher("test-agent")
+        with patch.object(fetcher.session, "get", return_value=response):
+            result = fetcher.fetch("https://example.com/view/A/1")
+        self.assertIn("가나요양원", result.html)
+        self.assertTrue(has_detail_markup(BeautifulSoup(result.html, "lxml")))
+
+
+class DetailHandlingTests(TestCase):
+    url = "https://www.seniortalktalk.com/search/view/A03/1001?page=1"
+
+    def setUp(self):
+        self.command = CrawlCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        self.command.best_scores = {}
+        self.command.frontier = MagicMock()
+        self.command.writer = FacilityBatchWriter(batch_size=1)
+        self.command._pending_done = []
+
+    def handle(self, stats=None):
+        soup = BeautifulSoup(DETAIL_HTML, "lxml")
+        stats = stats or CrawlStats()
+        return asyncio.run(self.command._handle_detail_soup(soup, self.url, "서울시", stats))
+
+    def test_parse_runs_off_event_loop(self):
+        threads = []
+        parse = CrawlCommand.parse_detail
+
+        def record_thread(command, soup, url):
+            threads.append(threading.current_thread())
+            return parse(command, soup, url)
+
+        with patch.object(CrawlCommand, "parse_detail", new=record_thread), \
+                patch.object(CrawlCommand, "_write_batch", return_value={}):
+            self.handle()
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_failed_batch_marks_details_failed_and_is_not_counted(self):
+        stats = CrawlStats()
+        with patch.object(CrawlCommand, "_write_batch", side_effect=RuntimeError("database is locked")):
+            self.handle(stats)
+        # 저장 실패한 시설은 재시도 대상으로 남고, 다음 수집에서 다시 저장될 수 있어야 한다
+        self.command.frontier.mark_detail_failed.assert_called_once_with(self.url, "저장 실패: database is locked")
+        self.assertEqual((stats.saved_codes, stats.failed, dict(stats.region_counts)), (set(), 1, {}))
+        self.assertEqual((self.command.best_scores, self.command._buffered_scores), ({}, {}))
+
+        with patch.object(CrawlCommand, "_write_batch", return_value={}):
+            code, richness = self.handle(stats)
+        self.assertEqual(self.command.best_scores, {code: richness})
+        self.assertEqual(self.command._buffered_scores, {})
+        self.assertEqual((stats.saved_codes, dict(stats.region_counts)), ({code}, {"서울시": 1}))
+
+
+    def test_retry_pass_flushes_before_next_query(self):
+        self.command.frontier.retryable_details.side_effect = [[("서울시", self.url, None)], []]
+        with patch.object(CrawlCommand, "_crawl_shard", new=AsyncMock(return_value=CrawlStats())), \
+                patch.object(CrawlCommand, "_flush_writes", new=AsyncMock()) as flush:
+            asyncio.run(self.command._retry_failed(MagicMock(), 1, 1.0, MagicMock(total=0)))
+        flush.assert_awaited_once()
+
+class CrawlFrontierTests(TestCase):
+    def setUp(self):
+        self.frontier = CrawlFrontier()
+
+    def test_resume_state_round_trip(self):
+        self.frontier.add_details("서울시", ["https://a/1", "https://a/2", "https://a/3"])
+        self.frontier.mark_list_page("https://list?page=1", "서울시", 1, 3)
+        self.frontier.mark_detail_done("https://a/1", "1001", 500)
+        self.frontier.mark_detail_done("https://a/2", "1001", 900)
+
+        self.assertEqual(self.frontier.list_page_link_count("https://list?page=1"), 3)
+        self.assertIsNone(self.frontier.list_page_link_count("https://list?page=2"))
+        self.assertEqual(self.frontier.best_scores(), {"1001": 900})
+        self.assertEqual(self.frontier.pending_details(), [("서울시", "https://a/3")])
+        self.assertEqual(len(self.frontier.seen_detail_urls()), 3)
+
+    def test_failed_details_back_off_until_max_attempts(self):
+        self.frontier.add_details("부산시", ["https://b/1"])
+        self.frontier.mark_detail_failed("https://b/1", "timeout")
+        first = CrawlTask.objects.get(url="https://b/1")
+        self.frontier.mark_detail_failed("https://b/1", "timeout")
+        second = CrawlTask.objects.get(url="https://b/1")
+        self.assertGreater(second.next_attempt_at - second.updated_at, first.next_attempt_at - first.updated_at)
+        self.assertEqual(len(self.frontier.retryable_details()), 1)
+
+        self.frontier.mark_detail_failed("https://b/1", "timeout")
+        self.assertEqual(self.frontier.retryable_details(), [])
+
+
+class ChangedOnlyCrawlTests(TransactionTestCase):
+    # 커맨드의 DB 접근은 sync_to_async 스레드(별도 커넥션)에서 실행되므로 트랜잭션 래핑 없이 실행
+    url = "https://www.seniortalktalk.com/search/view/A03/1001?page=1"
+
+    def setUp(self):
+        self.command = CrawlCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        self.command.fetch_stats = FetchStats()
+        self.command.http_fetcher = None
+        self.command.frontier = CrawlFrontier()
+        self.command.best_scores = {}
+        self.command.changed_only = True
+        self.command.fingerprints = FingerprintStore().load()
+        self.command.writer = FacilityBatchWriter(batch_size=1)
+        self.command._pending_done = []
+        self.command.changed_codes = set()
+        self.limiter = TokenBucket(rate=1000, burst=10)
+
+    def process(self):
+        stats = CrawlStats()
+        with patch.object(CrawlCommand, "_safe_detail", new=AsyncMock(return_value=DETAIL_HTML)):
+            asyncio.run(self.command._process_detail(MagicMock(), self.url, "서울시", self.limiter, stats))
+        return stats
+
+    def test_unchanged_page_skips_parse_and_save(self):
+        self.process()
+        self.assertTrue(Facility.objects.filter(code="1001").exists())
+
+        self.command.best_scores = {}
+        with patch.object(FacilityBatchWriter, "write") as write:
+            stats = self.process()
+        write.assert_not_called()
+        self.assertEqual(stats.unchanged, 1)
+        self.assertIn("1001", self.command.best_scores)
+
+    def test_homepage_change_alters_fingerprint(self):
+        page = '<div class="section-view-title"><h3>가나</h3></div><p><b>홈페이지</b> <a href="{}">홈</a></p>'
+        old = fingerprint_detail(BeautifulSoup(page.format("http://a.example"), "lxml"))
+        new = fingerprint_detail(BeautifulSoup(page.format("http://b.example"), "lxml"))
+        self.assertNotEqual(old, new)
+
+
+FULL_DETAIL_HTML = """
+<html><head><title>가나요양원 | 시니어톡톡</title></head><body>
+<h1>시니어톡톡</h1>
+<div class="section-view-title" data-kind=" 요양원 ">
+  <span class="section-view-grade">A등급</span>
+  <h3><em>가나요양원</em></h3>
+  <p class="section-view-address">서울특별시 강남구 역삼로 1</p>
+  <dl><dt>정원</dt><dd>1,200명</dd><dt>현원</dt><dd>30명</dd><dt>대기</dt><dd>5명</dd><dt>이용 가능</dt><dd>입소 가능</dd></dl>
+</div>
+<h4>기본정보</h4>
+<div class="section-view-content2"><dl>
+  <dt>설립일</dt><dd>2010-01-01</dd><dt>전화</dt><dd><a href=" tel:0212345678 ">02-1234-5678</a></dd><dt></dt><dd>무시</dd>
+</dl></div>
+<h4>평가정보</h4><h4>인력현황</h4>
+<div class="section-view-content2"><dl><dt>간호사</dt><dd>3명</dd><dt>요양보호사</dt><dd>12명</dd></dl></div>
+<h4>프로그램운영</h4>
+<div class="section-view-content2"><dl><dt>여가</dt><dd>원예, 음악</dd></dl></div>
+<h4>위치</h4>
+<div class="section-view-content"><p>서울특별시 강남구 역삼로 1</p><p></p><p>(역삼동)</p></div>
+<div class="section-view-content2"><dl><dt>교통</dt><dd>역삼역 3번 출구</dd><dt>주차</dt><dd></dd></dl></div>
+<p><b>홈페이지</b> <a href="">가나요양원 홈</a></p>
+<div class="section-calc-content">
+  <div class="section-calc-label" data-focus="non_benefit">비급여 항목</div>
+  <div class="section-calc-item"><ul>
+    <li><label>식재료비 : 300,000원</label></li>
+    <li><label>이미용비   20,000원</label></li>
+    <li><label>기타</label></li>
+    <li>라벨 없음</li>
+  </ul></div>
+</div>
+</body></html>
+"""
+
+
+class FacilityBatchWriterTests(TestCase):
+    def facility_data(self, code, capacity=None, basic=(), location=()):
+        return {
+            "overview": {"code": code, "name": f"시설{code}", "kind": "요양원", "grade": "A등급", "capacity": capacity},
+            "basic_items": [{"title": t, "content": c} for t, c in basic],
+            "location_items": [{"title": t, "content": c} for t, c in location],
+        }
+
+    def test_batch_upserts_facilities_and_syncs_children(self):
+        writer = FacilityBatchWriter(batch_size=3)
+        for code in ("1", "2"):
+            writer.add(self.facility_data(code, capacity=10, basic=[("전화", "02")], location=[("주소", "서울")]))
+        self.assertTrue(writer.add(self.facility_data("3", basic=[("전화", "02")])))
+        # 시설 조회/upsert + 섹션별 조회/insert + 속성 재생성(섹션 4개 조회, delete, insert)
+        # + 전문 검색/bigram 색인(문서 조회 7, 테이블별 delete, insert) -> 배치 크기와 무관한 상수
+        with self.assertNumQueries(30):
+            changes = writer.flush()
+        self.assertEqual(set(changes), {"1", "2", "3"})
+        self.assertTrue(all(change.created for change in changes.values()))
+        location_id = FacilityLocation.objects.get(facility__code="2").id
+
+        writer.add(self.facility_data("1", capacity=None, location=[("주소", "부산")]))
+        writer.add(self.facility_data("2", capacity=10, basic=[("전화", "02")], location=[("주소", "서울")]))
+        writer.add(self.facility_data("3", capacity=20, basic=[("전화", "031"), ("설립일", "2010")]))
+        changes = writer.flush()
+        first, third = Facility.objects.get(code="1"), Facility.objects.get(code="3")
+        self.assertEqual(first.capacity, 10)  # 값이 없으면 기존 값 유지
+        self.assertEqual(list(first.basic_items.values_list("content", flat=True)), ["02"])  # 빈 목록은 동기화하지 않음
+        self.assertEqual(list(first.location_items.values_list("content", flat=True)), ["부산"])
+        self.assertEqual((third.capacity, third.basic_items.count()), (20, 2))
+        self.assertEqual(Facility.objects.count(), 3)
+
+        # 내용이 같은 시설/행은 건드리지 않는다
+        self.assertFalse(changes["2"].changed)
+        self.assertEqual(FacilityLocation.objects.get(facility__code="2").id, location_id)
+        self.assertEqual((changes["1"].fields_changed, changes["1"].sections), (False, {"location_items"}))
+        self.assertEqual((changes["3"].fields_changed, changes["3"].sections), (True, {"basic_items"}))
+
+    def test_section_rows_follow_legacy_persistence_rules(self):
+        long_title = "가" * 120
+        data = {
+            **self.facility_data("1", basic=[("", "무시"), (long_title, "1")], location=[("", "역삼동")]),
+            "non_covered_items": [{"title": long_title, "content": ""}],
+        }
+        FacilityBatchWriter().write({"1": data})
+        facility = Facility.objects.get(code="1")
+        # 기본/평가/인력/프로그램: 제목 없는 행 제외 + 100자 절단
+        self.assertEqual(list(facility.basic_items.values_list("title", flat=True)), [long_title[:100]])
+        # 위치/비급여: 파싱 행을 그대로 저장
+        self.assertEqual(list(facility.location_items.values_list("title", "content")), [("", "역삼동")])
+        self.assertEqual(list(facility.noncovered_items.values_list("title", flat=True)), [long_title])
+
+    def test_duplicate_titles_are_matched_in_order(self):
+        writer = FacilityBatchWriter()
+        rows = [("기타", "1,000원"), ("기타", "2,000원")]
+        writer.write({"1": {**self.facility_data("1"), "non_covered_items": [{"title": t, "content": c} for t, c in rows]}})
+        ids = list(Facility.objects.get(code="1").noncovered_items.order_by("id").values_list("id", flat=True))
+        rows[1] = ("기타", "3,000원")
+        changes = writer.write({"1": {**self.facility_data("1"), "non_covered_items": [{"title": t, "content": c} for t, c in rows]}})
+        self.assertEqual(changes["1"].sections, {"non_covered_items"})
+        stored = Facility.objects.get(code="1").noncovered_items.order_by("id")
+        self.assertEqual(list(stored.values_list("id", flat=True)), ids)
+        self.assertEqual(list(stored.values_list("content", flat=True)), ["1,000원", "3,000원"])
+
+
+class MigrationBackfillTests(TransactionTestCase):
+    """기존 설치에서 마이그레이션만으로 새 색인/속성 테이블이 채워지는지"""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("core", target)])
+        return executor.loader.project_state([("core", target)]).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes("core")[0][1])
+
+    def create_facility(self, apps):
+        facility = apps.get_model("core", "Facility").objects.create(code="1", name="가나요양원", grade="A등급")
+        apps.get_model("core", "FacilityStaff").objects.create(facility=facility, title="간호사", content="3명")
+        apps.get_model("core", "FacilityNonCovered").objects.create(facility=facility, title="식재료비", content="300,000원")
+        return facility
+
+    def test_attributes_backfilled(self):
+        facility = self.create_facility(self.migrate("0007_facility_indexes"))
+        self.migrate("0008_facilityattribute")
+        rows = FacilityAttribute.objects.filter(facility_id=facility.pk).values_list("section", "key", "number", "unit")
+        self.assertEqual(set(rows), {("staff", "간호사", 3.0, "명"), ("noncovered", "식재료비", 300000.0, "원")})
+
+
+    def test_fulltext_and_ngram_backfilled(self):
+        facility = self.create_facility(self.migrate("0008_facilityattribute"))
+        self.migrate("0010_facility_ngram")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT rowid, name, body FROM core_facility_fts")
+            rows = cursor.fetchall()
+            cursor.execute("SELECT rowid FROM core_facility_ngram WHERE core_facility_ngram MATCH '식재'")
+            ngram_ids = [row[0] for row in cursor.fetchall()]
+        self.assertEqual([(rowid, name) for rowid, name, _ in rows], [(facility.pk, "가나요양원")])
+        self.assertIn("- 식재료비: 300,000원", rows[0][2])
+        self.assertEqual(ngram_ids, [facility.pk])
+
+class FacilityAttributeTests(TestCase):
+    def setUp(self):
+        writer = FacilityBatchWriter()
+        writer.write({
+            "1": {
+                "overview": {"code": "1", "name": "가나요양원"},
+                "staff_items": [{"title": "간호사", "content": "12명"}],
+                "evaluation_items": [{"title": "평가등급", "content": "A등급"}],
+                "non_covered_items": [{"title": "식재료비", "content": "250,000원"}],
+            },
+            "2": {
+                "overview": {"code": "2", "name": "다라요양원"},
+                "staff_items": [{"title": "간호사", "content": "3명"}],
+                "non_covered_items": [{"title": "식재료비", "content": "330,000원"}],
+            },
+        })
+        self.first = Facility.objects.get(code="1")
+
+    def names(self, *attrs):
+        query = "&".join(f"attr={attr}" for attr in attrs)
+        response = self.client.get(f"/api/facilities/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [row["name"] for row in response.json()["results"]]
+
+    def test_writer_extracts_typed_attributes(self):
+        attr = self.first.attributes.get(section="noncovered", key="식재료비")
+        self.assertEqual((attr.number, attr.unit), (250000, "원"))
+        self.assertEqual(self.first.attributes.get(section="evaluation").text, "A등급")
+
+        # 관련 섹션이 바뀌면 속성도 갱신된다
+        FacilityBatchWriter().write({"1": {"overview": {"code": "1", "name": "가나요양원"}, "non_covered_items": []}})
+        self.assertFalse(self.first.attributes.filter(section="noncovered").exists())
+        self.assertTrue(self.first.attributes.filter(section="staff").exists())
+
+    def test_api_filters_by_attributes(self):
+        self.assertEqual(self.names("staff:간호사>=10"), ["가나요양원"])
+        self.assertEqual(self.names("noncovered:식재료비<=300000", "evaluation:평가등급=A등급"), ["가나요양원"])
+        self.assertEqual(self.names("noncovered:식재료비>100000"), ["가나요양원", "다라요양원"])
+        self.assertEqual(self.client.get("/api/facilities/?attr=staff:간호사>=많음").status_code, 400)
+
+    def test_rag_search_is_prefiltered(self):
+        service = make_fake_rag_service()
+        service.embed_facilities()
+        with patch.object(service, "generate_answer", return_value="답변"):
+            result = service.chat("식비가 저렴한 곳", filters=[AttributeFilter.parse("staff:간호사<5")])
+            self.assertEqual([s["facility_name"] for s in result["sources"]], ["다라요양원"])
+            result = service.chat("식비가 저렴한 곳", filters=[AttributeFilter.parse("staff:간호사>100")])
+        self.assertEqual(result["sources"], [])
+
+
+class FacilityFullTextSearchTests(TestCase):
+    def setUp(self):
+        FacilityBatchWriter().write({
+            "1": {
+                "overview": {"code": "1", "name": "강남요양원", "grade": "A등급"},
+                "program_items": [{"title": "여가", "content": "치매예방 프로그램, 원예"}],
+            },
+            "2": {
+                "overview": {"code": "2", "name": "송파실버센터"},
+                "location_items": [{"title": "주소", "content": "서울특별시 송파구 (강남역 인근)"}],
+                "program_items": [{"title": "여가", "content": "<b>음악</b> 치료"}],
+            },
+        })
+
+    def search(self, q):
+        response = self.client.get("/api/facilities/search/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_prefix_search_with_highlight(self):
+        body = self.search("강남")
+        # 시설명 일치가 본문 일치보다 앞선다
+        self.assertEqual([row["name"] for row in body["results"]], ["강남요양원", "송파실버센터"])
+        self.assertEqual(body["results"][0]["name_highlight"], "<mark>강남요양원</mark>")
+        self.assertIn("<mark>치매예방</mark>", self.search("치매 원예")["results"][0]["snippet"])
+        self.assertEqual(self.search("송파 치매")["count"], 0)  # 모든 단어 포함(AND)
+        # 본문은 HTML 이스케이프 후 강조 태그만 추가
+        self.assertIn("&lt;b&gt;<mark>음악</mark>&lt;/b&gt;", self.search("음악")["results"][0]["snippet"])
+
+    def test_index_follows_writer_changes(self):
+        FacilityBatchWriter().write({"2": {"overview": {"code": "2", "name": "잠실실버센터"}, "location_items": []}})
+        self.assertEqual([row["name"] for row in self.search("강남")["results"]], ["강남요양원"])
+        self.assertEqual(self.search("잠실")["count"], 1)
+        self.assertEqual(self.client.get("/api/facilities/search/").status_code, 400)
+
+
+class HybridRetrievalTests(TestCase):
+    def setUp(self):
+        writer = FacilityBatchWriter()
+        for code, name, address in (
+            ("1", "행복요양원", "서울특별시 송파구 올림픽로"),
+            ("2", "강남실버요양원", "서울특별시 강남구 테헤란로"),
+            ("3", "푸른요양원", "부산광역시 해운대구"),
+        ):
+            writer.add({"overview": {"code": code, "name": name}, "location_items": [{"title": "주소", "content": address}]})
+        writer.flush()
+        self.service = make_fake_rag_service()
+        self.service.embed_facilities()
+
+    def test_rrf_rewards_agreement_between_rankings(self):
+        fused = rag_service.reciprocal_rank_fusion([[1, 2, 3], [2, 4]], k=60)
+        self.assertEqual([item_id for item_id, _ in fused], [2, 1, 4, 3])
+        self.assertAlmostEqual(fused[0][1], 1 / 62 + 1 / 61)
+
+    def test_lexical_stage_finds_compound_names(self):
+        # 벡터 검색은 강남 시설을 2위로 두지만, 띄어쓰기 없는 '강남실버요양원' 안의 '강남' 이
+        # bigram 일치로 어휘 검색 1위가 되어 결합 순위 1위가 된다
+        collection = self.service.collection
+        by_name = {item["metadata"]["facility_name"]: doc_id for doc_id, item in collection.items.items()}
+        dense_order = [by_name[name] for name in ("푸른요양원", "강남실버요양원", "행복요양원")]
+        dense = {
+            "ids": [dense_order],
+            "documents": [[collection.items[doc_id]["document"] for doc_id in dense_order]],
+            "metadatas": [[collection.items[doc_id]["metadata"] for doc_id in dense_order]],
+            "distances": [[0.1, 0.2, 0.3]],
+        }
+        with patch.object(collection, "query", return_value=dense):
+            results = self.service.search_facilities("강남 요양원", n_results=1, depth=3)
+        self.assertEqual(results["metadatas"][0][0]["facility_name"], "강남실버요양원")
+        self.assertEqual(results["candidates"], {"dense": 3, "lexical": 3, "depth": 3})
+        self.assertEqual(set(results["timings"]), {"embed_ms", "dense_ms", "lexical_ms", "fusion_ms"})
+
+    def test_chat_reports_stage_timings(self):
+        with patch.object(self.service, "generate_answer", return_value="답변"):
+            result = self.service.chat("해운대 요양원")
+        self.assertEqual(result["sources"][0]["facility_name"], "푸른요양원")
+        self.assertIn("generate_ms", result["metadata"]["timings"])
+        self.assertIn("total_ms", result["metadata"]["timings"])
+
+    @override_settings(RAG_HYBRID=False)
+    def test_dense_only_when_hybrid_disabled(self):
+        results = self.service.search_facilities("강남", n_results=2)
+        self.assertEqual(len(results["ids"][0]), 2)
+        self.assertNotIn("lexical_ms", results["timings"])
+
+
+class SectionChunkingTests(TestCase):
+    def setUp(self):
+        writer = FacilityBatchWriter()
+        for code, name, fee in (("1", "행복요양원", "300,000원"), ("2", "푸른요양원", "150,000원"), ("3", "하늘요양원", "")):
+            data = {
+                "overview": {"code": code, "name": name, "grade": "A등급"},
+                "location_items": [{"title": "주소", "content": "서울특별시 송파구 올림픽로"}],
+                "staff_items": [{"title": f"직종{i}", "content": f"{i}명"} for i in range(40)],
+            }
+            if fee:
+                data["non_covered_items"] = [{"title": "식재료비", "content": fee}]
+            writer.add(data)
+        writer.flush()
+        self.facility = Facility.objects.get(code="1")
+
+    def test_chunks_share_facility_id_and_keep_sections(self):
+        chunks = rag_service.build_facility_chunks(self.facility)
+        sections = [meta["section"] for _, _, meta in chunks]
+        self.assertEqual(sections[0], "overview")
+        self.assertIn("noncovered", sections)
+        self.assertIn("location", sections)
+        # 긴 섹션은 여러 청크로 나뉘고 각 청크 앞에 시설 헤더가 붙는다
+        self.assertGreater(sections.count("staff"), 1)
+        self.assertTrue(all(meta["facility_id"] == self.facility.id for _, _, meta in chunks))
+        self.assertTrue(all(doc.startswith("시설명: 행복요양원") for _, doc, _ in chunks))
+        self.assertTrue(all(len(doc) <= rag_service.CHUNK_MAX_CHARS + 100 for _, doc, _ in chunks))
+        self.assertEqual(len({doc_id for doc_id, _, _ in chunks}), len(chunks))
+
+    @override_settings(RAG_HYBRID=False)
+    def test_section_hits_are_aggregated_per_facility(self):
+        service = make_fake_rag_service(chunking="section")
+        stats = service.embed_facilities()
+        self.assertEqual(stats["total"], 3)
+        self.assertGreater(len(service.collection.items), 3)
+        results = service.search_facilities("식재료비 얼마", n_results=2)
+        facility_ids = [meta["facility_id"] for meta in results["metadatas"][0]]
+        self.assertEqual(len(facility_ids), 2)
+        self.assertEqual(len(set(facility_ids)), 2)
+        # LLM 에는 청크가 아닌 시설 전체 문서가 전달된다
+        for document, meta in zip(results["documents"][0], results["metadatas"][0]):
+            facility = Facility.objects.get(id=meta["facility_id"])
+            self.assertEqual(document, rag_service.build_facility_document(facility)[1])
+        self.assertIn("chunks", results["candidates"])
+
+
+class EmbeddingCacheTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = f"{self.tmpdir.name}/cache.sqlite3"
+
+    def test_lru_eviction_and_model_key(self):
+        cache = EmbeddingCache(self.path, "model-a", max_entries=2)
+        cache.put_many({text_hash("a"): [1.0, 0.0], text_hash("b"): [0.0, 1.0]})
+        cache.get_many([text_hash("a")])  # a 를 최근 사용으로
+        cache.put_many({text_hash("c"): [1.0, 1.0]})
+        self.assertEqual(set(cache.get_many([text_hash(t) for t in "abc"])), {text_hash("a"), text_hash("c")})
+        # 모델이 바뀌면 같은 텍스트도 캐시 미스
+        self.assertEqual(EmbeddingCache(self.path, "model-b").get_many([text_hash("a")]), {})
+
+    def test_put_many_counts_rows_only_when_over_limit(self):
+        cache = EmbeddingCache(self.path, "model-a", max_entries=3)
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        cache.put_many({text_hash("a"): [1.0], text_hash("b"): [1.0]})
+        cache.put_many({text_hash("a"): [2.0]})  # 기존 키 덮어쓰기
+        self.assertEqual([sql for sql in statements if "COUNT" in sql], [])
+        # 추정치가 한도를 넘으면 실제 행 수로 보정하고, 덮어쓴 키 때문에 잘못 지우지 않는다
+        cache.put_many({text_hash("c"): [1.0]})
+        self.assertEqual(len([sql for sql in statements if "COUNT" in sql]), 1)
+        self.assertEqual(len(cache), 3)
+        # 다른 프로세스가 쓴 행도 보정 시 반영되어 한도를 지킨다
+        EmbeddingCache(self.path, "model-b").put_many({text_hash("x"): [1.0], text_hash("y"): [1.0]})
+        cache.put_many({text_hash("d"): [1.0]})
+        self.assertEqual(len(cache), 3)
+
+    def test_reindex_reuses_cached_vectors(self):
+        Facility.objects.create(code="1", name="가나요양원")
+        Facility.objects.create(code="2", name="다라요양원")
+        service = make_fake_rag_service()
+        model = service.embedding_model
+        service.embedding_model = CachedEncoder(model, EmbeddingCache(self.path, "fake"))
+        first = service.embed_facilities()
+        self.assertEqual(first["cache"], {"hits": 0, "misses": 2, "hit_rate": 0.0})
+        second = service.embed_facilities(rebuild=True)
+        self.assertEqual(second["cache"], {"hits": 2, "misses": 0, "hit_rate": 1.0})
+        self.assertEqual(len(model.encoded), 2)
+        # 질문 인코딩도 같은 캐시를 사용
+        vectors = service.embedding_model.encode(["서울 요양원", "서울 요양원"])
+        self.assertEqual(vectors.shape, (2, 2))
+        self.assertEqual(len(model.encoded), 3)
+
+
+class ChatCacheTests(TestCase):
+    def setUp(self):
+        for code, name, address in (("1", "가나요양원", "서울특별시 강남구"), ("2", "다라요양원", "부산광역시 해운대구")):
+            facility = Facility.objects.create(code=code, name=name)
+            FacilityLocation.objects.create(facility=facility, title="주소", content=address)
+        self.service = make_fake_rag_service()
+        self.service.embed_facilities()
+
+    def chat(self, query):
+        with patch.object(self.service, "generate_answer", return_value="답변") as generate:
+            result = self.service.chat(query)
+        return result, generate.call_count
+
+    def test_similar_query_reuses_answer_within_same_conditions(self):
+        first, calls = self.chat("서울 요양원 추천")
+        self.assertEqual(calls, 1)
+        self.assertNotIn("cache", first["metadata"])
+        second, calls = self.chat("서울  요양원 추천?")
+        self.assertEqual(calls, 0)
+        self.assertEqual(second["metadata"]["cache"], "answer")
+        self.assertEqual(second["sources"], first["sources"])
+        # 지역 조건이 다르면 임베딩이 비슷해도 재사용하지 않는다
+        _, calls = self.chat("부산 요양원 추천")
+        self.assertEqual(calls, 1)
+
+    def test_reindex_invalidates_caches(self):
+        self.chat("서울 요양원 추천")
+        Facility.objects.filter(code="1").update(grade="A등급")
+        self.service.embed_facilities()
+        result, calls = self.chat("서울 요양원 추천")
+        self.assertEqual(calls, 1)
+        self.assertNotIn("cache", result["metadata"])
+
+    @override_settings(RAG_ANSWER_CACHE_SIZE=0)
+    def test_exact_query_reuses_retrieval(self):
+        self.service._init_caches()
+        self.chat("서울 요양원 추천")
+        with patch.object(self.service, "search_facilities") as search:
+            result, calls = self.chat("서울 요양원 추천")
+        search.assert_not_called()
+        self.assertEqual(calls, 1)
+        self.assertEqual(result["metadata"]["cache"], "query")
+
+
+class NumpyVectorStoreTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_query_filter_persist_and_delete(self):
+        store = NumpyVectorStore(self.tmpdir.name)
+        store.upsert(
+            ids=["a", "b", "c"], embeddings=[[0.0, 0.0], [1.0, 0.0], [5.0, 5.0]], documents=["A", "B", "C"],
+            metadatas=[{"facility_id": 1, "facility_region": "서울"}, {"facility_id": 2, "facility_region": "부산"},
+                       {"facility_id": 3, "facility_region": "서울"}],
+        )
+        result = store.query(query_embeddings=[[0.9, 0.0]], n_results=2)
+        self.assertEqual(result["ids"], [["b", "a"]])
+        self.assertAlmostEqual(result["distances"][0][0], 0.01, places=5)
+        where = {"$and": [{"facility_region": "서울"}, {"facility_id": {"$in": [1, 3]}}]}
+        self.assertEqual(store.query(query_embeddings=[[0.9, 0.0]], n_results=5, where=where)["ids"], [["a", "c"]])
+        store.persist()
+
+        reopened = NumpyVectorStore(self.tmpdir.name)
+        self.assertEqual(reopened.get(ids=["c"])["documents"], ["C"])
+        reopened.upsert(ids=["a"], embeddings=[[9.0, 9.0]], documents=["A2"], metadatas=[{"facility_id": 1}])
+        reopened.delete(ids=["b"])
+        self.assertEqual(reopened.query(query_embeddings=[[9.0, 9.0]], n_results=1)["documents"], [["A2"]])
+        self.assertEqual(reopened.count(), 2)
+
+
+    def test_persist_swaps_versions_atomically(self):
+        store = NumpyVectorStore(self.tmpdir.name, dtype="int8")
+        store.upsert(ids=["a", "b"], embeddings=[[0.0, 1.0], [1.0, 0.0]], documents=["A", "B"])
+        store.persist()
+        # 이전 버전을 연 워커는 이후 persist 와 상관없이 같은 버전을 계속 읽는다
+        reader = NumpyVectorStore(self.tmpdir.name, dtype="int8")
+        for n in range(3):
+            store.upsert(ids=[f"new{n}"], embeddings=[[float(n), 1.0]], documents=[f"N{n}"])
+            store.persist()
+        self.assertEqual(reader.query(query_embeddings=[[1.0, 0.0]], n_results=5)["ids"], [["b", "a"]])
+        reopened = NumpyVectorStore(self.tmpdir.name, dtype="int8")
+        self.assertEqual(reopened.count(), 5)
+        # 현재 + 직전 버전만 남긴다
+        self.assertEqual(len([p for p in Path(self.tmpdir.name).iterdir() if p.is_dir()]), 2)
+
+    def test_load_rejects_mismatched_files(self):
+        import numpy as np
+
+        store = NumpyVectorStore(self.tmpdir.name)
+        store.upsert(ids=["a", "b"], embeddings=[[0.0, 1.0], [1.0, 0.0]])
+        store.persist()
+        current = Path(self.tmpdir.name) / (Path(self.tmpdir.name) / "CURRENT").read_text()
+        np.save(current / "vectors.npy", np.zeros((1, 2), dtype=np.float32))
+        with self.assertRaises(ValueError):
+            NumpyVectorStore(self.tmpdir.name)
+
+    def test_int8_codes_rerank_to_float32_ranking(self):
+        import numpy as np
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(300, 16)).astype(np.float32)
+        ids = [f"facility_{i}" for i in range(300)]
+        exact = NumpyVectorStore(f"{self.tmpdir.name}/f32")
+        exact.upsert(ids=ids, embeddings=vectors)
+        store = NumpyVectorStore(f"{self.tmpdir.name}/int8", dtype="int8")
+        store.upsert(ids=ids, embeddings=vectors)
+        store.persist()
+        store = NumpyVectorStore(f"{self.tmpdir.name}/int8", dtype="int8")
+        queries = rng.normal(size=(5, 16)).astype(np.float32)
+        quantized = store.query(query_embeddings=queries, n_results=10)
+        baseline = exact.query(query_embeddings=queries, n_results=10)
+        self.assertEqual(quantized["ids"], baseline["ids"])
+        # 재정렬 후 거리는 float32 원본 기준
+        np.testing.assert_allclose(quantized["distances"], baseline["distances"], rtol=1e-4)
+        # int8 코드(1바이트) + 행별 float32 스케일 vs float32 원본
+        self.assertEqual(store.memory_usage(), {"vectors": 300, "search_bytes": 300 * (16 + 4), "full_bytes": 300 * 16 * 4})
+
+    def test_rag_service_on_numpy_store(self):
+        Facility.objects.create(code="1", name="가나요양원")
+        Facility.objects.create(code="2", name="다라요양원")
+        service = make_fake_rag_service()
+        service.collection = NumpyVectorStore(self.tmpdir.name)
+        self.assertEqual(service.embed_facilities()["added"], 2)
+        self.assertEqual(NumpyVectorStore(self.tmpdir.name).count(), 2)
+        with override_settings(RAG_HYBRID=False):
+            results = service.search_facilities("가나요양원", n_results=1)
+        self.assertEqual(len(results["ids"][0]), 1)
+
+
+class IndexingJobTests(TransactionTestCase):
+    def setUp(self):
+        Facility.objects.create(code="1", name="가나요양원")
+        Facility.objects.create(code="2", name="다라요양원")
+        self.service = make_fake_rag_service()
+
+    def wait_for_job_threads(self):
+        for thread in threading.enumerate():
+            if thread.name.startswith("rag-index-"):
+                thread.join(timeout=10)
+
+    def test_initialize_returns_job_and_reports_progress(self):
+        with patch.object(rag_service, "get_rag_service", return_value=self.service), \
+                patch.object(rag_service, "reload_rag_service"):
+            response = self.client.post(reverse("core:initialize_rag"), content_type="application/json")
+            self.assertEqual(response.status_code, 202)
+            self.wait_for_job_threads()
+        status_response = self.client.get(response.data["status_url"])
+        job = status_response.json()
+        self.assertEqual(job["id"], response.data["id"])
+        self.assertEqual((job["status"], job["phase"], job["processed"], job["total"]), ("done", "done", 2, 2))
+        self.assertEqual(job["stats"]["added"], 2)
+        self.assertIn("총 2개 시설", job["message"])
+        self.assertIsNone(job["eta_seconds"])
+        self.assertEqual(len(self.service.collection.items), 2)
+        row = IndexingJob.objects.get(pk=job["id"])
+        self.assertEqual(row.updated_at, row.finished_at)
+
+    def test_failure_is_recorded_and_active_job_is_reused(self):
+        running = IndexingJob.objects.create(status="running")
+        response = self.client.post(reverse("core:initialize_rag"), content_type="application/json")
+        self.assertEqual(response.data["id"], running.id)
+        IndexingJob.objects.filter(pk=running.pk).update(status="done")
+
+        with patch.object(rag_service, "get_rag_service", side_effect=RuntimeError("모델 로딩 실패")):
+            response = self.client.post(reverse("core:initialize_rag"), content_type="application/json")
+            self.wait_for_job_threads()
+        job = IndexingJob.objects.get(pk=response.data["id"])
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "모델 로딩 실패")
+        # QuerySet.update 는 auto_now 를 건너뛰므로 종료 기록도 updated_at 을 직접 갱신해야 한다
+        self.assertEqual(job.updated_at, job.finished_at)
+
+    def test_only_one_active_job(self):
+        active = IndexingJob.objects.create(status="running")
+        with patch.object(threading, "Thread") as thread:
+            self.assertEqual(start_indexing_job().pk, active.pk)
+        thread.assert_not_called()
+        # 확인 후 생성 사이에 다른 워커가 끼어들어도 DB 제약이 두 번째 작업을 막는다
+        with self.assertRaises(IndexingBusy):
+            enqueue_reindex([])
+        self.assertEqual(IndexingJob.objects.count(), 1)
+
+    def test_status_marks_abandoned_job_failed(self):
+        job = IndexingJob.objects.create(status="running")
+        IndexingJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - STALE_AFTER * 2)
+        response = self.client.get(reverse("core:indexing_job_status", args=[job.pk]))
+        self.assertEqual(response.json()["status"], "failed")
+
+
+class CrawlReindexTests(TransactionTestCase):
+    # 대기 작업은 웹 워커의 백그라운드 스레드(별도 DB 연결)에서 실행되므로 트랜잭션 래핑 없이 실행
+    def setUp(self):
+        self.command = CrawlCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        self.command.reindex_enabled = True
+        self.service = make_fake_rag_service()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def save(self, code, grade):
+        return self.command.save_to_db({"overview": {"code": code, "name": f"시설{code}", "grade": grade}})
+
+    def run_queued_jobs(self, service):
+        """웹 워커의 색인 확인 -> 대기 작업 실행 (스레드 종료까지 대기)"""
+        with override_settings(RAG_INDEX_CHECK_INTERVAL=0), \
+                patch.object(rag_service, "get_rag_service", return_value=service), \
+                patch.object(rag_service, "reload_rag_service", side_effect=service.reload):
+            service.refresh_if_reindexed()
+            for thread in threading.enumerate():
+                if thread.name.startswith("rag-index-"):
+                    thread.join(timeout=10)
+
+    def test_crawler_enqueues_changed_facilities_for_web_worker(self):
+        self.save("A", "A등급")
+        self.save("B", "B등급")
+        self.assertEqual(self.command.changed_codes, {"A", "B"})
+        self.service.embed_facilities()
+        self.command.reindex_pending.clear()
+
+        self.save("A", "A등급")  # 내용이 같으면 재색인 대상 아님
+        self.assertEqual(self.command.reindex_pending, set())
+        self.save("A", "C등급")
+        model = self.service.embedding_model
+        model.encoded.clear()
+        job = self.command._reindex(self.command.reindex_pending)
+        # 크롤러는 색인을 직접 쓰지 않는다
+        self.assertEqual((job.status, job.facility_ids), ("queued", [Facility.objects.get(code="A").pk]))
+        self.assertEqual(model.encoded, [])
+
+        with patch.object(self.service, "_init_collection"):
+            self.run_queued_jobs(self.service)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.stats["updated"], job.stats["removed"]), ("done", 1, 0))
+        self.assertEqual(len(model.encoded), 1)
+        self.assertIn("C등급", model.encoded[0])
+        self.assertEqual(len(self.service.collection.items), 2)
+
+    def test_enqueue_merges_into_waiting_job(self):
+        self.save("A", "A등급")
+        self.save("B", "B등급")
+        first = self.command._reindex({"A"})
+        second = self.command._reindex({"B"})
+        self.assertEqual(first.pk, second.pk)
+        job = IndexingJob.objects.get()
+        self.assertEqual((job.total, len(job.facility_ids)), (2, 2))
+
+    def test_reindex_deferred_while_other_job_runs(self):
+        self.save("A", "A등급")
+        IndexingJob.objects.create(status="running")
+        self.assertIsNone(self.command._reindex({"A"}))
+        self.assertEqual(self.command.reindex_pending, {"A"})
+
+    def test_second_worker_sees_vectors_written_by_first(self):
+        # 워커 두 개가 같은 디스크 색인을 각자의 클라이언트로 연 상태
+        with override_settings(VECTOR_STORE_PATH=Path(self.tmpdir.name)):
+            workers = [make_fake_rag_service() for _ in range(2)]
+            for worker in workers:
+                worker.vector_store = "numpy"
+                worker.collection_name = rag_service.COLLECTION_NAMES["facility"]
+                worker._init_collection()
+            self.save("A", "A등급")
+            self.command._reindex(self.command.reindex_pending)
+            self.run_queued_jobs(workers[0])
+            self.assertEqual(workers[0].collection.count(), 1)
+            self.assertEqual(workers[1].collection.count(), 0)
+            with override_settings(RAG_INDEX_CHECK_INTERVAL=0):
+                workers[1].refresh_if_reindexed()
+            self.assertEqual(workers[1].collection.count(), 1)
+
+    def test_chroma_reload_opens_new_client(self):
+        self.service.vector_store = "chroma"
+        self.service.collection_name = rag_service.COLLECTION_NAMES["facility"]
+        self.service.chroma_client = old_client = MagicMock()
+        new_client = MagicMock()
+        with patch.object(rag_service, "open_chroma_client", return_value=new_client):
+            self.service.reload()
+        # Chroma 는 클라이언트(System)를 새로 만들어야 다른 프로세스가 쓴 벡터가 보인다
+        self.assertIs(self.service.chroma_client, new_client)
+        self.assertIs(self.service.collection, new_client.get_collection.return_value)
+        old_client.get_collection.assert_not_called()
+
+    @override_settings(RAG_INDEX_CHECK_INTERVAL=0)
+    def test_service_reloads_after_reindex_in_other_process(self):
+        with patch.object(self.service, "reload") as reload:
+            self.service.refresh_if_reindexed()
+            reload.assert_not_called()
+            IndexingJob.objects.create(status="done", finished_at=timezone.now())
+            self.service.refresh_if_reindexed()
+            reload.assert_called_once()
+
+    @override_settings(RAG_INDEX_CHECK_INTERVAL=0)
+    def test_reload_records_index_version(self):
+        IndexingJob.objects.create(status="done", finished_at=timezone.now())
+        with patch.object(self.service, "_init_collection") as init_collection:
+            self.service.reload()  # 같은 프로세스의 작업 후 reload_rag_service
+            init_collection.reset_mock()
+            self.service.refresh_if_reindexed()
+            init_collection.assert_not_called()
+            # 검색 경로에서도 다른 프로세스의 재색인을 반영
+            IndexingJob.objects.create(status="done", finished_at=timezone.now() + timezone.timedelta(seconds=1))
+            self.service.search_facilities("요양원", n_results=1)
+            init_collection.assert_called_once()
+
+
+class QueryParserTests(TestCase):
+    districts = district_vocabulary([
+        "서울특별시 강남구 역삼로 1", "경기도 수원시 팔달구 효원로", "경기도 광주시 오포읍",
+        "서울특별시 중구 세종대로", "부산광역시 중구 중앙대로",
+    ])
+
+    def parse(self, query):
+        return parse_query(query, self.districts).as_dict()
+
+    def test_parses_region_grade_and_availability(self):
+        parsed = parse_query("서울 강남구 A등급 입소 가능한 곳", self.districts)
+        self.assertEqual(parsed.as_dict(), {"region": "서울", "district": "강남구", "grade": "A등급", "availability": "가능"})
+        self.assertEqual(parsed.where(), {"$and": [
+            {"facility_region": "서울"}, {"facility_district": "강남구"},
+            {"facility_grade": "A등급"}, {"facility_availability": "가능"},
+        ]})
+        self.assertEqual(self.parse("부산광역시에 있는 b 등급 요양원"), {"region": "부산", "grade": "B등급"})
+        # 한 시/도에만 있는 시/군/구는 시/도도 함께 정해진다
+        self.assertEqual(self.parse("수원시 입소 마감된 곳"), {"region": "경기", "district": "수원시", "availability": "불가능"})
+        self.assertEqual(self.parse("강남구에서 추천"), {"region": "서울", "district": "강남구"})
+        # 지명이 아닌 단어/다른 낱말의 일부는 조건으로 보지 않는다
+        self.assertIsNone(parse_query("친구가 혹시 서울대병원 근처 추천해줄 수 있나요", self.districts).where())
+
+    def test_suffix_words_outside_vocabulary_are_not_districts(self):
+        for query in ("비급여 비용 청구 방법", "치매 연구 프로그램", "보호자 요구 사항", "부산 해운대구"):
+            self.assertNotIn("district", self.parse(query), query)
+        self.assertEqual(self.parse("비급여 비용 청구 방법"), {})
+
+    def test_ambiguous_district_needs_region(self):
+        # 경기 광주시 vs 광주광역시, 서울/부산 중구
+        self.assertEqual(self.parse("광주시 요양원"), {})
+        self.assertEqual(self.parse("경기 광주시 요양원"), {"region": "경기", "district": "광주시"})
+        self.assertEqual(self.parse("광주광역시 요양원"), {"region": "광주"})
+        self.assertEqual(self.parse("중구 요양원"), {})
+        self.assertEqual(self.parse("부산 중구 요양원"), {"region": "부산", "district": "중구"})
+        # 어휘가 없으면 시/군/구 조건을 뽑지 않는다
+        self.assertEqual(parse_query("서울 강남구").as_dict(), {"region": "서울"})
+
+    def test_extracts_region_from_address(self):
+        self.assertEqual(extract_region("서울특별시 강남구 역삼로 1 | (역삼동)"), ("서울", "강남구"))
+        self.assertEqual(extract_region("경기도 수원시 팔달구 효원로"), ("경기", "수원시"))
+        self.assertEqual(extract_region("세종특별자치시 한누리대로"), ("세종", ""))
+        self.assertEqual(extract_region("주소 없음"), ("", ""))
+
+
+class MetadataPrefilterTests(TestCase):
+    def setUp(self):
+        writer = FacilityBatchWriter()
+        for code, name, grade, availability, address in (
+            ("1", "역삼요양원", "A등급", "가능", "서울특별시 강남구 역삼로 1"),
+            ("2", "대치요양원", "B등급", "가능", "서울특별시 강남구 대치로 2"),
+            ("3", "잠실요양원", "A등급", "가능", "서울특별시 송파구 올림픽로 3"),
+            ("4", "해운대요양원", "A등급", "불가능", "부산광역시 해운대구 4"),
+        ):
+            writer.add({
+                "overview": {"code": code, "name": name, "grade": grade, "availability": availability},
+                "location_items": [{"title": "주소", "content": address}],
+            })
+        writer.flush()
+        self.service = make_fake_rag_service()
+        self.service.embed_facilities()
+
+    def chat(self, query):
+        with patch.object(self.service, "generate_answer", return_value="답변"):
+            return self.service.chat(query)
+
+    def test_region_metadata_is_indexed(self):
+        metas = {item["metadata"]["facility_name"]: item["metadata"] for item in self.service.collection.items.values()}
+        self.assertEqual((metas["잠실요양원"]["facility_region"], metas["잠실요양원"]["facility_district"]), ("서울", "송파구"))
+
+    def test_chat_search_space_is_narrowed(self):
+        result = self.chat("서울 강남구 A등급 입소 가능한 곳")
+        self.assertEqual([source["facility_name"] for source in result["sources"]], ["역삼요양원"])
+        self.assertEqual(result["metadata"]["query_filters"]["district"], "강남구")
+        self.assertEqual({s["facility_name"] for s in self.chat("강남구 요양원")["sources"]}, {"역삼요양원", "대치요양원"})
+
+    def test_filters_are_relaxed_when_nothing_matches(self):
+        result = self.chat("제주도 요양원")
+        self.assertTrue(result["metadata"]["query_filters_relaxed"])
+        self.assertEqual(len(result["sources"]), 4)
+
+
+class ParseDetailTests(TestCase):
+    url = "https://www.seniortalktalk.com/search/view/A03/11171000318?page=1"
+
+    def parse_both(self, html):
+        return (
+            parse_detail(BeautifulSoup(html, "lxml"), self.url),
+            parse_detail_legacy(BeautifulSoup(html, "lxml"), self.url),
+        )
+
+    def test_single_pass_matches_legacy_parser(self):
+        indexed, legacy = self.parse_both(FULL_DETAIL_HTML)
+        self.assertEqual(indexed, legacy)
+        self.assertEqual(indexed["overview"]["capacity"], 1200)
+        self.assertEqual(indexed["basic_items"][1], {"title": "전화", "content": "tel:0212345678"})
+        # 평가정보 바로 뒤에 인력현황 h4 가 오면 두 섹션이 같은 dl 을 읽는다 (기존 동작 유지)
+        self.assertEqual(indexed["evaluation_items"], indexed["staff_items"])
+        self.assertEqual(indexed["location_items"][0]["content"], "서울특별시 강남구 역삼로 1 | (역삼동)")
+        self.assertEqual(indexed["homepage_item"], {"title": "홈페이지", "content": "가나요양원 홈"})
+        self.assertEqual([i["title"] for i in indexed["non_covered_items"]], ["식재료비", "이미용비", "기타"])
+
+    def test_matches_legacy_on_saved_snapshots(self):
+        for path in sorted(glob.glob("crawl_debug/*.html"))[:20]:
+            with open(path, encoding="utf-8") as f:
+                indexed, legacy = self.parse_both(f.read())
+            self.assertEqual(indexed, legacy, path)
+
+
+class ReparseSnapshotsTests(TestCase):
+    def test_reparses_detail_snapshots_and_skips_others(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, html in (
+                ("A03_11171000318.html", FULL_DETAIL_HTML),
+                ("G32_11171000318.html", DETAIL_HTML),
+                ("서울시_page1.html", FULL_DETAIL_HTML),
+            ):
+                with open(f"{tmp}/{name}", "w", encoding="utf-8") as f:
+                    f.write(html)
+            out = io.StringIO()
+            call_command("reparse_snapshots", tmp, workers=1, stdout=out, stderr=io.StringIO())
+
+        facility = Facility.objects.get(code="11171000318")
+        # 같은 code 중 풍부도 점수가 높은 스냅샷이 반영된다
+        self.assertEqual(facility.capacity, 1200)
+        self.assertEqual(facility.basic_items.count(), 2)
+        self.assertIn("건너뜀 1개", out.getvalue())
@@ -20,4 +20,5 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('api/chat/', views.ChatbotAPI.as_view(), name='chatbot_api'),
     path('api/initialize-rag/', views.initialize_rag, name='initialize_rag'),
+    path('api/initialize-rag/<int:job_id>/', views.indexing_job_status, name='indexing_job_status'),
 ]
@@ -0,0 +1,348 @@
+"""프로세스 내 NumPy 벡터 색인 (ChromaDB 대체 백엔드, RAG_VECTOR_STORE='numpy')
+
+시설 수천 개 x 384차원 규모에서는 ANN 없이 행렬 곱 한 번 + argpartition 으로 정확한 top-k 를
+구하는 편이 Chroma 클라이언트를 거치는 것보다 빠르다. RAGService 가 쓰는 Chroma 컬렉션 API
+(get/upsert/delete/query, where 의 $and/$or/$in/$ne/같음)를 그대로 제공한다.
+
+저장 형식 (디렉터리 하나):
+- CURRENT: 현재 버전 디렉터리 이름. 각 버전 디렉터리에는
+  - vectors.npy: (N, dim) float32 원본 행렬, 열 때 메모리 맵으로 읽는다
+  - codes.npy/scales.npy: 양자화 모드(float16, int8)의 검색용 압축 행렬과 행별 스케일 (메모리에 적재)
+  - records.json: 행 순서대로 ids/documents/metadatas
+쓰기는 메모리에서 모았다가 persist() 에서 새 버전 디렉터리에 모두 쓴 뒤 CURRENT 하나만 교체하므로,
+다른 워커가 같은 시점에 다시 열어도 벡터와 레코드가 서로 다른 버전으로 섞이지 않는다.
+거리는 Chroma 기본값과 같은 제곱 L2 다.
+
+양자화 모드는 압축 행렬로 전체를 훑어 k * rerank 개 후보를 고른 뒤, 후보 행만 float32 원본
+(메모리 맵)으로 정확한 거리를 다시 계산해 top-k 를 정한다. 상주 메모리는 압축 행렬 크기
+(int8 은 float32 의 약 1/4)이고, 원본은 재정렬 후보 행만 페이지 단위로 읽힌다.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+VECTORS_FILE = 'vectors.npy'
+CODES_FILE = 'codes.npy'
+SCALES_FILE = 'scales.npy'
+RECORDS_FILE = 'records.json'
+CURRENT_FILE = 'CURRENT'
+VERSION_PREFIX = 'v'
+STORE_DTYPES = ('float32', 'float16', 'int8')
+# 압축 행렬은 이 행 수만큼씩 float32 로 바꿔 곱한다 (NumPy float16/int8 행렬 곱은 BLAS 를 쓰지 않아 느림)
+DOT_CHUNK_ROWS = 8192
+
+
+def _dot(vectors: np.ndarray, query: np.ndarray) -> np.ndarray:
+    if vectors.dtype == np.float32:
+        return vectors @ query
+    return np.concatenate([
+        vectors[i:i + DOT_CHUNK_ROWS].astype(np.float32) @ query
+        for i in range(0, len(vectors), DOT_CHUNK_ROWS)
+    ]) if len(vectors) else np.zeros(0, dtype=np.float32)
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """float32 행렬 -> (압축 행렬, 행별 스케일). int8 은 행마다 max|x|/127 스케일의 대칭 양자화"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == 'int8':
+        scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0, dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    return vectors.astype(dtype), np.ones(len(vectors), dtype=np.float32)
+
+
+class NumpyVectorStore:
+    def __init__(self, path, dtype: str = 'float32', rerank: int = 4):
+        if dtype not in STORE_DTYPES:
+            raise ValueError(f"지원하지 않는 벡터 저장 형식: {dtype} ({', '.join(STORE_DTYPES)})")
+        self.path = Path(path)
+        self.dtype = dtype
+        self.rerank = max(1, rerank)
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        # 아직 행렬에 반영하지 않은 (행 번호, 벡터)
+        self._pending: Dict[int, np.ndarray] = {}
+        self._dirty = False
+        self._load()
+
+    @property
+    def quantized(self) -> bool:
+        return self.dtype != 'float32'
+
+    # --- 저장/로딩 ---------------------------------------------------------
+
+    def _version_dir(self) -> Optional[Path]:
+        """CURRENT 가 가리키는 버전 디렉터리 (CURRENT 이전 형식이면 저장 디렉터리 자체)"""
+        try:
+            name = (self.path / CURRENT_FILE).read_text(encoding='utf-8').strip()
+        except FileNotFoundError:
+            return self.path
+        return self.path / name
+
+    def _load(self):
+        directory = self._version_dir()
+        vectors_path = directory / VECTORS_FILE
+        records_path = directory / RECORDS_FILE
+        if not (vectors_path.exists() and records_path.exists()):
+            self._reindex()
+            return
+        with open(records_path, encoding='utf-8') as f:
+            records = json.load(f)
+        vectors = np.load(vectors_path, mmap_mode='r')
+        if len(vectors) != len(records['ids']):
+            raise ValueError(f"벡터 색인 파일이 손상되었습니다: 벡터 {len(vectors)}개, 레코드 {len(records['ids'])}개 ({directory})")
+        self._ids = records['ids']
+        self._documents = records['documents']
+        self._metadatas = records['metadatas']
+        self._vectors = vectors
+        if self.quantized:
+            codes_path, scales_path = directory / CODES_FILE, directory / SCALES_FILE
+            if codes_path.exists() and scales_path.exists():
+                codes = np.load(codes_path)
+                if codes.dtype == np.dtype(self.dtype) and len(codes) == len(self._ids):
+                    self._codes, self._scales = codes, np.load(scales_path)
+            if self._codes is None:
+                # 저장 형식을 바꾼 경우 원본에서 다시 양자화
+                self._codes, self._scales = quantize(self._vectors, self.dtype)
+        self._reindex()
+
+    def persist(self):
+        """변경분을 디스크에 기록 (변경이 없으면 아무것도 하지 않음)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._consolidate()
+            self.path.mkdir(parents=True, exist_ok=True)
+            previous = self._version_dir()
+            name = f'{VERSION_PREFIX}{time.time_ns()}-{os.getpid()}'
+            directory = self.path / name
+            directory.mkdir()
+            np.save(directory / VECTORS_FILE, np.ascontiguousarray(self._vectors, dtype=np.float32))
+            if self.quantized:
+                np.save(directory / CODES_FILE, self._codes)
+                np.save(directory / SCALES_FILE, self._scales)
+            with open(directory / RECORDS_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'ids': self._ids, 'documents': self._documents, 'metadatas': self._metadatas},
+                          f, ensure_ascii=False)
+            # 버전 전환은 CURRENT 교체 한 번
+            current_tmp = self.path / f'{CURRENT_FILE}.tmp.{os.getpid()}'
+            current_tmp.write_text(name, encoding='utf-8')
+            os.replace(current_tmp, self.path / CURRENT_FILE)
+            self._dirty = False
+            self._remove_old_versions(keep={name, previous.name})
+
+    def _remove_old_versions(self, keep):
+        """현재/직전 버전을 뺀 버전 디렉터리 삭제 (직전 버전은 막 CURRENT 를 읽은 워커가 열 수 있어 남김)"""
+        for entry in self.path.iterdir():
+            if entry.is_dir() and entry.name.startswith(VERSION_PREFIX) and entry.name not in keep:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _reindex(self):
+        self._row = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._sq_norms = None
+
+    def _consolidate(self):
+        """추가/갱신된 벡터를 행렬에 반영 (메모리 맵이면 쓰기 가능한 배열로 복사됨)"""
+        if not self._pending:
+            return
+        dim = len(next(iter(self._pending.values())))
+        vectors = np.zeros((len(self._ids), dim), dtype=np.float32)
+        if self._vectors.size:
+            vectors[:len(self._vectors)] = self._vectors
+        rows = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+        vectors[rows] = np.stack(list(self._pending.values()))
+        self._vectors = vectors
+        if self.quantized:
+            codes, scales = quantize(vectors[rows], self.dtype)
+            if self._codes is None or len(self._codes) != len(vectors):
+                full_codes = np.zeros(vectors.shape, dtype=self.dtype)
+                full_scales = np.ones(len(vectors), dtype=np.float32)
+                if self._codes is not None and len(self._codes):
+                    full_codes[:len(self._codes)] = self._codes
+                    full_scales[:len(self._scales)] = self._scales
+                self._codes, self._scales = full_codes, full_scales
+            self._codes[rows] = codes
+            self._scales[rows] = scales
+        self._pending = {}
+        self._sq_norms = None
+
+    def _norms(self) -> np.ndarray:
+        """검색 행렬(양자화 모드는 복원한 압축 벡터)의 행별 제곱 노름"""
+        if self._sq_norms is None:
+            if self.quantized:
+                norms = np.zeros(len(self._codes), dtype=np.float32)
+                for i in range(0, len(self._codes), DOT_CHUNK_ROWS):
+                    chunk = self._codes[i:i + DOT_CHUNK_ROWS].astype(np.float32)
+                    norms[i:i + DOT_CHUNK_ROWS] = np.einsum('ij,ij->i', chunk, chunk)
+                self._sq_norms = norms * self._scales ** 2
+            else:
+                self._sq_norms = np.einsum('ij,ij->i', self._vectors, self._vectors)
+        return self._sq_norms
+
+    def memory_usage(self) -> Dict[str, int]:
+        """검색 시 상주하는 행렬 바이트(search_bytes)와 float32 원본 바이트(full_bytes)"""
+        with self._lock:
+            self._consolidate()
+            full = len(self._ids) * (self._vectors.shape[1] if self._vectors.ndim == 2 else 0) * 4
+            search = full if not self.quantized else self._codes.nbytes + self._scales.nbytes
+            return {'vectors': len(self._ids), 'search_bytes': int(search), 'full_bytes': int(full)}
+
+    # --- 메타데이터 필터 ---------------------------------------------------
+
+    def _column(self, key: str) -> np.ndarray:
+        column = self._columns.get(key)
+        if column is None:
+            column = np.empty(len(self._metadatas), dtype=object)
+            for row, meta in enumerate(self._metadatas):
+                column[row] = meta.get(key)
+            self._columns[key] = column
+        return column
+
+    def _mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Chroma where 절 -> 행 boolean 마스크"""
+        masks = []
+        for key, condition in where.items():
+            if key in ('$and', '$or'):
+                parts = [self._mask(part) for part in condition]
+                masks.append(np.logical_and.reduce(parts) if key == '$and' else np.logical_or.reduce(parts))
+                continue
+            column = self._column(key)
+            if not isinstance(condition, dict):
+                condition = {'$eq': condition}
+            for op, value in condition.items():
+                if op == '$eq':
+                    masks.append(column == value)
+                elif op == '$ne':
+                    masks.append(column != value)
+                elif op in ('$in', '$nin'):
+                    values = set(value)
+                    mask = np.fromiter((item in values for item in column), dtype=bool, count=len(column))
+                    masks.append(mask if op == '$in' else ~mask)
+                else:
+                    raise ValueError(f"지원하지 않는 where 연산자: {op}")
+        if not masks:
+            return np.ones(len(self._ids), dtype=bool)
+        return np.logical_and.reduce(masks).astype(bool)
+
+    # --- Chroma 컬렉션 API -------------------------------------------------
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, ids: Sequence[str], embeddings, documents: Optional[Sequence[str]] = None,
+               metadatas: Optional[Sequence[Dict[str, Any]]] = None):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            for i, doc_id in enumerate(ids):
+                row = self._row.get(doc_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._row[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._documents.append(None)
+                    self._metadatas.append({})
+                self._pending[row] = embeddings[i]
+                if documents is not None:
+                    self._documents[row] = documents[i]
+                if metadatas is not None:
+                    self._metadatas[row] = dict(metadatas[i])
+            self._columns = {}
+            self._dirty = True
+
+    def delete(self, ids: Sequence[str]):
+        with self._lock:
+            rows = {self._row[doc_id] for doc_id in ids if doc_id in self._row}
+            if not rows:
+                return
+            self._consolidate()
+            keep = [row for row in range(len(self._ids)) if row not in rows]
+            self._ids = [self._ids[row] for row in keep]
+            self._documents = [self._documents[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._vectors = np.asarray(self._vectors)[keep]
+            if self.quantized:
+                self._codes, self._scales = self._codes[keep], self._scales[keep]
+            self._reindex()
+            self._dirty = True
+
+    def get(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include: Sequence[str] = ('documents', 'metadatas')) -> Dict[str, Any]:
+        with self._lock:
+            if ids is not None:
+                rows = [self._row[doc_id] for doc_id in ids if doc_id in self._row]
+            else:
+                rows = list(range(len(self._ids)))
+            if where:
+                mask = self._mask(where)
+                rows = [row for row in rows if mask[row]]
+            result = {'ids': [self._ids[row] for row in rows]}
+            if 'documents' in include:
+                result['documents'] = [self._documents[row] for row in rows]
+            if 'metadatas' in include:
+                result['metadatas'] = [self._metadatas[row] for row in rows]
+            if 'embeddings' in include:
+                self._consolidate()
+                result['embeddings'] = np.asarray(self._vectors[rows], dtype=np.float32)
+            return result
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict[str, Any]] = None,
+              include: Sequence[str] = ('documents', 'metadatas', 'distances')) -> Dict[str, Any]:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        with self._lock:
+            self._consolidate()
+            result = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+            candidates = np.flatnonzero(self._mask(where)) if where else None
+            for query in queries:
+                rows, distances = self._nearest(query, n_results, candidates)
+                result['ids'].append([self._ids[row] for row in rows])
+                result['documents'].append([self._documents[row] for row in rows])
+                result['metadatas'].append([self._metadatas[row] for row in rows])
+                result['distances'].append(distances.tolist())
+            return {key: value for key, value in result.items() if key == 'ids' or key in include}
+
+    def _nearest(self, query: np.ndarray, k: int, candidates: Optional[np.ndarray]):
+        """제곱 L2 거리 top-k -> (행 번호 배열, 거리 배열), 가까운 순"""
+        if not len(self._ids) or (candidates is not None and not len(candidates)):
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=np.float32)
+        norms = self._norms()
+        if self.quantized:
+            # 압축 벡터 x^ = scale * code 로 근사 거리 -> 후보 k * rerank 개
+            matrix, scales = self._codes, self._scales
+            if candidates is not None:
+                matrix, scales, norms = matrix[candidates], scales[candidates], norms[candidates]
+            distances = norms - 2.0 * scales * _dot(matrix, query) + query @ query
+            shortlist = _top_k(distances, k * self.rerank)
+            # 후보 행만 float32 원본으로 정확한 거리 재계산 (정렬해서 메모리 맵을 순서대로 읽음)
+            rows = np.sort(candidates[shortlist] if candidates is not None else shortlist)
+            exact = np.asarray(self._vectors[rows], dtype=np.float32)
+            distances = np.einsum('ij,ij->i', exact - query, exact - query)
+            top = _top_k(distances, k)
+            return rows[top], distances[top]
+        vectors = self._vectors
+        if candidates is not None:
+            vectors, norms = vectors[candidates], norms[candidates]
+        # |x - q|^2 = |x|^2 - 2 x.q + |q|^2
+        distances = norms - 2.0 * _dot(vectors, query) + query @ query
+        top = _top_k(distances, k)
+        rows = candidates[top] if candidates is not None else top
+        return rows, distances[top]
+
+
+def _top_k(distances: np.ndarray, k: int) -> np.ndarray:
+    """가장 작은 k 개의 위치 (가까운 순)"""
+    k = min(k, len(distances))
+    top = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+    return top[np.argsort(distances[top], kind='stable')]
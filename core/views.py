@@ -1,15 +1,25 @@
+import time
+
 from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
 from rest_framework import viewsets, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.http import JsonResponse
-from .models import Facility, ChatMessage
-from .serializers import FacilityListSerializer, FacilityDetailSerializer, ChatRequestSerializer, ChatResponseSerializer
+from .attributes import apply_attribute_filters, parse_attribute_filters
+from .fulltext import fulltext_search
+from .indexing import expire_stale_jobs, start_indexing_job
+from .models import Facility, ChatMessage, IndexingJob
+from .serializers import (
+    FacilityListSerializer, FacilityDetailSerializer, ChatRequestSerializer, ChatResponseSerializer,
+    IndexingJobSerializer,
+)
 try:
-    from .rag_service import RAGService
+    from .rag_service import get_rag_service
 except Exception:  # pragma: no cover - dependency issues during tests
-    RAGService = None
+    get_rag_service = None
 
 # 기존 Django 템플릿 뷰
 def chatbot_view(request):
@@ -63,9 +73,36 @@ class FacilityViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(kind=kind)
         if availability:
             queryset = queryset.filter(availability=availability)
+        # 정형 속성 조건: ?attr=staff:간호사>=10&attr=noncovered:식재료비<=300000
+        try:
+            attr_filters = parse_attribute_filters(self.request.query_params.getlist('attr'))
+        except ValueError as e:
+            raise ValidationError({'attr': str(e)})
+        queryset = apply_attribute_filters(queryset, attr_filters)
 
         return queryset.order_by('name')
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """전문 검색: /api/facilities/search/?q=강남 치매&limit=20 (bm25 순위, <mark> 강조)"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': '검색어를 입력해주세요.'})
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            raise ValidationError({'limit': '정수를 입력해주세요.'})
+
+        started = time.perf_counter()
+        hits = fulltext_search(query, limit=limit)
+        took_ms = (time.perf_counter() - started) * 1000
+        results = []
+        for hit in hits:
+            row = FacilityListSerializer(hit['facility']).data
+            row.update(score=hit['score'], name_highlight=hit['name_highlight'], snippet=hit['snippet'])
+            results.append(row)
+        return Response({'query': query, 'count': len(results), 'took_ms': round(took_ms, 2), 'results': results})
+
 class ChatbotAPI(APIView):
     """RAG 챗봇 API"""
 
@@ -75,10 +112,10 @@ class ChatbotAPI(APIView):
             query = serializer.validated_data['query']
 
             try:
-                if RAGService is None:
+                if get_rag_service is None:
                     raise Exception('RAGService is not available')
-                rag_service = RAGService()
-                result = rag_service.chat(query)
+                rag_service = get_rag_service()
+                result = rag_service.chat(query, filters=serializer.validated_data.get('filters'))
 
                 user = request.user if request.user.is_authenticated else None
                 if user:
@@ -105,15 +142,21 @@ class ChatbotAPI(APIView):
 
 @api_view(['POST'])
 def initialize_rag(request):
-    """RAG 시스템 초기화 (벡터 DB 구축)"""
-    try:
-        rag_service = RAGService()
-        count = rag_service.embed_facilities()
-        return Response({
-            'message': f'RAG 시스템이 초기화되었습니다. {count}개 시설이 벡터화되었습니다.',
-            'facilities_count': count
-        })
-    except Exception as e:
+    """RAG 시스템 초기화 (벡터 DB 구축) 작업 시작 -> 작업 id 즉시 반환, 진행 상황은 indexing_job_status 로 조회"""
+    if get_rag_service is None:
         return Response({
-            'error': f'RAG 초기화 중 오류가 발생했습니다: {str(e)}'
+            'error': 'RAG 초기화 중 오류가 발생했습니다: RAGService is not available'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    rebuild = str(request.data.get('rebuild', '')).lower() in ('1', 'true', 'yes')
+    job = start_indexing_job(rebuild=rebuild)
+    data = IndexingJobSerializer(job).data
+    data['status_url'] = reverse('core:indexing_job_status', args=[job.pk])
+    return Response(data, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+def indexing_job_status(request, job_id: int):
+    """RAG 색인 작업 진행 상황 (단계, 처리 수, 처리 속도, 남은 예상 시간)"""
+    # 작업을 실행하던 워커가 죽었으면 실패로 보여 클라이언트 폴링이 끝나도록
+    expire_stale_jobs()
+    job = get_object_or_404(IndexingJob, pk=job_id)
+    return Response(IndexingJobSerializer(job).data)